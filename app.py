@@ -1,15 +1,20 @@
 import os
+import re
 import json
-import importlib
+import hashlib
 import time
+import threading
 from datetime import datetime
 from flask import (
     Flask, render_template, request, send_from_directory,
     url_for, redirect, flash, jsonify, session
 )
-# ⚠️ importiamo il modulo, non la funzione (così possiamo fare reload)
-import scraper_core.scraper as scraper_mod
+# orchestratore e fonti caricati in modo lazy (reload solo se il file cambia)
+from scraper_core.sources import REGISTRY, load_module
+from scraper_core.exporters import available_formats
+from scraper_core import metrics, page_cache
 from data_loader import load_parametri
+from jobs import JobManager, FINISHED_STATES, DONE
 import pandas as pd  # ok anche se non usato; puoi rimuoverlo se vuoi
 
 app = Flask(__name__)
@@ -108,36 +113,62 @@ RESULTS_DIR = "/app/results"
 SNAP_DIR = os.path.join(RESULTS_DIR, "snapshots")
 os.makedirs(SNAP_DIR, exist_ok=True)
 
+# Tipi MIME per gli export non noti a mimetypes
+import mimetypes
+mimetypes.add_type("application/x-ndjson", ".jsonl")
+mimetypes.add_type("application/vnd.apache.parquet", ".parquet")
+
+# File interni in RESULTS_DIR: record dei job (parametri ed eventi) e uso dei codici.
+# Mai elencati né scaricabili da /results o /download.
+_PRIVATE_RESULTS = ("jobs", "test_codes_usage.json")
+
+def _is_private_result(rel: str) -> bool:
+    rel = rel.replace("\\", "/")
+    return rel.split("/", 1)[0] in _PRIVATE_RESULTS or rel.endswith(".part")
+
+def _public_result(fname: str):
+    """Nome relativo di un file risultato scaricabile, None se fuori da RESULTS_DIR, interno o inesistente."""
+    root = os.path.realpath(RESULTS_DIR)
+    path = os.path.realpath(os.path.join(root, fname))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    rel = os.path.relpath(path, root).replace("\\", "/")
+    return None if _is_private_result(rel) else rel
+
 @app.get("/results")
 def list_results():
-    # Elenco JSON dei file in /app/results e sottocartelle
+    # Elenco JSON dei file in RESULTS_DIR e sottocartelle (?ext=csv,parquet per filtrare)
+    exts = {e.strip().lower().lstrip(".") for e in (request.args.get("ext") or "").split(",") if e.strip()}
     out = []
-    for root, _, files in os.walk(RESULTS_DIR):
+    for root, dirs, files in os.walk(RESULTS_DIR):
+        if root == RESULTS_DIR:
+            dirs[:] = [d for d in dirs if d not in _PRIVATE_RESULTS]
         for f in files:
+            if exts and f.rsplit(".", 1)[-1].lower() not in exts:
+                continue
             rel = os.path.relpath(os.path.join(root, f), RESULTS_DIR).replace("\\", "/")
-            out.append(rel)
+            if not _is_private_result(rel):  # .part = export ancora in scrittura
+                out.append(rel)
     out.sort()
     return jsonify(out)
 
 @app.get("/results/<path:fname>")
 def download_result(fname: str):
-    # Permetti solo percorsi dentro /app/results
-    safe_root = os.path.realpath(RESULTS_DIR)
-    safe_path = os.path.realpath(os.path.join(safe_root, fname))
-    if not safe_path.startswith(safe_root):
-        return abort(403)
-    return send_from_directory(safe_root, fname, as_attachment=True)
+    # Solo file risultato dentro RESULTS_DIR (niente record dei job)
+    rel = _public_result(fname)
+    if rel is None:
+        return abort(404)
+    return send_from_directory(os.path.realpath(RESULTS_DIR), rel, as_attachment=True)
 
 # --- Diagnostica Chrome UC in container ---
-from scraper_core.driver_factory import make_uc_driver
+from scraper_core.driver_factory import get_pool
 
 @app.get("/diag/uc")
 def diag_uc():
     try:
-        d = make_uc_driver()
-        d.get("https://example.com/")
-        title = d.title
-        d.quit()
+        with get_pool().lease() as d:
+            d.get("https://example.com/")
+            title = d.title
         return {"ok": True, "title": title}, 200
     except Exception as e:
         import traceback
@@ -147,15 +178,50 @@ def diag_uc():
             "trace": traceback.format_exc().splitlines()[-5:]
         }, 500
 
+# Il pre-avvio di Chrome è nell'hook post_fork di gunicorn.conf.py (solo nei worker gunicorn,
+# non a ogni import di app: test, CLI, flask run)
+
+# --- Versioning asset statici: url_for('static', ...) aggiunge ?v=<hash contenuto> ---
+_STATIC_VERSIONS = {}
+
+def _static_version(filename):
+    path = os.path.join(app.static_folder, filename)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (filename, st.st_mtime_ns, st.st_size)
+    v = _STATIC_VERSIONS.get(key)
+    if v is None:
+        with open(path, "rb") as f:
+            v = hashlib.sha256(f.read()).hexdigest()[:10]
+        _STATIC_VERSIONS[key] = v
+    return v
+
+@app.url_defaults
+def _version_static_urls(endpoint, values):
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        v = _static_version(values["filename"])
+        if v:
+            values["v"] = v
+
 # --- PWA: route per il service worker ---
+# Asset dell'app shell precaricati dal service worker (cache versionata)
+SHELL_STATIC = ["style.css", "logo.png", "manifest.json", "icons/icon-192.png", "icons/icon-512.png"]
+
 @app.route("/service-worker.js")
 def service_worker():
-    # Il file deve trovarsi in static/service-worker.js
-    return send_from_directory(
-        app.static_folder,
-        "service-worker.js",
-        mimetype="application/javascript"
-    )
+    # Il file deve trovarsi in static/service-worker.js; versione e lista asset
+    # vengono iniettate qui, così ogni deploy con asset diversi invalida la cache
+    with open(os.path.join(app.static_folder, "service-worker.js"), "r", encoding="utf-8") as f:
+        src = f.read()
+    assets = ["/"] + [url_for("static", filename=name) for name in SHELL_STATIC]
+    version = hashlib.sha256((src + "|".join(assets)).encode("utf-8")).hexdigest()[:12]
+    body = (src.replace("__SHELL_VERSION__", version)
+               .replace("__SHELL_ASSETS__", json.dumps(assets)))
+    resp = app.response_class(body, mimetype="application/javascript")
+    resp.set_etag(version)
+    return resp.make_conditional(request)
 
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-key")
 
@@ -173,10 +239,40 @@ def check_beta_expiration():
         return "Versione di prova scaduta. Contatta l'amministratore.", 403
 
 # ----------------------------
-# No-cache per tutte le risposte
+# Politica di cache HTTP
 # ----------------------------
+# Endpoint con header di cache propri (contenuto versionato)
+CACHEABLE_ENDPOINTS = {"counties_payload"}
+# File risultato con timestamp nel nome (…_20250101_120000.xlsx): contenuto immutabile
+_IMMUTABLE_RESULT = re.compile(r"_\d{8}_\d{6}\.[A-Za-z0-9.]+$")
+
 @app.after_request
-def add_no_cache(resp):
+def apply_cache_policy(resp):
+    """
+    - asset statici versionati (?v=hash): cache pubblica immutabile
+    - asset statici non versionati (manifest/icone): 1 ora + ETag
+    - file risultato con timestamp: privati e immutabili; gli altri rivalidati via ETag
+    - service worker: sempre rivalidato
+    - pagine dinamiche / API: no-store
+    """
+    endpoint = request.endpoint
+    if endpoint in CACHEABLE_ENDPOINTS:
+        return resp
+    if endpoint == "static" and resp.status_code in (200, 304):
+        if request.args.get("v"):
+            resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            resp.headers["Cache-Control"] = "public, max-age=3600"
+        return resp
+    if endpoint in ("download_file", "download_result") and resp.status_code in (200, 206, 304):
+        if _IMMUTABLE_RESULT.search(request.path):
+            resp.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+        else:
+            resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+    if endpoint == "service_worker":
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
     resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
     resp.headers["Pragma"] = "no-cache"
     resp.headers["Expires"] = "0"
@@ -239,22 +335,40 @@ def _fallback_counties_mapping():
     }
 
 # Precaricamento iniziale
+COUNTIES_FALLBACK = False
 try:
     df = load_parametri()
     COUNTIES_BY_STATE = _build_counties_mapping(df)
 except Exception as e:
     print(f"[WARN] Impossibile caricare parametri.xlsx ({e}); uso fallback.")
     COUNTIES_BY_STATE = _fallback_counties_mapping()
+    COUNTIES_FALLBACK = True
 
 STATES = sorted(COUNTIES_BY_STATE.keys())
 STATES_FULL = [(code, STATE_NAMES.get(code, code)) for code in STATES]
 
-# Helper: ricarica l’orchestratore e restituisce la funzione aggiornata
+def _build_counties_payloads(mapping):
+    """
+    Serializza UNA volta le contee per Stato: {STATE: (hash, bytes)}.
+    L'hash del contenuto entra nell'URL, quindi la risposta è immutabile.
+    """
+    out = {}
+    for code, counties in mapping.items():
+        body = json.dumps({"state": code, "counties": counties}, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+        out[code] = (hashlib.sha256(body).hexdigest()[:12], body)
+    return out
+
+COUNTIES_PAYLOADS = _build_counties_payloads(COUNTIES_BY_STATE)
+# Indice piccolo inline nella pagina: {STATE: url del JSON versionato}
+COUNTIES_INDEX_JSON = json.dumps(
+    {code: f"/counties/{code}.{digest}.json" for code, (digest, _) in COUNTIES_PAYLOADS.items()},
+    separators=(",", ":"),
+)
+
+# Helper: orchestratore aggiornato (ricaricato solo se scraper.py è cambiato su disco)
 def _get_run_scraping():
-    global scraper_mod
-    scraper_mod = importlib.reload(scraper_mod)
-    print("[USING SCRAPER]", scraper_mod.__file__)  # log: quale scraper.py sta usando
-    return scraper_mod.run_scraping
+    return load_module("scraper_core.scraper").run_scraping
 
 # -------------------------------------------------
 # API opzionale per test dinamico
@@ -264,17 +378,45 @@ def api_counties():
     state = (request.args.get("state") or "").strip().upper()
     if not state:
         return jsonify({"ok": False, "error": "Missing state"}), 400
-    try:
-        df = load_parametri()
-        mapping = _build_counties_mapping(df)
-        return jsonify({"ok": True, "state": state, "counties": mapping.get(state, [])})
-    except Exception as e:
-        return jsonify({
-            "ok": True,
-            "state": state,
-            "counties": _fallback_counties_mapping().get(state, []),
-            "fallback": True
-        })
+    out = {"ok": True, "state": state, "counties": COUNTIES_BY_STATE.get(state, [])}
+    if COUNTIES_FALLBACK:
+        out["fallback"] = True
+    return jsonify(out)
+
+@app.get("/api/sources")
+def api_sources():
+    return jsonify({"ok": True, "sources": REGISTRY.capabilities()})
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # formato testo Prometheus, sommato su tutti i worker gunicorn (+ cache pagine condivisa)
+    body = metrics.render() + page_cache.render_stats()
+    return app.response_class(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/diag/cache")
+def diag_cache():
+    cache = page_cache.get_cache()
+    if cache is None:
+        return {"ok": False, "error": "Cache pagine disattivata o non disponibile"}, 503
+    return {"ok": True, "path": cache.path, "ttl": cache.ttl, "max_bytes": cache.max_bytes, **cache.stats()}, 200
+
+@app.get("/counties/<state>.<digest>.json")
+def counties_payload(state, digest):
+    state = (state or "").upper()
+    entry = COUNTIES_PAYLOADS.get(state)
+    if entry is None:
+        return jsonify({"ok": False, "error": "Unknown state"}), 404
+    current, body = entry
+    if digest != current:
+        # URL vecchio (mappa cambiata dopo un deploy): rimanda alla versione attuale
+        return redirect(f"/counties/{state}.{current}.json")
+    if request.if_none_match.contains(current):
+        resp = app.response_class(status=304)
+    else:
+        resp = app.response_class(body, mimetype="application/json")
+    resp.set_etag(current)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
 
 # -------------------------------------------------
 # PAGINA PRINCIPALE
@@ -284,7 +426,8 @@ def index():
     return render_template(
         "index.html",
         states_full=STATES_FULL,
-        counties_json=json.dumps(COUNTIES_BY_STATE, ensure_ascii=False),
+        counties_index_json=COUNTIES_INDEX_JSON,
+        export_formats=available_formats(),
         message=None,
         download_links=None,   # compatibilità (lista)
         download_link=None,    # compatibilità (singolo)
@@ -293,7 +436,8 @@ def index():
         realtor_url=None,
         zillow_ready=False,
         zillow_url=None,
-        done=False
+        done=False,
+        job_id=None
     )
 
 # -------------------------------------------------
@@ -308,8 +452,93 @@ def reset():
     return redirect(url_for("index", _=int(time.time())))
 
 # -------------------------------------------------
-# ESECUZIONE SCRAPING
+# ESECUZIONE SCRAPING (in background)
 # -------------------------------------------------
+JOBS = JobManager(os.path.join(RESULTS_DIR, "jobs"))
+
+def _file_url(path):
+    if not path:
+        return None
+    fname = os.path.basename(path)
+    full = os.path.join(RESULTS_DIR, fname)
+    if os.path.isfile(path):
+        return url_for("download_file", filename=os.path.basename(path))
+    if os.path.isfile(full):
+        return url_for("download_file", filename=fname)
+    return None
+
+def _download_info(outpaths):
+    """Normalizza l'output dell'orchestratore in link di download per fonte."""
+    download_links = []
+    realtor_ready = False
+    realtor_url = None
+    zillow_ready = False
+    zillow_url = None
+
+    # Caso 1: dict {"realtor": "...", "zillow": "..."}
+    if isinstance(outpaths, dict):
+        for k, v in outpaths.items():
+            url = _file_url(v)
+            if url:
+                download_links.append(url)
+                key = (k or "").lower()
+                if "realtor" in key:
+                    realtor_ready, realtor_url = True, url
+                if "zillow" in key:
+                    zillow_ready, zillow_url = True, url
+
+    # Caso 2: lista/tupla di path
+    elif isinstance(outpaths, (list, tuple)):
+        for v in outpaths:
+            url = _file_url(v)
+            if url:
+                download_links.append(url)
+                low = os.path.basename(str(v)).lower()
+                if "realtor" in low and not realtor_ready:
+                    realtor_ready, realtor_url = True, url
+                if "zillow" in low and not zillow_ready:
+                    zillow_ready, zillow_url = True, url
+
+    # Caso 3: singolo string path
+    elif isinstance(outpaths, str):
+        url = _file_url(outpaths)
+        if url:
+            download_links.append(url)
+            low = os.path.basename(outpaths).lower()
+            if "realtor" in low:
+                realtor_ready, realtor_url = True, url
+            elif "zillow" in low:
+                zillow_ready, zillow_url = True, url
+
+    return {
+        "download_links": download_links,
+        "realtor_ready": realtor_ready,
+        "realtor_url": realtor_url,
+        "zillow_ready": zillow_ready,
+        "zillow_url": zillow_url,
+    }
+
+def _outpath_list(outpaths):
+    if isinstance(outpaths, dict):
+        return [v for v in outpaths.values() if v]
+    if isinstance(outpaths, (list, tuple)):
+        return [v for v in outpaths if v]
+    return [outpaths] if outpaths else []
+
+def _file_list(outpaths):
+    """[{name, format, url}] per ogni file prodotto (Excel ed export)."""
+    out = []
+    for p in _outpath_list(outpaths):
+        url = _file_url(p)
+        if url:
+            name = os.path.basename(str(p))
+            out.append({"name": name, "format": name.rsplit(".", 1)[-1].lower(), "url": url})
+    return out
+
+def _wants_json():
+    best = request.accept_mimetypes.best_match(["application/json", "text/html"])
+    return best == "application/json" or request.args.get("format") == "json"
+
 @app.route("/run", methods=["POST"])
 @app.route("/run_scraper", methods=["POST"])
 def run():
@@ -319,6 +548,8 @@ def run():
         ok_code, msg_code, remaining = check_and_consume_code(access_code)
         if not ok_code:
             app.logger.warning(f"[AUTH] Codice respinto: {access_code!r} - {msg_code}")
+            if _wants_json():
+                return jsonify({"ok": False, "error": msg_code}), 403
             flash(msg_code, "error")
             return redirect(url_for("index"))
         else:
@@ -335,149 +566,191 @@ def run():
 
         include_forsale = bool(request.form.get("include_forsale"))
         include_sold    = bool(request.form.get("include_sold"))
-        use_realtor     = bool(request.form.get("use_realtor"))
-        use_zillow      = bool(request.form.get("use_zillow"))
         headless        = bool(request.form.get("headless"))
+        bypass_cache    = bool(request.form.get("refresh"))
+        # formati di output (fmt_xlsx, fmt_csv, ...); nessuno selezionato = solo Excel
+        formats = [f for f in ["xlsx"] + available_formats() if request.form.get(f"fmt_{f}")]
 
         print("[DEBUG FORM]", dict(request.form))
 
+        error = None
+        # una checkbox use_<nome> per ogni fonte registrata
+        sources = [name for name in REGISTRY.names() if request.form.get(f"use_{name}")]
         if not state or not county:
-            flash("Inserisci Stato e Contea.", "error")
-            return redirect(url_for("index"))
-
-        sources = []
-        if use_realtor:
-            sources.append("realtor")
-        if use_zillow:
-            sources.append("zillow")
-        if not sources:
-            flash("Seleziona almeno una fonte (Realtor o Zillow).", "error")
+            error = "Inserisci Stato e Contea."
+        elif not sources:
+            error = "Seleziona almeno una fonte (Realtor o Zillow)."
+        if error:
+            if _wants_json():
+                return jsonify({"ok": False, "error": error}), 400
+            flash(error, "error")
             return redirect(url_for("index"))
 
         # 🔁 usa sempre la versione aggiornata dell’orchestratore
         try:
             run_scraping = _get_run_scraping()
         except Exception as e:
+            if _wants_json():
+                return jsonify({"ok": False, "error": f"impossibile caricare l'orchestratore: {e}"}), 500
             flash(f"[ERR] impossibile caricare l'orchestratore: {e}", "error")
             return redirect(url_for("index"))
 
-        # Avvia scraping reale (robusto allo spacchettamento)
-        outpaths, messages = [], []
-        try:
-            out = run_scraping(
-                state=state,
-                county=county,
-                acres_min=acres_min,
-                acres_max=acres_max,
-                include_forsale=include_forsale,
-                include_sold=include_sold,
-                use_sources=sources,
-                headless=headless,
-                period=period
-                # results_dir=RESULTS_DIR  # abilita se il tuo orchestratore lo supporta
-            )
-
-            if isinstance(out, tuple) and len(out) == 2:
-                outpaths, messages = out
-            elif isinstance(out, dict):
-                outpaths, messages = out, []
-            elif isinstance(out, (list, tuple)):
-                outpaths, messages = list(out), []
-            elif out is None:
-                messages = ["[ERR] run_scraping ha restituito None"]
-            else:
-                messages = [f"[ERR] run_scraping tipo inatteso: {type(out).__name__}"]
-
-        except Exception as e:
-            messages = [f"[ERR] {e}"]
-   
-        
-            # Messaggi utente: mostra solo eventuali errori
-        for msg in messages:
-            if "ERR" in msg or "Errore" in msg:
-                flash(msg, "error")
-
-        # -------- Normalizzazione output & costruzione link --------
-        def _file_url(path):
-            if not path:
-                return None
-            fname = os.path.basename(path)
-            full = os.path.join(RESULTS_DIR, fname)
-            if os.path.isfile(path):
-                return url_for("download_file", filename=os.path.basename(path))
-            if os.path.isfile(full):
-                return url_for("download_file", filename=fname)
-            return None
-
-        download_links = []
-        realtor_ready = False
-        realtor_url = None
-        zillow_ready = False
-        zillow_url = None
-
-        # Caso 1: dict {"realtor": "...", "zillow": "..."}
-        if isinstance(outpaths, dict):
-            for k, v in outpaths.items():
-                url = _file_url(v)
-                if url:
-                    download_links.append(url)
-                    key = (k or "").lower()
-                    if "realtor" in key:
-                        realtor_ready, realtor_url = True, url
-                    if "zillow" in key:
-                        zillow_ready, zillow_url = True, url
-
-        # Caso 2: lista/tupla di path
-        elif isinstance(outpaths, (list, tuple)):
-            for v in outpaths:
-                url = _file_url(v)
-                if url:
-                    download_links.append(url)
-                    low = os.path.basename(str(v)).lower()
-                    if "realtor" in low and not realtor_ready:
-                        realtor_ready, realtor_url = True, url
-                    if "zillow" in low and not zillow_ready:
-                        zillow_ready, zillow_url = True, url
-
-        # Caso 3: singolo string path
-        elif isinstance(outpaths, str):
-            url = _file_url(outpaths)
-            if url:
-                download_links.append(url)
-                low = os.path.basename(outpaths).lower()
-                if "realtor" in low:
-                    realtor_ready, realtor_url = True, url
-                elif "zillow" in low:
-                    zillow_ready, zillow_url = True, url
-
-        if not download_links:
-            flash("Nessun file generato. Controlla i log.", "error")
+        # Avvia scraping reale in background: la richiesta ritorna subito
+        job = JOBS.submit(run_scraping, dict(
+            state=state,
+            county=county,
+            acres_min=acres_min,
+            acres_max=acres_max,
+            include_forsale=include_forsale,
+            include_sold=include_sold,
+            use_sources=sources,
+            headless=headless,
+            period=period,
+            bypass_cache=bypass_cache,
+            formats=formats
+            # results_dir=RESULTS_DIR  # abilita se il tuo orchestratore lo supporta
+        ))
+
+        if _wants_json():
+            return jsonify({
+                "ok": True,
+                "job_id": job.id,
+                "status_url": url_for("job_status", job_id=job.id),
+                "result_url": url_for("job_result", job_id=job.id),
+                "events_url": url_for("job_events", job_id=job.id),
+            }), 202
 
         return render_template(
             "index.html",
             states_full=STATES_FULL,
-            counties_json=json.dumps(COUNTIES_BY_STATE, ensure_ascii=False),
-            message="Scraping completato.",
-            download_links=download_links,  # lista multipla (compatibilità)
+            counties_index_json=COUNTIES_INDEX_JSON,
+            export_formats=available_formats(),
+            message="Scraping avviato.",
+            download_links=None,
             download_link=None,
-            # nuovi flag/URL per mostrare i link sulla stessa riga dei messaggi per-fonte
-            realtor_ready=realtor_ready,
-            realtor_url=realtor_url,
-            zillow_ready=zillow_ready,
-            zillow_url=zillow_url,
-            done=True
+            realtor_ready=False,
+            realtor_url=None,
+            zillow_ready=False,
+            zillow_url=None,
+            done=False,
+            job_id=job.id
         )
 
     except Exception as e:
+        if _wants_json():
+            return jsonify({"ok": False, "error": f"Errore durante lo scraping: {e}"}), 500
         flash(f"Errore durante lo scraping: {e}", "error")
         return redirect(url_for("index"))
 
+# -------------------------------------------------
+# STATO / RISULTATO JOB
+# -------------------------------------------------
+@app.get("/jobs/<job_id>")
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Job non trovato"}), 404
+    now = time.time()
+    started = job.get("started_at")
+    finished = job.get("finished_at")
+    return jsonify({
+        "ok": True,
+        "id": job["id"],
+        "state": job["state"],
+        "done": job["state"] in FINISHED_STATES,
+        "messages": job.get("messages") or [],
+        "elapsed": round((finished or now) - started, 1) if started else 0.0,
+        "result_url": url_for("job_result", job_id=job["id"]),
+        "events_url": url_for("job_events", job_id=job["id"]),
+    })
+
+# Stream SSE: si chiude dopo SSE_MAX_SECONDS (EventSource si riconnette da solo con
+# Last-Event-ID), così una pagina dimenticata aperta non tiene occupato un thread gunicorn
+SSE_MAX_SECONDS = int(os.environ.get("SSE_MAX_SECONDS", "120") or 120)
+SSE_HEARTBEAT_SECONDS = 15
+# Stream aperti insieme per worker: ognuno tiene un thread gthread (Dockerfile: --threads 4),
+# oltre il limite 503 e la pagina passa al polling di /jobs/<id>
+SSE_MAX_STREAMS = max(1, int(os.environ.get("SSE_MAX_STREAMS", "2") or 2))
+_SSE_SLOTS = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@app.get("/jobs/<job_id>/events")
+def job_events(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Job non trovato"}), 404
+    try:
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("after") or 0)
+    except ValueError:
+        after = 0
+    result_url = url_for("job_result", job_id=job["id"])
+    if not _SSE_SLOTS.acquire(blocking=False):
+        resp = jsonify({"ok": False, "error": "Troppi stream aperti, usa /jobs/<id>"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "5"
+        return resp
+
+    def stream():
+        last = after
+        deadline = time.time() + SSE_MAX_SECONDS
+        yield "retry: 2000\n\n"
+        while True:
+            timeout = min(SSE_HEARTBEAT_SECONDS, max(0.0, deadline - time.time()))
+            events, state = JOBS.wait_events(job["id"], last, timeout=timeout)
+            for ev in events:
+                last = ev["seq"]
+                yield _sse("progress", ev, last)
+            if state is None or state in FINISHED_STATES:
+                yield _sse("end", {"state": state, "result_url": result_url})
+                return
+            if time.time() >= deadline:
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    resp = app.response_class(stream(), mimetype="text/event-stream")
+    resp.headers["X-Accel-Buffering"] = "no"  # niente buffering dietro nginx/proxy
+    # slot liberato alla chiusura della risposta, anche se il client se ne va prima del primo byte
+    resp.call_on_close(_SSE_SLOTS.release)
+    return resp
+
+@app.get("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "Job non trovato"}), 404
+    if job["state"] not in FINISHED_STATES:
+        return jsonify({"ok": False, "state": job["state"], "error": "Job non ancora terminato"}), 409
+
+    messages = job.get("messages") or []
+    info = _download_info(job.get("outpaths"))
+    # Messaggi utente: mostra solo eventuali errori
+    errors = [m for m in messages if "ERR" in m or "Errore" in m]
+    if not info["download_links"]:
+        errors.append("Nessun file generato. Controlla i log.")
+    return jsonify({
+        "ok": job["state"] == DONE,
+        "id": job["id"],
+        "state": job["state"],
+        "messages": messages,
+        "errors": errors,
+        "outpaths": [os.path.basename(str(p)) for p in _outpath_list(job.get("outpaths"))],
+        "files": _file_list(job.get("outpaths")),
+        **info,
+    })
+
 # -------------------------------------------------
 # DOWNLOAD FILE
 # -------------------------------------------------
 @app.route("/download/<path:filename>")
 def download_file(filename):
-    return send_from_directory(RESULTS_DIR, filename, as_attachment=True)
+    rel = _public_result(filename)
+    if rel is None:
+        return abort(404)
+    return send_from_directory(os.path.realpath(RESULTS_DIR), rel, as_attachment=True)
 
 # -------------------------------------------------
 # MAIN
@@ -0,0 +1,5 @@
+# benchmarks/__init__.py
+"""
+Benchmark offline della pipeline di scraping: fixture HTML registrate,
+WebDriver finto che le serve e report JSON (python -m benchmarks --help).
+"""
@@ -0,0 +1,240 @@
+# benchmarks/fake_driver.py
+"""
+WebDriver finto per i benchmark: serve pagine HTML registrate (fixtures)
+senza Chrome, con la stessa API usata dagli scraper.
+
+- get(url) carica la pagina restituita da pages(url) (callable o dict)
+- find_element(s) con "xpath" (lxml) e "css selector" (il sottoinsieme
+  usato nel progetto: tag, [attr='v'], [attr*='v'], selettori separati da virgola)
+- execute_script riconosce la lettura di __NEXT_DATA__, gli scroll e gli
+  script di estrazione card degli scraper (emulati con gli stessi selettori);
+  qualunque altro script alza WebDriverException come un JS non supportato
+- Ogni comando conta come un round trip verso chromedriver (calls) e può
+  simulare la latenza reale con rtt (secondi per comando)
+"""
+
+import re
+import time
+import functools
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from scraper_core import realtor_scrape, zillow_test_scrape as zts
+
+# Tag i cui contenuti vanno a capo nel testo "visibile" (come element.text di Selenium)
+_BLOCK_TAGS = {"div", "li", "ul", "article", "section", "address", "p", "h1", "h2", "h3", "h4", "nav", "br", "tr"}
+
+_CSS_SIMPLE = re.compile(r"^([a-zA-Z][\w-]*|\*)?((?:\[[\w-]+(?:[*^$]?=\s*'[^']*')?\])*)$")
+_CSS_ATTR = re.compile(r"\[([\w-]+)(?:([*^$]?=)\s*'([^']*)')?\]")
+
+
+@functools.lru_cache(maxsize=256)
+def css_to_xpath(selector: str) -> str:
+    """Traduce il sottoinsieme CSS usato dagli scraper in XPath (relativo: .//)."""
+    parts = []
+    for sel in selector.split(","):
+        sel = sel.strip()
+        m = _CSS_SIMPLE.match(sel)
+        if not sel or m is None:
+            raise ValueError(f"selettore CSS non supportato dal driver finto: {sel!r}")
+        conds = []
+        for name, op, value in _CSS_ATTR.findall(m.group(2) or ""):
+            if not op:
+                conds.append(f"@{name}")
+            elif op == "=":
+                conds.append(f"@{name}='{value}'")
+            elif op == "*=":
+                conds.append(f"contains(@{name},'{value}')")
+            elif op == "^=":
+                conds.append(f"starts-with(@{name},'{value}')")
+            else:  # $=
+                conds.append(f"substring(@{name},string-length(@{name})-{len(value) - 1})='{value}'")
+        parts.append(".//" + (m.group(1) or "*") + "".join(f"[{c}]" for c in conds))
+    return " | ".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(xpath: str):
+    return etree.XPath(xpath)
+
+
+def _visible_text(el) -> str:
+    """Testo con a capo tra blocchi, spazi normalizzati (approssima element.text)."""
+    chunks = []
+
+    def walk(node):
+        if not isinstance(node.tag, str) or node.tag in ("script", "style"):
+            return
+        block = node.tag in _BLOCK_TAGS
+        if block:
+            chunks.append("\n")
+        if node.text:
+            chunks.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                chunks.append(child.tail)
+        if block:
+            chunks.append("\n")
+
+    walk(el)
+    lines = (" ".join(line.split()) for line in "".join(chunks).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _first(node, selectors):
+    for sel in selectors:
+        found = _compiled(css_to_xpath(sel))(node)
+        if found:
+            return found[0]
+    return None
+
+
+def _text(node) -> str:
+    return _visible_text(node).strip() if node is not None else ""
+
+
+def _emulate_realtor_cards(driver, sel):
+    """Equivalente di realtor_scrape.CARDS_JS sul DOM lxml."""
+    def href(node):
+        return urljoin(driver.current_url, node.get("href") or "") if node is not None else ""
+
+    def xfirst(xpath, node):
+        found = [n for n in _compiled(xpath)(node) if isinstance(n.tag, str)]
+        return found[0] if found else None
+
+    cards = _compiled(css_to_xpath(sel["card"]))(driver._doc)
+    count = _text(_first(driver._doc, [sel["count"]]))
+    if cards:
+        return {"mode": "cards", "count": count, "items": [{
+            "title": _text(_first(el, sel["title"])), "price": _text(_first(el, sel["price"])),
+            "acres": _text(xfirst(sel["lot"], el)), "link": href(_first(el, sel["link"])),
+            "status": _text(_first(el, [sel["status"]])),
+        } for el in cards]}
+    return {"mode": "anchors", "count": count, "items": [{
+        "title": _text(a), "link": href(a), "block": _text(xfirst(sel["block"], a)),
+    } for a in _compiled(css_to_xpath(sel["anchor"]))(driver._doc)]}
+
+
+def _emulate_zillow_cards(driver, card_xpath, link_xpath, limit):
+    """Equivalente di zillow_test_scrape.CARDS_JS sul DOM lxml."""
+    out = []
+    for c in _compiled(card_xpath)(driver._doc)[:limit]:
+        links = _compiled(link_xpath)(c)
+        out.append({"text": _visible_text(c),
+                    "link": urljoin(driver.current_url, links[0].get("href")) if links else None})
+    return out
+
+
+SCRIPTS = {
+    realtor_scrape.CARDS_JS: _emulate_realtor_cards,
+    zts.CARDS_JS: _emulate_zillow_cards,
+}
+
+
+class FakeElement:
+    def __init__(self, driver, node):
+        self._driver = driver
+        self._node = node
+
+    @property
+    def tag_name(self):
+        self._driver._command()
+        return self._node.tag
+
+    @property
+    def text(self):
+        self._driver._command()
+        return _visible_text(self._node)
+
+    def get_attribute(self, name):
+        self._driver._command()
+        value = self._node.get(name)
+        if value is not None and name in ("href", "src"):
+            # come Selenium: URL assoluto risolto sulla pagina corrente
+            return urljoin(self._driver.current_url, value)
+        return value
+
+    def find_elements(self, by="css selector", value=None):
+        return self._driver._find(self._node, by, value)
+
+    def find_element(self, by="css selector", value=None):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+
+class FakeWebDriver:
+    """Driver finto. pages: callable(url) -> html, oppure dict url -> html."""
+
+    def __init__(self, pages=None, rtt: float = 0.0):
+        self.pages = pages or {}
+        self.rtt = float(rtt)
+        self.calls = 0
+        self.current_url = "about:blank"
+        self.window_handles = ["main"]
+        self.page_source = ""
+        self._doc = lxml_html.fromstring("<html><body></body></html>")
+
+    def _command(self):
+        self.calls += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def load(self, html: str, url: str = "https://example.invalid/"):
+        """Imposta direttamente la pagina corrente (senza contare una navigazione)."""
+        self.current_url = url
+        self.page_source = html
+        self._doc = lxml_html.fromstring(html)
+
+    def get(self, url):
+        self._command()
+        if url == "about:blank":
+            self.load("<html><body></body></html>", url)
+            return
+        page = self.pages(url) if callable(self.pages) else self.pages.get(url)
+        if page is None:
+            raise WebDriverException(f"nessuna fixture per {url}")
+        self.load(page, url)
+
+    def _find(self, node, by, value):
+        self._command()
+        if by == "xpath":
+            xpath = value
+        elif by == "css selector":
+            xpath = css_to_xpath(value)
+        else:
+            raise WebDriverException(f"strategia di ricerca non supportata: {by}")
+        return [FakeElement(self, n) for n in _compiled(xpath)(node) if isinstance(n.tag, str)]
+
+    def find_elements(self, by="css selector", value=None):
+        return self._find(self._doc, by, value)
+
+    def find_element(self, by="css selector", value=None):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+    def execute_script(self, script, *args):
+        self._command()
+        if script in SCRIPTS:
+            return SCRIPTS[script](self, *args)
+        if "__NEXT_DATA__" in script:
+            found = self._doc.xpath("//script[@id='__NEXT_DATA__']")
+            return found[0].text if found else None
+        if "scrollBy" in script or "scrollTo" in script:
+            return None
+        raise WebDriverException("script non supportato dal driver finto")
+
+    def set_page_load_timeout(self, _s):
+        pass
+
+    def set_script_timeout(self, _s):
+        pass
+
+    def quit(self):
+        pass
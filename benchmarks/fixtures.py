@@ -0,0 +1,88 @@
+# benchmarks/fixtures.py
+"""
+Pagine di ricerca registrate (fixtures/*.html) e loro versioni "scalate".
+
+Le fixture contengono una pagina di risultati reale nella forma (40 annunci);
+scaled_*(n) le replica fino a n annunci con zpid/link univoci, così lo stesso
+markup misura il comportamento a 40, 500 e 5.000 annunci.
+"""
+
+import os
+import re
+import json
+import functools
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+ZILLOW_URL = "https://www.zillow.com/appling-county-ga/land/"
+REALTOR_URL = "https://www.realtor.com/realestateandhomes-search/Appling-County_GA/type-land"
+
+_NEXT_DATA = re.compile(r'(<script id="__NEXT_DATA__" type="application/json">)(.*?)(</script>)', re.S)
+_ZILLOW_CARD = re.compile(r"<li class=\"ListItem[^\"]*\"><article .*?</article></li>", re.S)
+_REALTOR_CARD = re.compile(r'<div class="BasePropertyCard_propertyCardWrap[^"]*".*?</div></div></div>(?=\s*(?:<div class="BasePropertyCard|</section>))', re.S)
+
+
+@functools.lru_cache(maxsize=None)
+def load(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _cycle(items, n):
+    """Primi n elementi ripetendo la lista: (copia, giro) per rendere univoci gli id."""
+    return [(items[i % len(items)], i // len(items)) for i in range(n)]
+
+
+def _replicate(blocks, n, rename):
+    return "\n".join(rename(block, k) if k else block for block, k in _cycle(blocks, n))
+
+
+def _zillow_id(zpid, k):
+    return str(int(zpid) + k * 1_000_003)
+
+
+@functools.lru_cache(maxsize=None)
+def scaled_zillow(n: int) -> str:
+    """Pagina Zillow con n annunci in listResults/mapResults e n card nel markup."""
+    page = load("zillow_search.html")
+    m = _NEXT_DATA.search(page)
+    payload = json.loads(m.group(2))
+    results = payload["props"]["pageProps"]["searchPageState"]["cat1"]["searchResults"]
+    lists, maps = results["listResults"], results["mapResults"]
+
+    def clone(item, k):
+        if not k:
+            return item
+        old = str(item["zpid"])
+        new = _zillow_id(old, k)
+        return json.loads(json.dumps(item).replace(old, new))
+
+    # mapResults nella stessa proporzione della fixture (in parte sovrapposti ai listResults)
+    n_map = max(1, round(n * len(maps) / len(lists)))
+    results["listResults"] = [clone(it, k) for it, k in _cycle(lists, n)]
+    results["mapResults"] = [clone(it, k) for it, k in _cycle(maps, n_map)]
+    next_data = json.dumps(payload, separators=(",", ":"))
+
+    cards = _ZILLOW_CARD.findall(page)
+
+    def rename_card(block, k):
+        return re.sub(r"(\d{7,})(?=_zpid|\")", lambda mm: _zillow_id(mm.group(1), k), block)
+
+    body = _replicate(cards, n, rename_card)
+    start, end = page.find(cards[0]), page.rfind(cards[-1]) + len(cards[-1])
+    page = page[:start] + body + page[end:]
+    return _NEXT_DATA.sub(lambda mm: mm.group(1) + next_data + mm.group(3), page, count=1)
+
+
+@functools.lru_cache(maxsize=None)
+def scaled_realtor(n: int) -> str:
+    """Pagina Realtor con n card (link .../M<id> univoci)."""
+    page = load("realtor_search.html")
+    cards = _REALTOR_CARD.findall(page)
+
+    def rename_card(block, k):
+        return re.sub(r"_M(\d+)-(\d+)", lambda mm: f"_M{mm.group(1)}-{mm.group(2)}{k}", block)
+
+    body = _replicate(cards, n, rename_card)
+    start, end = page.find(cards[0]), page.rfind(cards[-1]) + len(cards[-1])
+    return page[:start] + body + page[end:]
@@ -0,0 +1,244 @@
+# benchmarks/run.py
+"""
+Benchmark offline della pipeline (parsing, DataFrame, Excel) sulle fixture registrate.
+
+    python -m benchmarks                          # tutte le fasi a 40, 500, 5000 annunci
+    python -m benchmarks --sizes 40 500 --repeat 3
+    python -m benchmarks --cases df_from_rows save_excel
+    python -m benchmarks --rtt-ms 1               # latenza simulata per comando WebDriver
+    python -m benchmarks --compare bench_report_main.json --tolerance 0.25
+
+Scrive un report JSON (--out, default bench_report.json). Con --compare
+confronta le mediane con un report precedente ed esce con codice 1 se una
+fase è più lenta oltre la tolleranza: da lanciare prima del deploy.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import pandas as pd
+
+# il runner Zillow scrive nel log già all'import: niente righe nel runner_debug.log del repository
+os.environ.setdefault("ZILLOW_RUNNER_LOG", os.path.join(tempfile.gettempdir(), "benchmarks_runner_debug.log"))
+
+from scraper_core import zillow_test_scrape as zts
+from scraper_core import realtor_scrape
+from scraper_core.zillow_avg_runner import df_from_rows, new_workbook, append_sheet_with_avg
+from scraper_core.zillow_scrape import _rows_to_df
+from scraper_core.scraper import _normalize, _save_excel
+
+from .fake_driver import FakeWebDriver
+from .fixtures import scaled_zillow, scaled_realtor, ZILLOW_URL, REALTOR_URL
+
+DEFAULT_SIZES = (40, 500, 5000)
+DEFAULT_OUT = "bench_report.json"
+
+
+# ------------------------------
+# Casi: setup(n) -> (funzione da cronometrare, driver o None)
+# ------------------------------
+def _zillow_rows(n):
+    return zts.collect_rows_from_payload(zts.extract_next_data(scaled_zillow(n)))[:n]
+
+
+def _zillow_driver(n, rtt):
+    driver = FakeWebDriver(rtt=rtt)
+    driver.load(scaled_zillow(n), ZILLOW_URL)
+    return driver
+
+
+def _case_extract_next_data(n, rtt):
+    html = scaled_zillow(n)
+    return (lambda: zts.extract_next_data(html)), None
+
+
+def _case_extract_next_data_lite(n, rtt):
+    html = scaled_zillow(n)
+    return (lambda: zts.extract_next_data_lite(html)), None
+
+
+def _case_collect_rows_from_payload(n, rtt):
+    payload = zts.extract_next_data(scaled_zillow(n))
+    return (lambda: zts.collect_rows_from_payload(payload)), None
+
+
+def _case_collect_rows_via_cards(n, rtt):
+    driver = _zillow_driver(n, rtt)
+    return (lambda: zts.collect_rows_via_cards(driver)), driver
+
+
+def _case_realtor_extract_listings(n, rtt):
+    driver = FakeWebDriver(rtt=rtt)
+    driver.load(scaled_realtor(n), REALTOR_URL)
+    return (lambda: realtor_scrape._extract_listings(driver, lambda *a: None)), driver
+
+
+def _case_df_from_rows(n, rtt):
+    rows = _zillow_rows(n)
+    return (lambda: df_from_rows(rows)), None
+
+
+def _case_save_excel(n, rtt):
+    rows = _zillow_rows(n)
+    half = len(rows) // 2
+    df = pd.concat([
+        _rows_to_df(rows[:half], state="GA", county="Appling", status_label="For Sale", period="12M"),
+        _rows_to_df(rows[half:], state="GA", county="Appling", status_label="Sold", period="12M"),
+    ], ignore_index=True)
+    df = _normalize(df, "Zillow")
+    out = os.path.join(tempfile.mkdtemp(prefix="bench_"), "zillow.xlsx")
+    return (lambda: _save_excel(df, out, "Zillow")), None
+
+
+def _case_append_sheet_with_avg(n, rtt):
+    df = df_from_rows(_zillow_rows(n))
+    return (lambda: append_sheet_with_avg(new_workbook(), "Appling GA", df, "GA", "Appling")), None
+
+
+CASES = {
+    "extract_next_data": _case_extract_next_data,
+    "extract_next_data_lite": _case_extract_next_data_lite,
+    "collect_rows_from_payload": _case_collect_rows_from_payload,
+    "collect_rows_via_cards": _case_collect_rows_via_cards,
+    "realtor_extract_listings": _case_realtor_extract_listings,
+    "df_from_rows": _case_df_from_rows,
+    "save_excel": _case_save_excel,
+    "append_sheet_with_avg": _case_append_sheet_with_avg,
+}
+
+
+# ------------------------------
+# Misura
+# ------------------------------
+def measure(fn, repeat: int = 5, min_time: float = 0.2, max_runs: int = 200):
+    """Tempi (s) di almeno repeat esecuzioni, e comunque almeno min_time secondi in totale."""
+    times = []
+    sink = io.StringIO()
+    while len(times) < repeat or (sum(times) < min_time and len(times) < max_runs):
+        sink.seek(0)
+        sink.truncate()
+        with redirect_stdout(sink):  # gli scraper stampano molto: fuori dal report
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+def run_case(name: str, n: int, repeat: int = 5, rtt: float = 0.0) -> dict:
+    with redirect_stdout(io.StringIO()):
+        fn, driver = CASES[name](n, rtt)
+        fn()  # warm-up (cache regex/XPath, import lazy)
+    calls_before = driver.calls if driver is not None else 0
+    times = measure(fn, repeat=repeat, min_time=0.0 if rtt else 0.2)
+    med = statistics.median(times)
+    out = {
+        "case": name,
+        "n": n,
+        "runs": len(times),
+        "min_s": round(min(times), 6),
+        "median_s": round(med, 6),
+        "mean_s": round(statistics.fmean(times), 6),
+        "per_item_us": round(med / n * 1e6, 2),
+    }
+    if driver is not None:
+        out["webdriver_calls"] = (driver.calls - calls_before) // len(times)
+    return out
+
+
+# ------------------------------
+# Report e confronto
+# ------------------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _versions():
+    out = {"python": platform.python_version(), "pandas": pd.__version__}
+    for mod in ("openpyxl", "lxml"):
+        try:
+            out[mod] = __import__(mod).__version__
+        except Exception:
+            out[mod] = None
+    return out
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Fasi più lente del baseline oltre la tolleranza: [(case, n, rapporto)]."""
+    old = {(r["case"], r["n"]): r for r in baseline.get("results") or []}
+    slower = []
+    print(f"\n{'fase':<28}{'n':>6}{'prima ms':>12}{'ora ms':>12}{'rapporto':>10}")
+    for r in report["results"]:
+        prev = old.get((r["case"], r["n"]))
+        if prev is None or not prev.get("median_s"):
+            continue
+        ratio = r["median_s"] / prev["median_s"]
+        flag = "  <-- più lento" if ratio > 1 + tolerance else ""
+        print(f"{r['case']:<28}{r['n']:>6}{prev['median_s'] * 1e3:>12.2f}{r['median_s'] * 1e3:>12.2f}{ratio:>9.2f}x{flag}")
+        if flag:
+            slower.append((r["case"], r["n"], round(ratio, 2)))
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark offline su fixture registrate")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="numero di annunci per pagina")
+    ap.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES), help="fasi da misurare")
+    ap.add_argument("--repeat", type=int, default=5, help="esecuzioni minime per fase (default 5)")
+    ap.add_argument("--rtt-ms", type=float, default=0.0, help="latenza simulata per comando WebDriver (ms)")
+    ap.add_argument("--out", default=DEFAULT_OUT, help=f"report JSON (default {DEFAULT_OUT})")
+    ap.add_argument("--compare", help="report precedente da usare come riferimento")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="rallentamento tollerato con --compare (0.25 = +25%%)")
+    args = ap.parse_args(argv)
+
+    rtt = max(0.0, args.rtt_ms) / 1000.0
+    results = []
+    print(f"{'fase':<28}{'n':>6}{'mediana ms':>12}{'µs/annuncio':>13}{'comandi':>9}")
+    for name in args.cases:
+        for n in args.sizes:
+            r = run_case(name, n, repeat=max(1, args.repeat), rtt=rtt)
+            results.append(r)
+            calls = r.get("webdriver_calls")
+            print(f"{name:<28}{n:>6}{r['median_s'] * 1e3:>12.2f}{r['per_item_us']:>13.1f}"
+                  f"{'' if calls is None else calls:>9}", flush=True)
+
+    report = {
+        "created": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "commit": _git_commit(),
+        "platform": platform.platform(),
+        "versions": _versions(),
+        "sizes": args.sizes,
+        "repeat": args.repeat,
+        "rtt_ms": args.rtt_ms,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[BENCH] report: {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        slower = compare(report, baseline, args.tolerance)
+        if slower:
+            print(f"[BENCH][WARN] {len(slower)} fasi più lente di oltre {args.tolerance:.0%}: {slower}")
+            return 1
+        print("[BENCH] nessuna regressione oltre la tolleranza")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,161 @@
 import os
+import re
+import pickle
+import hashlib
 import pandas as pd
 from functools import lru_cache
+from typing import NamedTuple, Optional
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
-@lru_cache(maxsize=1)
-def load_parametri(path_hint: str | None = None) -> pd.DataFrame:
-    """Load 'parametri.xlsx' (Foglio1) and normalize headers.
-    Accepts either an explicit path or searches in BASE_DIR.
-    Returns a DataFrame with columns: County, State (upper), Region Id, West, South, East, North.
-    """
+# Sidecar compilato accanto all'xlsx: evita openpyxl a ogni cold start / worker
+SIDECAR_SUFFIX = ".cache.pkl"
+SIDECAR_VERSION = 1
+
+
+def _resolve_parametri(path_hint: str | None = None) -> str:
     candidates = []
     if path_hint:
         candidates.append(path_hint)
     candidates.append(os.path.join(BASE_DIR, 'parametri.xlsx'))
     candidates.append(os.path.join(BASE_DIR, '..', 'parametri.xlsx'))
     candidates.append(os.path.join(BASE_DIR, 'data', 'parametri.xlsx'))
-
     for p in candidates:
         if p and os.path.exists(p):
-            xls = pd.ExcelFile(p)
-            df = xls.parse('Foglio1')
-            # normalize columns
-            colmap = {c: c.strip() for c in df.columns}
-            df = df.rename(columns=colmap)
-            # Uppercase state codes in-memory only
-            if 'State' in df.columns:
-                df['State'] = df['State'].astype(str).str.strip().str.upper()
-            # County sanitize
-            if 'County' in df.columns:
-                df['County'] = df['County'].astype(str).str.strip()
-            return df
+            return os.path.abspath(p)
     raise FileNotFoundError("parametri.xlsx non trovato nelle posizioni attese.")
+
+
+def _read_xlsx(p: str) -> pd.DataFrame:
+    xls = pd.ExcelFile(p)
+    df = xls.parse('Foglio1')
+    # normalize columns
+    colmap = {c: c.strip() for c in df.columns}
+    df = df.rename(columns=colmap)
+    # Uppercase state codes in-memory only
+    if 'State' in df.columns:
+        df['State'] = df['State'].astype(str).str.strip().str.upper()
+    # County sanitize
+    if 'County' in df.columns:
+        df['County'] = df['County'].astype(str).str.strip()
+    return df
+
+
+def _sha256(p: str) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_sidecar(sidecar: str, meta: dict, df: pd.DataFrame):
+    try:
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({**meta, "df": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass  # filesystem read-only: si riparsa l'xlsx, nessun errore
+
+
+def _load_with_sidecar(p: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    """
+    Usa il sidecar se mtime+size coincidono; se cambia solo l'mtime
+    (es. checkout/copia) confronta lo sha256 prima di riparsare l'xlsx.
+    """
+    sidecar = p + SIDECAR_SUFFIX
+    meta = {"version": SIDECAR_VERSION, "mtime_ns": mtime_ns, "size": size}
+    cached = None
+    try:
+        with open(sidecar, "rb") as f:
+            cached = pickle.load(f)
+    except Exception:
+        cached = None
+
+    if isinstance(cached, dict) and cached.get("version") == SIDECAR_VERSION and cached.get("size") == size:
+        if cached.get("mtime_ns") == mtime_ns:
+            return cached["df"]
+        digest = _sha256(p)
+        if cached.get("sha256") == digest:
+            _write_sidecar(sidecar, {**meta, "sha256": digest}, cached["df"])
+            return cached["df"]
+
+    df = _read_xlsx(p)
+    _write_sidecar(sidecar, {**meta, "sha256": _sha256(p)}, df)
+    return df
+
+
+@lru_cache(maxsize=2)
+def _load_cached(p: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    # chiave = (path, mtime, size): un xlsx modificato invalida la cache in memoria
+    return _load_with_sidecar(p, mtime_ns, size)
+
+
+def _signature(path_hint: str | None = None) -> tuple:
+    p = _resolve_parametri(path_hint)
+    st = os.stat(p)
+    return (p, st.st_mtime_ns, st.st_size)
+
+
+def load_parametri(path_hint: str | None = None) -> pd.DataFrame:
+    """Load 'parametri.xlsx' (Foglio1) and normalize headers.
+    Accepts either an explicit path or searches in BASE_DIR.
+    Returns a DataFrame with columns: County, State (upper), Region Id, West, South, East, North.
+    Uses a pickled sidecar (parametri.xlsx.cache.pkl) invalidated by the xlsx mtime/size/sha256.
+    """
+    return _load_cached(*_signature(path_hint))
+
+
+class CountyMeta(NamedTuple):
+    region_id: Optional[int]
+    west: Optional[float]
+    south: Optional[float]
+    east: Optional[float]
+    north: Optional[float]
+
+
+def _county_key(state: str, county: str) -> tuple:
+    """('ga', 'Appling County') -> ('GA', 'appling')"""
+    c = re.sub(r"\s+county$", "", str(county or "").strip(), flags=re.I)
+    return (str(state or "").strip().upper(), re.sub(r"\s+", " ", c).lower())
+
+
+def _num(v, cast=float):
+    try:
+        if v is None or pd.isna(v):
+            return None
+        return cast(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_county_index() -> dict:
+    """
+    Indice {(STATE, county_lower): CountyMeta} costruito una volta da parametri.xlsx
+    (Region Id + bounds West/South/East/North) per lookup O(1).
+    """
+    return _county_index(*_signature())
+
+
+@lru_cache(maxsize=2)
+def _county_index(p: str, mtime_ns: int, size: int) -> dict:
+    df = _load_cached(p, mtime_ns, size)
+    cols = {c: df[c].tolist() if c in df.columns else [None] * len(df)
+            for c in ("State", "County", "Region Id", "West", "South", "East", "North")}
+    index = {}
+    for st, cty, rid, w, s_, e, n in zip(*cols.values()):
+        if not st or not cty:
+            continue
+        index[_county_key(st, cty)] = CountyMeta(
+            region_id=_num(rid, int), west=_num(w), south=_num(s_), east=_num(e), north=_num(n)
+        )
+    return index
+
+
+def lookup_county(state: str, county: str) -> Optional[CountyMeta]:
+    """Region id e bounds per (Stato, Contea); None se la contea non è in parametri.xlsx."""
+    try:
+        return load_county_index().get(_county_key(state, county))
+    except FileNotFoundError:
+        return None
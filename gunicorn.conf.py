@@ -0,0 +1,9 @@
+# gunicorn.conf.py
+# Letto da gunicorn in automatico se lanciato dalla root del progetto (Procfile, Dockerfile).
+
+
+def post_fork(server, worker):
+    # Pre-avvio Chrome in background: ogni worker scalda il proprio pool dopo il fork
+    # (DRIVER_POOL_PREWARM=0 per disattivare)
+    from scraper_core.driver_factory import prewarm_pool
+    prewarm_pool()
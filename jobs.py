@@ -0,0 +1,308 @@
+# jobs.py
+"""
+Coda job in-process per lo scraping.
+
+- La POST su /run_scraper crea un Job e ritorna subito il suo id
+- Un ThreadPoolExecutor limitato esegue run_scraping fuori dal thread della richiesta
+- Lo stato di ogni job viene salvato anche su disco (results/jobs/<id>.json),
+  così il polling funziona anche se arriva all'altro worker gunicorn;
+  il file si riscrive solo ai cambi di stato (coda, avvio, fine)
+- Gli eventi di avanzamento (scraper_core.progress) finiscono in job.events,
+  con un numero progressivo (seq) usato dallo stream SSE, e vengono accodati
+  una riga alla volta a results/jobs/<id>.events.jsonl (costo per evento costante)
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from scraper_core import progress, metrics
+from scraper_core.driver_factory import get_pool, budget
+
+# Stati possibili di un job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+FINISHED_STATES = (DONE, ERROR)
+
+# Quanti scraping (Chrome) possono girare in parallelo per processo
+MAX_WORKERS = int(os.environ.get("SCRAPER_MAX_JOBS", "2") or 2)
+# Quanti job terminati tenere in memoria/disco prima di scartare i più vecchi
+MAX_FINISHED = int(os.environ.get("SCRAPER_MAX_FINISHED_JOBS", "200") or 200)
+# Eventi di avanzamento tenuti per job (i più vecchi vengono scartati)
+MAX_EVENTS = int(os.environ.get("SCRAPER_MAX_JOB_EVENTS", "500") or 500)
+# Ogni quanto un worker che non ha il job rilegge il file in attesa di eventi
+EVENT_POLL_SECONDS = 0.5
+
+
+def normalize_output(out):
+    """
+    Normalizza il valore di ritorno di run_scraping in (outpaths, messages).
+    Accetta tupla (paths, messages), dict, lista o singolo path.
+    """
+    if isinstance(out, tuple) and len(out) == 2:
+        return out[0], list(out[1] or [])
+    if isinstance(out, dict):
+        return out, []
+    if isinstance(out, (list, tuple)):
+        return list(out), []
+    if isinstance(out, str):
+        return out, []
+    if out is None:
+        return [], ["[ERR] run_scraping ha restituito None"]
+    return [], [f"[ERR] run_scraping tipo inatteso: {type(out).__name__}"]
+
+
+class Job:
+    def __init__(self, job_id: str, params: dict):
+        self.id = job_id
+        self.params = dict(params or {})
+        self.state = QUEUED
+        self.messages = []
+        self.outpaths = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.last_seq = 0
+
+    def to_dict(self, events: bool = True) -> dict:
+        data = {
+            "id": self.id,
+            "state": self.state,
+            "params": self.params,
+            "messages": list(self.messages),
+            "outpaths": self.outpaths,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if events:
+            data["events"] = list(self.events)
+        return data
+
+
+class JobManager:
+    def __init__(self, jobs_dir: str, max_workers: int = MAX_WORKERS, max_finished: int = MAX_FINISHED):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max(1, int(max_workers))
+        self.max_finished = max(1, int(max_finished))
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # nuovi eventi / fine job
+        self._io_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="scrape-job",
+        )
+
+    # ------------------------------
+    # Persistenza
+    # ------------------------------
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _events_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.events.jsonl")
+
+    def _persist(self, job: Job):
+        # stato senza eventi (stanno nel .events.jsonl): snapshot sotto lock, scrittura serializzata
+        with self._lock:
+            data = job.to_dict(events=False)
+        try:
+            with self._io_lock:
+                tmp = self._path(job.id) + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, default=str)
+                os.replace(tmp, self._path(job.id))
+        except Exception as e:
+            print(f"[JOBS][WARN] impossibile salvare job {job.id}: {e}", flush=True)
+
+    def _append_event(self, job_id: str, event: dict):
+        try:
+            line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+            with self._io_lock:
+                with open(self._events_path(job_id), "a", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            print(f"[JOBS][WARN] impossibile salvare evento del job {job_id}: {e}", flush=True)
+
+    def _read_events(self, job_id: str) -> list:
+        # ultimi MAX_EVENTS eventi dal file; riga troncata (scrittura in corso) = ignorata
+        events = []
+        try:
+            with open(self._events_path(job_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print(f"[JOBS][WARN] eventi del job {job_id} illeggibili: {e}", flush=True)
+        return events[-MAX_EVENTS:]
+
+    # ------------------------------
+    # Eventi di avanzamento
+    # ------------------------------
+    def _emitter(self, job: Job):
+        def emit(event: dict, **updates):
+            now = time.time()
+            with self._lock:
+                # updates (es. state) applicati insieme all'evento: chi attende li vede assieme
+                for k, v in updates.items():
+                    setattr(job, k, v)
+                job.last_seq += 1
+                event = {"seq": job.last_seq, "ts": round(now, 3),
+                         "t": round(now - (job.started_at or now), 2), **event}
+                job.events.append(event)
+                if len(job.events) > MAX_EVENTS:
+                    del job.events[:len(job.events) - MAX_EVENTS]
+                self._changed.notify_all()
+            # prima l'evento, poi lo stato: chi legge il file vede lo stato finale
+            # solo quando l'ultimo evento è già nel .jsonl
+            self._append_event(job.id, event)
+            if updates or event.get("stage") == "job":
+                self._persist(job)
+        return emit
+
+    def _prune(self):
+        # Tiene solo gli ultimi max_finished job conclusi (memoria + disco)
+        with self._lock:
+            finished = sorted(
+                (j for j in self._jobs.values() if j.state in FINISHED_STATES),
+                key=lambda j: j.finished_at or 0,
+            )
+            drop = finished[:-self.max_finished] if len(finished) > self.max_finished else []
+            for j in drop:
+                self._jobs.pop(j.id, None)
+        for j in drop:
+            for path in (self._path(j.id), self._events_path(j.id)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ------------------------------
+    # API
+    # ------------------------------
+    def submit(self, fn, params: dict) -> Job:
+        """Crea un job e mette in coda fn(**params). Ritorna subito il Job."""
+        job = Job(uuid.uuid4().hex, params)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._persist(job)
+        self._executor.submit(self._run, job, fn)
+        self._update_metrics()
+        print(f"[JOBS] job {job.id} in coda", flush=True)
+        return job
+
+    def _driver_share(self) -> int:
+        """
+        Driver del pool per un job che parte ora: pool diviso per i job in esecuzione
+        (lui compreso). Un job da solo ha tutto il pool; la quota è fissata all'avvio,
+        quindi un job che parte mentre un altro usa tutto il pool aspetta i driver liberi
+        (DRIVER_POOL_LEASE_TIMEOUT) invece di averne di riservati.
+        """
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.state == RUNNING)
+        return max(1, get_pool().size // max(1, running))
+
+    def _run(self, job: Job, fn):
+        with self._lock:
+            job.state = RUNNING
+        job.started_at = time.time()
+        drivers = self._driver_share()
+        emit = self._emitter(job)
+        emit({"stage": "job", "status": "start", "drivers": drivers})
+        state = ERROR
+        try:
+            with progress.bind(emit), budget(drivers):
+                outpaths, messages = normalize_output(fn(**job.params))
+            job.outpaths = outpaths
+            job.messages = messages
+            state = DONE
+        except Exception as e:
+            job.messages = [f"[ERR] {e}"]
+            job.error = traceback.format_exc().splitlines()[-1]
+        finally:
+            finished_at = time.time()
+            # l'ultimo evento porta con sé lo stato finale (e lo salva su disco)
+            emit({"stage": "job", "status": state, "elapsed": round(finished_at - job.started_at, 2)},
+                 state=state, finished_at=finished_at)
+            print(f"[JOBS] job {job.id} -> {job.state} "
+                  f"({job.finished_at - (job.started_at or job.finished_at):.1f}s)", flush=True)
+            metrics.JOBS_FINISHED.inc(state=state)
+            metrics.JOB_SECONDS.observe(finished_at - job.started_at)
+            self._update_metrics()
+        self._prune()
+
+    def _update_metrics(self):
+        # il gauge cambia di rado: file del worker riscritto subito, /metrics lo vede dagli altri worker
+        metrics.JOBS_IN_FLIGHT.set(self.in_flight())
+        metrics.flush()
+
+    def get(self, job_id: str):
+        """
+        Ritorna lo stato del job come dict (o None se sconosciuto).
+        Se il job è stato creato da un altro worker lo legge dal disco.
+        """
+        job_id = (job_id or "").strip()
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                return None
+            # stato letto prima degli eventi (vedi _emitter)
+            data["events"] = self._read_events(job_id)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[JOBS][WARN] job {job_id} illeggibile: {e}", flush=True)
+            return None
+
+    def wait_events(self, job_id: str, after: int = 0, timeout: float = 15.0):
+        """
+        Eventi con seq > after, attendendo fino a timeout se non ce ne sono.
+        Ritorna (eventi, stato_job); stato None se il job non esiste.
+        Se il job gira in un altro worker gli eventi si leggono dal file.
+        """
+        deadline = time.time() + timeout
+        with self._lock:
+            job = self._jobs.get((job_id or "").strip())
+            if job is not None:
+                while True:
+                    events = [e for e in job.events if e["seq"] > after]
+                    remaining = deadline - time.time()
+                    if events or job.state in FINISHED_STATES or remaining <= 0:
+                        return events, job.state
+                    self._changed.wait(remaining)
+        while True:
+            data = self.get(job_id)
+            if data is None:
+                return [], None
+            events = [e for e in data.get("events") or [] if e.get("seq", 0) > after]
+            if events or data.get("state") in FINISHED_STATES or time.time() >= deadline:
+                return events, data.get("state")
+            time.sleep(EVENT_POLL_SECONDS)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.state not in FINISHED_STATES)
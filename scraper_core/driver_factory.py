@@ -1,9 +1,15 @@
-import os, sys, traceback
+import os, sys, time, threading, traceback, atexit
+import contextvars
+from contextlib import contextmanager
 import undetected_chromedriver as uc
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
-def make_uc_driver():
+from . import metrics, netblock
+
+def make_uc_driver(profile: str = None):
+    """Chrome UC headless; profile = profilo di blocco richieste (default DRIVER_BLOCK_PROFILE)."""
     print("[DRIVER] init UC...", flush=True)
+    t0 = time.perf_counter()
     try:
         opts = uc.ChromeOptions()
         # Headless & stabilità
@@ -26,6 +32,9 @@ def make_uc_driver():
         # Non aspettare risorse terze: evita appesi infiniti
         caps = DesiredCapabilities.CHROME.copy()
         caps["pageLoadStrategy"] = "eager"
+        if netblock.PERF_LOG:
+            # eventi Network nel performance log: byte scaricati per pagina
+            caps["goog:loggingPrefs"] = {"performance": "ALL"}
 
         driver = uc.Chrome(
             options=opts,
@@ -38,12 +47,255 @@ def make_uc_driver():
         # Timeout hard
         driver.set_page_load_timeout(25)
         driver.set_script_timeout(25)
+        # Niente immagini/font/tile/tracker se il profilo lo chiede
+        netblock.apply_profile(driver, profile or netblock.DEFAULT_PROFILE)
 
+        metrics.STAGE_SECONDS.observe(time.perf_counter() - t0, stage="driver_start")
         print("[DRIVER] UC OK", flush=True)
         return driver
     except Exception as e:
+        metrics.CHROME_LAUNCH_FAILURES.inc()
         print("[DRIVER][ERR] UC failed:", e, file=sys.stderr, flush=True)
         print(traceback.format_exc(), file=sys.stderr, flush=True)
         raise
 
 
+# -----------------------------------------------------
+# Pool di driver caldi (lease/return)
+# -----------------------------------------------------
+
+# Quanti Chrome per processo al massimo
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2") or 2)
+# Quante navigazioni prima di riciclare un driver (memoria di Chrome cresce)
+POOL_MAX_NAVIGATIONS = int(os.getenv("DRIVER_POOL_MAX_NAV", "25") or 25)
+# Quanti driver avviare subito all'avvio del worker
+POOL_PREWARM = int(os.getenv("DRIVER_POOL_PREWARM", "1") or 0)
+# Attesa massima per ottenere un driver libero (secondi)
+POOL_LEASE_TIMEOUT = float(os.getenv("DRIVER_POOL_LEASE_TIMEOUT", "300") or 300)
+
+
+class PooledDriver:
+    """
+    Proxy trasparente sul driver UC: conta le navigazioni (get)
+    e delega tutto il resto al driver reale.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.navigations = 0
+        self.broken = False
+        self.profile = None  # profilo di blocco attivo (None = quello di make_uc_driver)
+
+    @property
+    def raw(self):
+        return self._driver
+
+    def get(self, url):
+        self.navigations += 1
+        return self._driver.get(url)
+
+    def quit(self):
+        # Il pool decide quando chiudere davvero: qui marchiamo solo da scartare
+        self.broken = True
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class DriverPool:
+    def __init__(self, size: int = POOL_SIZE, max_navigations: int = POOL_MAX_NAVIGATIONS,
+                 factory=make_uc_driver):
+        self.size = max(1, int(size))
+        self.max_navigations = max(1, int(max_navigations))
+        self.factory = factory
+        self._idle = []            # PooledDriver liberi
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+
+    # ------------------------------
+    # Ciclo di vita driver
+    # ------------------------------
+    def _create(self) -> PooledDriver:
+        return PooledDriver(self.factory())
+
+    @staticmethod
+    def _destroy(pd: PooledDriver):
+        try:
+            pd.raw.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _healthy(pd: PooledDriver) -> bool:
+        if pd.broken:
+            return False
+        try:
+            pd.raw.current_url  # round-trip verso chromedriver
+            return bool(pd.raw.window_handles)
+        except Exception:
+            return False
+
+    def _take_idle(self):
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    # ------------------------------
+    # API
+    # ------------------------------
+    @contextmanager
+    def lease(self, timeout: float = POOL_LEASE_TIMEOUT, profile: str = None):
+        """
+        with pool.lease() as driver: ...
+        Restituisce un driver sano (riusato se disponibile, altrimenti nuovo).
+        profile: profilo di blocco richieste (netblock.PROFILES) da attivare,
+        applicato solo se diverso da quello già attivo sul driver.
+        A fine blocco torna nel pool, oppure viene chiuso se crashato
+        o se ha superato max_navigations.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"Nessun driver libero entro {timeout:.0f}s")
+        pd = None
+        try:
+            while pd is None:
+                cand = self._take_idle()
+                if cand is None:
+                    pd = self._create()
+                elif self._healthy(cand):
+                    pd = cand
+                else:
+                    print("[POOL] driver non sano, lo ricreo", flush=True)
+                    self._destroy(cand)
+            if profile is not None and pd.profile != profile:
+                netblock.apply_profile(pd.raw, profile)
+                pd.profile = profile
+            try:
+                yield pd
+            except Exception as e:
+                if _is_driver_crash(e):
+                    pd.broken = True
+                raise
+        finally:
+            try:
+                if pd is not None:
+                    self._release(pd)
+            finally:
+                self._slots.release()
+
+    def _release(self, pd: PooledDriver):
+        if self._closed or pd.broken or pd.navigations >= self.max_navigations:
+            reason = "chiuso" if self._closed else ("crash" if pd.broken else f"{pd.navigations} navigazioni")
+            print(f"[POOL] riciclo driver ({reason})", flush=True)
+            self._destroy(pd)
+            return
+        try:
+            # libera la memoria della pagina senza chiudere Chrome
+            pd.raw.get("about:blank")
+            # e il performance log non letto (lease senza misura, about:blank)
+            netblock.reset(pd.raw)
+        except Exception:
+            self._destroy(pd)
+            return
+        with self._lock:
+            self._idle.append(pd)
+
+    def prewarm(self, n: int = 1):
+        """Avvia n driver e li lascia pronti nel pool."""
+        n = min(max(0, int(n)), self.size)
+        for _ in range(n):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                pd = self._create()
+                with self._lock:
+                    self._idle.append(pd)
+            except Exception as e:
+                print("[POOL][WARN] prewarm fallito:", e, file=sys.stderr, flush=True)
+                break
+            finally:
+                self._slots.release()
+
+    def prewarm_async(self, n: int = 1):
+        threading.Thread(target=self.prewarm, args=(n,), name="driver-prewarm", daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pd in idle:
+            self._destroy(pd)
+
+
+def _is_driver_crash(exc: BaseException) -> bool:
+    from selenium.common.exceptions import WebDriverException, TimeoutException
+    if isinstance(exc, TimeoutException):
+        return False
+    if isinstance(exc, WebDriverException):
+        return True
+    return isinstance(exc, (ConnectionError, OSError))
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> DriverPool:
+    """Pool di processo (creato al primo uso, dopo il fork del worker)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = DriverPool()
+            atexit.register(_POOL.close)
+        return _POOL
+
+
+def prewarm_pool(n: int = POOL_PREWARM):
+    """
+    Pre-avvia i driver in background. Va chiamata solo nel worker gunicorn
+    dopo il fork (hook post_fork in gunicorn.conf.py), non all'import dell'app.
+    """
+    if n > 0:
+        get_pool().prewarm_async(n)
+
+
+# -----------------------------------------------------
+# Budget di driver per il fan-out annidato
+# -----------------------------------------------------
+# job -> fonti -> modi Zillow / pagine Realtor prendono driver dallo stesso pool.
+# Ogni livello lancia al massimo tanti thread quanti driver gli spettano e divide
+# la sua quota tra i figli: la somma delle lease in volo non supera mai il pool,
+# quindi nessun lavoro interno resta in coda su lease() mentre quelli esterni
+# tengono i driver. La quota passa ai thread con il contesto (progress.wrap).
+_BUDGET = contextvars.ContextVar("driver_budget", default=None)
+
+
+def driver_budget() -> int:
+    """Driver su cui può contare il chiamante (default: tutto il pool)."""
+    b = _BUDGET.get()
+    return get_pool().size if b is None else b
+
+
+def fanout(requested: int, tasks: int = None) -> int:
+    """Thread da usare per lavori che prendono un driver ciascuno: min(richiesti, lavori, budget)."""
+    n = min(max(1, int(requested or 1)), driver_budget())
+    if tasks is not None:
+        n = min(n, max(1, int(tasks)))
+    return max(1, n)
+
+
+@contextmanager
+def budget(n: int):
+    """with budget(n): ... -> nel blocco (e nei thread lanciati con progress.wrap) al massimo n driver."""
+    token = _BUDGET.set(max(1, int(n)))
+    try:
+        yield
+    finally:
+        _BUDGET.reset(token)
+
+
+def with_budget(n: int, fn):
+    """fn eseguita con budget(n): per i thread di un fan-out (la quota si imposta nel thread figlio)."""
+    def run(*args, **kwargs):
+        with budget(n):
+            return fn(*args, **kwargs)
+    return run
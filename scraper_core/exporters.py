@@ -0,0 +1,306 @@
+# scraper_core/exporters.py
+"""
+Export dei risultati in formati "piatti" accanto all'Excel: CSV, JSON Lines, Parquet.
+
+- Ogni writer riceve le righe a blocchi (DataFrame o lista di dict) e le scrive
+  subito su disco: la memoria non cresce con il numero di righe
+- StreamExport + streaming(): durante lo scraping gli scraper passano ogni pagina
+  di righe a stream_rows() e i file crescono mentre le pagine arrivano
+- Il file viene scritto come <nome>.part e rinominato solo a fine scrittura,
+  così /results non elenca mai file a metà
+- Parquet richiede pyarrow (in requirements.txt): se manca il formato non viene offerto
+"""
+
+import os
+import csv
+import json
+import math
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None
+
+# Righe per blocco quando si esporta un DataFrame già in memoria
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000") or 5000)
+
+
+def _clean(value):
+    """NaN/NaT -> None, tipi numpy -> tipi Python."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NaT:
+        return None
+    if hasattr(value, "item"):
+        try:
+            value = value.item()
+        except (ValueError, AttributeError):
+            pass
+    return value
+
+
+def _as_frame(rows, columns: List[str]) -> pd.DataFrame:
+    if isinstance(rows, pd.DataFrame):
+        return rows.reindex(columns=columns)
+    return pd.DataFrame(list(rows), columns=columns)
+
+
+class _Exporter:
+    ext = ""
+
+    def __init__(self, path: str, columns: Iterable[str]):
+        self.path = path
+        self.columns = [str(c) for c in columns]
+        self.rows = 0
+        self._tmp = path + ".part"
+        self._closed = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, rows):
+        """Scrive un blocco di righe (DataFrame o iterabile di dict)."""
+        df = _as_frame(rows, self.columns)
+        if not df.empty:
+            self._write(df)
+            self.rows += len(df)
+
+    def _write(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._finish()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._closed = True
+        try:
+            self._finish()
+        except Exception:
+            pass
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvExporter(_Exporter):
+    ext = "csv"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        # utf-8-sig: Excel apre il CSV con gli accenti corretti
+        self._fh = open(self._tmp, "w", encoding="utf-8-sig", newline="")
+        self._csv = csv.writer(self._fh)
+        self._csv.writerow(self.columns)
+
+    def _write(self, df):
+        for row in df.itertuples(index=False, name=None):
+            self._csv.writerow(["" if v is None else v for v in map(_clean, row)])
+
+    def _finish(self):
+        self._fh.close()
+
+
+class JsonlExporter(_Exporter):
+    ext = "jsonl"
+
+    def __init__(self, path, columns):
+        super().__init__(path, columns)
+        self._fh = open(self._tmp, "w", encoding="utf-8")
+
+    def _write(self, df):
+        cols = self.columns
+        for row in df.itertuples(index=False, name=None):
+            rec = {c: _clean(v) for c, v in zip(cols, row)}
+            self._fh.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+
+    def _finish(self):
+        self._fh.close()
+
+
+class ParquetExporter(_Exporter):
+    ext = "parquet"
+
+    def __init__(self, path, columns):
+        if pq is None:
+            raise RuntimeError("Parquet non disponibile (pyarrow non installato)")
+        super().__init__(path, columns)
+        self._writer = None
+        self._schema = None
+
+    def _table(self, df):
+        # colonne object (testo/misti) sempre come stringa: schema stabile tra i blocchi
+        df = df.copy()
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].map(lambda v: None if _clean(v) is None else str(v))
+        if self._schema is None:
+            inferred = pa.Table.from_pandas(df, preserve_index=False).schema
+            # un blocco con sole celle vuote darebbe tipo null: forziamo string
+            self._schema = pa.schema(
+                [pa.field(f.name, pa.string()) if df[f.name].dtype == object else f for f in inferred],
+                metadata=inferred.metadata,
+            )
+        return pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+
+    def _write(self, df):
+        table = self._table(df)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._tmp, self._schema)
+        self._writer.write_table(table)  # un row group per blocco
+
+    def _finish(self):
+        if self._writer is None:
+            # nessuna riga: file valido con le sole colonne
+            schema = pa.schema([(c, pa.string()) for c in self.columns])
+            self._writer = pq.ParquetWriter(self._tmp, schema)
+        self._writer.close()
+
+
+EXPORTERS = {cls.ext: cls for cls in (CsvExporter, JsonlExporter, ParquetExporter)}
+EXPORT_FORMATS = tuple(EXPORTERS)
+
+
+def available_formats() -> List[str]:
+    return [f for f in EXPORT_FORMATS if f != "parquet" or pq is not None]
+
+
+def open_exporter(fmt: str, path: str, columns: Iterable[str]) -> _Exporter:
+    cls = EXPORTERS.get((fmt or "").lower())
+    if cls is None:
+        raise ValueError(f"formato di export sconosciuto: {fmt}")
+    return cls(path, columns)
+
+
+# ------------------------------
+# Export in streaming durante lo scraping
+# ------------------------------
+class StreamExport:
+    """
+    Export di una fonte in più formati, alimentati a blocchi mentre lo scraper produce righe.
+    I file si aprono al primo blocco (colonne = quelle del primo blocco dopo prepare);
+    un formato che fallisce viene scartato senza fermare gli altri né lo scraping.
+    """
+
+    def __init__(self, base_path: str, formats: Iterable[str], prepare: Optional[Callable] = None):
+        self.base_path = base_path
+        self.formats = [f for f in formats]
+        self.prepare = prepare
+        self.chunks = 0
+        self.messages: List[str] = []
+        self._exporters = None
+        self._lock = threading.Lock()  # i modi Zillow scrivono da thread diversi
+
+    def _open(self, columns):
+        self._exporters = {}
+        for fmt in self.formats:
+            try:
+                self._exporters[fmt] = open_exporter(fmt, f"{self.base_path}.{fmt}", columns)
+            except Exception as e:
+                self.messages.append(f"[WARN] Export {fmt.upper()} non riuscito: {e}")
+
+    def _write(self, df: pd.DataFrame):
+        if self.prepare is not None and not df.empty:
+            df = self.prepare(df)
+        if self._exporters is None:
+            self._open(list(df.columns))
+        for fmt, exp in list(self._exporters.items()):
+            try:
+                exp.write(df)
+            except Exception as e:
+                exp.abort()
+                del self._exporters[fmt]
+                self.messages.append(f"[WARN] Export {fmt.upper()} non riuscito: {e}")
+
+    def write(self, rows):
+        """Un blocco di righe (DataFrame o lista di dict), scritto subito in ogni formato."""
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        if df.empty:
+            return
+        with self._lock:
+            self._write(df)
+            self.chunks += 1
+
+    def close(self, fallback: Optional[pd.DataFrame] = None):
+        """
+        Chiude i file e ritorna (lista_file_creati, messages). Se nessun blocco è
+        arrivato (fonte che non fa streaming, o zero righe) scrive fallback.
+        """
+        with self._lock:
+            if not self.chunks and fallback is not None:
+                for start in range(0, max(len(fallback), 1), EXPORT_CHUNK_ROWS):
+                    self._write(fallback.iloc[start:start + EXPORT_CHUNK_ROWS])
+            paths = []
+            for fmt, exp in (self._exporters or {}).items():
+                try:
+                    exp.close()
+                    paths.append(exp.path)
+                    print(f"[EXPORT] {fmt}: {exp.rows} righe -> {exp.path}", flush=True)
+                except Exception as e:
+                    exp.abort()
+                    self.messages.append(f"[WARN] Export {fmt.upper()} non riuscito: {e}")
+            self._exporters = {}
+        return paths, list(self.messages)
+
+    def abort(self):
+        """Scraping fallito: rimuove i file parziali."""
+        with self._lock:
+            for exp in (self._exporters or {}).values():
+                exp.abort()
+            self._exporters = {}
+
+
+_SINK = contextvars.ContextVar("export_sink", default=None)
+
+
+@contextmanager
+def streaming(sink: StreamExport):
+    """with streaming(sink): fn() -> le righe passate a stream_rows() nel blocco vanno in sink."""
+    token = _SINK.set(sink)
+    try:
+        yield sink
+    finally:
+        _SINK.reset(token)
+
+
+def stream_rows(rows):
+    """Chiamata dagli scraper per ogni pagina di righe; senza export in corso non fa nulla."""
+    sink = _SINK.get()
+    if sink is not None and rows is not None and len(rows):
+        sink.write(rows)
+
+
+def export_frame(df: pd.DataFrame, base_path: str, formats: Iterable[str],
+                 chunk_rows: Optional[int] = None):
+    """
+    Esporta un DataFrame già in memoria in ciascun formato richiesto (base_path senza estensione).
+    Ritorna (lista_file_creati, messages).
+    """
+    chunk_rows = max(1, int(chunk_rows or EXPORT_CHUNK_ROWS))
+    sink = StreamExport(base_path, formats)
+    for start in range(0, len(df), chunk_rows):
+        sink.write(df.iloc[start:start + chunk_rows])
+    return sink.close(fallback=df)
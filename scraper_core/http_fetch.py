@@ -0,0 +1,211 @@
+# scraper_core/http_fetch.py
+"""
+Fast path HTTP (senza browser) per le pagine di ricerca Zillow.
+
+- Session requests con pool di connessioni keep-alive
+- Cookie persistiti su disco tra un run e l'altro (il file si riscrive solo
+  quando il jar cambia, e alla chiusura)
+- Riconosce pagine di blocco (captcha/403/429) così il chiamante
+  può ripiegare sul percorso Chrome
+- Conta hit/fallback per riportare l'hit rate del fast path; stats(since=...)
+  dà i conteggi dall'istantanea presa a inizio crawl
+
+ZILLOW_HTTP_BASE permette di puntare il fetcher a un server locale che
+serve pagine registrate (es. http://127.0.0.1:8765): viene sostituito
+schema+host dell'URL, path e querystring restano invariati.
+"""
+
+import os
+import json
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAST_PATH_ENABLED = os.environ.get("ZILLOW_HTTP_FAST_PATH", "1").strip().lower() not in ("0", "false", "no", "off")
+COOKIE_JAR_PATH = os.environ.get("ZILLOW_COOKIE_JAR") or os.path.join(PROJECT_DIR, "cache", "zillow_cookies.json")
+BASE_OVERRIDE = (os.environ.get("ZILLOW_HTTP_BASE") or "").strip().rstrip("/")
+TIMEOUT = float(os.environ.get("ZILLOW_HTTP_TIMEOUT", "20") or 20)
+
+# stesso UA del driver Chrome (driver_factory), così i cookie restano coerenti
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+)
+
+BLOCK_STATUSES = {401, 403, 407, 429, 503}
+BLOCK_MARKERS = (
+    "px-captcha",
+    "captcha-container",
+    "press & hold",
+    "perimeterx",
+    "access to this page has been denied",
+    "please verify you are a human",
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int]
+    html: str
+    blocked: bool
+    reason: str = ""
+
+
+def detect_block(status: Optional[int], html: str) -> str:
+    """Ritorna il motivo del blocco ("" se la pagina sembra valida)."""
+    if status is None:
+        return "no-response"
+    if status in BLOCK_STATUSES:
+        return f"http-{status}"
+    if status >= 400:
+        return f"http-{status}"
+    low = (html or "")[:200_000].lower()
+    for marker in BLOCK_MARKERS:
+        if marker in low:
+            return f"marker:{marker}"
+    if "__next_data__" not in low:
+        return "no-next-data"
+    return ""
+
+
+class HttpFetcher:
+    def __init__(self, cookie_path: Optional[str] = COOKIE_JAR_PATH, base_override: str = BASE_OVERRIDE,
+                 timeout: float = TIMEOUT, pool_size: int = 4):
+        self.cookie_path = cookie_path
+        self.base_override = base_override
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._saved_cookies = None  # firma del jar salvato su disco
+        self._stats = {"requests": 0, "hits": 0, "fallbacks": 0, "reasons": {}}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1",
+        })
+        self._load_cookies()
+
+    # ------------------------------
+    # Cookie
+    # ------------------------------
+    def _load_cookies(self):
+        if not self.cookie_path:
+            return
+        try:
+            with open(self.cookie_path, "r", encoding="utf-8") as f:
+                for c in json.load(f):
+                    self.session.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[HTTP][WARN] cookie jar illeggibile: {e}", flush=True)
+        self._saved_cookies = self._cookie_state()
+
+    def _cookie_state(self):
+        # le fetch parallele possono modificare il jar mentre lo si scorre: None = riprova dopo
+        try:
+            return tuple(sorted((c.name, c.value, c.domain, c.path) for c in self.session.cookies))
+        except RuntimeError:
+            return None
+
+    def _save_cookies(self, force: bool = False):
+        """Riscrive il file solo se il jar è cambiato dall'ultimo salvataggio (o con force)."""
+        if not self.cookie_path:
+            return
+        state = self._cookie_state()
+        if state is None or (state == self._saved_cookies and not force):
+            return
+        with self._io_lock:
+            if state == self._saved_cookies and not force:
+                return  # salvato nel frattempo da un'altra fetch
+            try:
+                os.makedirs(os.path.dirname(self.cookie_path), exist_ok=True)
+                data = [{"name": n, "value": v, "domain": d, "path": p} for n, v, d, p in state]
+                tmp = self.cookie_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.cookie_path)
+                self._saved_cookies = state
+            except Exception as e:
+                print(f"[HTTP][WARN] impossibile salvare i cookie: {e}", flush=True)
+
+    # ------------------------------
+    # Fetch
+    # ------------------------------
+    def _target(self, url: str) -> str:
+        if not self.base_override:
+            return url
+        base = urlsplit(self.base_override)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+    def fetch(self, url: str) -> FetchResult:
+        target = self._target(url)
+        try:
+            resp = self.session.get(target, timeout=self.timeout)
+            status, html = resp.status_code, resp.text or ""
+        except requests.RequestException as e:
+            print(f"[HTTP][WARN] {type(e).__name__}: {e}", flush=True)
+            status, html = None, ""
+        reason = detect_block(status, html)
+        with self._lock:
+            self._stats["requests"] += 1
+        self._save_cookies()
+        return FetchResult(url=target, status=status, html=html, blocked=bool(reason), reason=reason)
+
+    def record(self, hit: bool, reason: str = ""):
+        """Registra l'esito finale (hit = righe ottenute senza Chrome)."""
+        with self._lock:
+            if hit:
+                self._stats["hits"] += 1
+            else:
+                self._stats["fallbacks"] += 1
+                key = reason or "unknown"
+                self._stats["reasons"][key] = self._stats["reasons"].get(key, 0) + 1
+
+    def stats(self, since: Optional[dict] = None) -> dict:
+        """
+        Conteggi del processo; con since (un risultato precedente di stats) solo quelli
+        successivi, es. un crawl. Crawl paralleli nello stesso processo si sommano.
+        """
+        with self._lock:
+            s = json.loads(json.dumps(self._stats))
+        if since:
+            for k in ("requests", "hits", "fallbacks"):
+                s[k] -= since.get(k, 0)
+            before = since.get("reasons") or {}
+            s["reasons"] = {r: n - before.get(r, 0) for r, n in s["reasons"].items() if n > before.get(r, 0)}
+        done = s["hits"] + s["fallbacks"]
+        s["hit_rate"] = round(s["hits"] / done, 3) if done else None
+        return s
+
+    def close(self):
+        self._save_cookies(force=True)
+        self.session.close()
+
+
+_FETCHER = None
+_FETCHER_LOCK = threading.Lock()
+
+
+def get_fetcher() -> HttpFetcher:
+    """Fetcher di processo condiviso (una sola Session keep-alive)."""
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = HttpFetcher()
+        return _FETCHER
@@ -0,0 +1,406 @@
+# scraper_core/metrics.py
+"""
+Metriche di processo (contatori, gauge, istogrammi) esposte su /metrics
+in formato testo Prometheus.
+
+- Registro in memoria, senza dipendenze esterne
+- Ogni worker gunicorn salva le sue serie in METRICS_DIR/<pid>.json al più
+  ogni METRICS_FLUSH_SECONDS (timer in background, a ogni /metrics e all'uscita);
+  /metrics le somma tutte (il worker che risponde usa i valori in memoria)
+- I gauge (es. job in corso) contano solo per i processi ancora vivi;
+  contatori e istogrammi di un worker terminato vengono assorbiti dal primo
+  worker vivo che serve /metrics (sezione "retired" del suo file) e il file
+  del morto viene cancellato: i totali non calano e i file non si accumulano
+- Le serie con label "source" senza valore esplicito prendono la fonte
+  dallo scope di progress (Zillow/Realtor), se presente
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+
+from . import progress
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+METRICS_DIR = os.environ.get("METRICS_DIR") or os.path.join(PROJECT_DIR, "cache", "metrics")
+# Ogni quanto (al massimo) un worker riscrive il suo file
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "2") or 2)
+METRICS_ENABLED = os.environ.get("METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Secondi: dalle fasi brevi (parse) a quelle lunghe (job interi)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry, name: str, help: str, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.series = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if "source" in self.labelnames and not labels.get("source"):
+            labels["source"] = str(progress.fields().get("source") or "").lower()
+        unknown = set(labels) - set(self.labelnames)
+        if unknown:
+            raise ValueError(f"{self.name}: label sconosciute {sorted(unknown)}")
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def dump(self) -> dict:
+        with self.registry._lock:
+            series = [[list(k), v] for k, v in self.series.items()]
+        return {"kind": self.kind, "help": self.help, "labels": list(self.labelnames), "series": series}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+        self.registry.changed()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self.series[key] = value
+        self.registry.changed()
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.registry._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+        self.registry.changed()
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = len(self.buckets)  # slot +Inf
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self.registry._lock:
+            s = self.series.get(key)
+            if s is None:
+                # [conteggi per bucket (non cumulativi, ultimo = +Inf), somma, numero]
+                s = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][idx] += 1
+            s[1] += value
+            s[2] += 1
+        self.registry.changed()
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def dump(self) -> dict:
+        out = super().dump()
+        out["buckets"] = list(self.buckets)
+        return out
+
+
+class Registry:
+    def __init__(self, directory: str = METRICS_DIR, flush_seconds: float = METRICS_FLUSH_SECONDS,
+                 enabled: bool = METRICS_ENABLED):
+        self.directory = directory
+        self.flush_seconds = float(flush_seconds)
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._dirty = False
+        self._retired = {}  # serie assorbite dai worker terminati (formato di _merge)
+        self._timer_pid = None
+
+    def _get_or_create(self, cls, name, help, labels, **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(self, name, help, labels, **kw)
+        if not isinstance(m, cls) or m.labelnames != tuple(labels):
+            raise ValueError(f"metrica {name} già registrata con tipo/label diversi")
+        return m
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    # ------------------------------
+    # Persistenza per worker
+    # ------------------------------
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            retired = _unmerge(self._retired)
+        return {"pid": os.getpid(), "ts": time.time(), "metrics": {m.name: m.dump() for m in metrics},
+                "retired": retired}
+
+    def changed(self):
+        self._dirty = True
+        if not self.enabled:
+            return
+        if time.time() - self._last_flush >= self.flush_seconds:
+            self.flush()
+        self._ensure_timer()
+
+    def _ensure_timer(self):
+        # un thread per processo (dopo un fork il thread del padre non esiste più):
+        # l'ultima modifica prima di una pausa arriva comunque su disco
+        pid = os.getpid()
+        if self._timer_pid == pid:
+            return
+        self._timer_pid = pid
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(max(0.1, self.flush_seconds))
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Scrive subito il file di questo processo (no-op con METRICS=0)."""
+        if not self.enabled:
+            return
+        self._last_flush = time.time()
+        self._dirty = False
+        try:
+            data = self.snapshot()
+            with self._io_lock:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self._path(data["pid"])
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp, path)
+        except Exception as e:
+            print(f"[METRICS][WARN] flush fallito: {e}", flush=True)
+
+    def _snapshots(self):
+        """Snapshot di tutti i worker: il proprio dalla memoria, gli altri dai file."""
+        own = self.snapshot()
+        out = [(own, True)]
+        if not self.enabled:
+            return out
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return out
+        absorbed = False
+        for fname in names:
+            if not fname.endswith(".json"):
+                continue
+            try:
+                pid = int(fname[:-5])
+            except ValueError:
+                continue
+            if pid == own["pid"]:
+                continue
+            path = os.path.join(self.directory, fname)
+            if not _alive(pid):
+                absorbed = self._absorb(path) or absorbed
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue  # file in riscrittura o corrotto: lo salta per questo giro
+            out.append((data, True))
+        if absorbed:
+            out[0] = (self.snapshot(), True)  # include quanto appena assorbito
+        return out
+
+    def _absorb(self, path: str):
+        """
+        File di un worker terminato: contatori e istogrammi (e quanto lui stesso aveva
+        assorbito) passano nella sezione "retired" di questo processo, il file sparisce.
+        Il rename è il "lock": con più worker che rispondono a /metrics lo prende uno solo.
+        """
+        claim = f"{path}.{os.getpid()}.claim"
+        try:
+            os.replace(path, claim)
+        except OSError:
+            return False  # già preso da un altro worker
+        try:
+            with open(claim, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        with self._lock:
+            _merge(self._retired, data.get("metrics") or {}, gauges=False)
+            _merge(self._retired, data.get("retired") or {}, gauges=False)
+        self._dirty = True
+        self.flush()  # prima salvato qui, poi cancellato di là
+        try:
+            os.remove(claim)
+        except OSError:
+            pass
+        return True
+
+    # ------------------------------
+    # Formato testo Prometheus
+    # ------------------------------
+    def render(self) -> str:
+        if self._dirty:
+            self.flush()  # gli altri worker vedono subito anche questo
+        merged = {}
+        workers = 0
+        for data, alive in self._snapshots():
+            workers += 1 if alive else 0
+            _merge(merged, data.get("metrics") or {}, gauges=alive)
+            _merge(merged, data.get("retired") or {}, gauges=False)
+
+        lines = [
+            "# HELP scraper_metrics_workers Processi che espongono metriche",
+            "# TYPE scraper_metrics_workers gauge",
+            f"scraper_metrics_workers {workers}",
+        ]
+        for name in sorted(merged):
+            m = merged[name]
+            lines.append(f"# HELP {name} {m.get('help', '')}")
+            lines.append(f"# TYPE {name} {m['kind']}")
+            names = m.get("labels") or []
+            for key in sorted(m["series"]):
+                value = m["series"][key]
+                if m["kind"] != "histogram":
+                    lines.append(f"{name}{_labels(names, key)} {_fmt(value)}")
+                    continue
+                counts, total, n = value
+                cumulative = 0
+                for bound, c in zip(list(m["buckets"]) + [float("inf")], counts):
+                    cumulative += c
+                    lines.append(f"{name}_bucket{_labels(names, key, [('le', _fmt(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, key)} {_fmt(round(total, 6))}")
+                lines.append(f"{name}_count{_labels(names, key)} {n}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(merged: dict, metrics: dict, gauges: bool = True):
+    """Somma le serie di metrics ({nome: dump}) in merged; serie come dict {tuple(label): valore}."""
+    for name, m in metrics.items():
+        if m.get("kind") == "gauge" and not gauges:
+            continue
+        series = m.get("series") or []
+        if isinstance(series, dict):
+            series = series.items()
+        agg = merged.setdefault(name, {**m, "series": {}})
+        if m.get("kind") == "histogram" and m.get("buckets") != agg.get("buckets"):
+            continue  # bucket cambiati tra versioni: non sommabili
+        for labels, value in series:
+            key = tuple(labels)
+            prev = agg["series"].get(key)
+            if m["kind"] == "histogram":
+                if prev is None:
+                    prev = agg["series"][key] = [[0] * len(value[0]), 0.0, 0]
+                prev[0] = [a + b for a, b in zip(prev[0], value[0])]
+                prev[1] += value[1]
+                prev[2] += value[2]
+            else:
+                agg["series"][key] = (prev or 0) + value
+
+
+def _unmerge(merged: dict) -> dict:
+    """Inverso di _merge per il salvataggio JSON: serie come lista [[label], valore]."""
+    return {name: {**m, "series": [[list(k), v] for k, v in m["series"].items()]}
+            for name, m in merged.items()}
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) su Windows non è una semplice verifica
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+REGISTRY = Registry()
+atexit.register(lambda: REGISTRY._dirty and REGISTRY.flush())
+
+# ------------------------------
+# Metriche dello scraper
+# ------------------------------
+STAGE_SECONDS = REGISTRY.histogram(
+    "scraper_stage_seconds",
+    "Durata delle fasi di scraping (driver_start, driver_get, wait, extract, parse, dataframe, excel, export)",
+    ("source", "stage"),
+)
+CHROME_LAUNCH_FAILURES = REGISTRY.counter(
+    "scraper_chrome_launch_failures_total", "Avvii di Chrome (undetected-chromedriver) falliti")
+CACHE_LOOKUPS = REGISTRY.counter(
+    "scraper_page_cache_lookups_total", "Letture dalla cache pagine per esito (hit/miss)", ("source", "result"))
+ROWS = REGISTRY.counter("scraper_rows_total", "Righe estratte per fonte", ("source",))
+JOBS_IN_FLIGHT = REGISTRY.gauge("scraper_jobs_in_flight", "Job di scraping in coda o in esecuzione")
+JOBS_FINISHED = REGISTRY.counter("scraper_jobs_total", "Job di scraping conclusi per stato", ("state",))
+JOB_SECONDS = REGISTRY.histogram("scraper_job_seconds", "Durata dei job di scraping")
+
+
+def timed(stage: str, source: str = None):
+    """with timed("driver_get", "zillow"): ... -> scraper_stage_seconds{source, stage}"""
+    return STAGE_SECONDS.time(stage=stage, source=source)
+
+
+def flush():
+    REGISTRY.flush()
+
+
+def render() -> str:
+    return REGISTRY.render()
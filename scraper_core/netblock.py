@@ -0,0 +1,182 @@
+# scraper_core/netblock.py
+"""
+Blocco delle richieste inutili nel Chrome del pool e byte scaricati per pagina.
+
+- PROFILES: profili nominati di pattern URL (immagini, font, video, tile delle
+  mappe, tracker di terze parti) applicati con CDP Network.setBlockedURLs.
+  CDP non filtra per tipo di risorsa senza intercettare ogni richiesta
+  (Fetch.requestPaused): il tipo si esprime con le estensioni e con gli host
+  dedicati (CDN foto, tile, analytics). I pattern sono ancorati: estensione a
+  fine percorso (prima di ? o #), host come dominio intero, così query string
+  e path di API che contengono ".css" o un nome di host non vengono bloccati
+- apply_profile(driver, nome): una chiamata CDP, ripetibile a ogni lease
+- reset/page_transfer: byte (encodedDataLength dal performance log di
+  chromedriver), richieste e richieste bloccate dall'ultima lettura; senza
+  performance log si ripiega su Resource Timing (transferSize, sottostima le
+  risorse cross-origin senza Timing-Allow-Origin)
+Driver senza CDP (driver finto dei benchmark) -> nessun blocco, nessuna misura.
+
+Env:
+  DRIVER_BLOCK_PROFILE  profilo applicato da make_uc_driver (default "none")
+  DRIVER_BLOCK_EXTRA    pattern aggiuntivi per ogni profilo, separati da virgola
+  DRIVER_PERF_LOG=0     non attiva il performance log (byte solo da Resource Timing)
+"""
+
+import os
+import json
+
+from . import metrics
+
+def _ext(*exts):
+    """Estensione a fine percorso: /a/b.png e /a/b.png?w=200, non /api?f=b.png-x."""
+    return [p for e in exts for p in (f"*.{e}", f"*.{e}?*", f"*.{e}#*")]
+
+
+def _host(*hosts):
+    """Dominio e sottodomini (host, non sottostringa dell'URL); * ammesso nel nome."""
+    return [p for h in hosts for p in (f"*://{h}/*", f"*://*.{h}/*")]
+
+
+_IMAGES = _ext("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp")
+_FONTS = _ext("woff", "woff2", "ttf", "otf", "eot")
+_MEDIA = _ext("mp4", "webm", "m3u8", "mp3", "m4a")
+_MAPS = _host(
+    "maps.googleapis.com", "maps.gstatic.com", "khms*.google.com", "api.mapbox.com",
+    "tiles.mapbox.com", "virtualearth.net",
+)
+_TRACKERS = _host(
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "doubleclick.net",
+    "googleadservices.com", "facebook.net", "hotjar.com", "newrelic.com", "nr-data.net",
+    "optimizely.com", "segment.io", "segment.com", "branch.io", "bat.bing.com", "adsrvr.org",
+    "amazon-adsystem.com", "quantserve.com", "scorecardresearch.com", "tiqcdn.com", "tealiumiq.com",
+    "pinimg.com", "tiktok.com", "snapchat.com", "criteo.com", "criteo.net", "taboola.com",
+) + ["*://www.facebook.com/tr*", "*://facebook.com/tr*"]
+
+PROFILES = {
+    "none": [],
+    # Zillow: serve solo l'HTML con __NEXT_DATA__ (e le card come ripiego);
+    # gli script restano, senza di loro la protezione anti-bot si insospettisce
+    "zillow-json-only": _IMAGES + _FONTS + _MEDIA + _MAPS + _TRACKERS + _ext("css") + _host(
+        "photos.zillowstatic.com", "maps.zillowstatic.com",
+    ),
+    # Realtor: le card si montano via JS e il caricamento allo scroll vuole il layout,
+    # quindi CSS e script restano; via foto, font, mappe e tracker
+    "realtor-cards": _IMAGES + _FONTS + _MEDIA + _MAPS + _TRACKERS + _host("rdcpix.com"),
+}
+
+DEFAULT_PROFILE = (os.environ.get("DRIVER_BLOCK_PROFILE") or "none").strip()
+EXTRA_PATTERNS = [p.strip() for p in os.environ.get("DRIVER_BLOCK_EXTRA", "").split(",") if p.strip()]
+PERF_LOG = os.environ.get("DRIVER_PERF_LOG", "1").strip().lower() not in ("0", "false", "no", "off")
+
+PAGE_BYTES = metrics.REGISTRY.histogram(
+    "scraper_page_bytes",
+    "Byte scaricati per pagina di ricerca (dopo il blocco delle risorse)",
+    ("source",),
+    buckets=(50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6),
+)
+BLOCKED_REQUESTS = metrics.REGISTRY.counter(
+    "scraper_blocked_requests_total", "Richieste bloccate dal profilo del driver", ("source",))
+
+_TRANSFER_JS = """
+var e = performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"));
+var b = 0;
+for (var i = 0; i < e.length; i++) b += e[i].transferSize || 0;
+return {bytes: b, requests: e.length};
+"""
+
+_warned = set()
+
+
+def _warn_once(key, msg):
+    if key not in _warned:
+        _warned.add(key)
+        print(msg, flush=True)
+
+
+def patterns(profile: str) -> list:
+    """Pattern URL del profilo (più DRIVER_BLOCK_EXTRA); profilo sconosciuto = nessun blocco."""
+    if not profile or profile == "none":
+        return []
+    if profile not in PROFILES:
+        _warn_once(("profile", profile), f"[NETBLOCK][WARN] profilo sconosciuto {profile!r}: "
+                                         f"nessun blocco (disponibili: {', '.join(PROFILES)})")
+        return []
+    return PROFILES[profile] + EXTRA_PATTERNS
+
+
+def apply_profile(driver, profile: str) -> bool:
+    """Attiva il profilo sul driver (sostituisce il precedente); False se CDP non è disponibile."""
+    urls = patterns(profile)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+    except Exception as e:
+        _warn_once("cdp", f"[NETBLOCK][WARN] blocco richieste non disponibile ({type(e).__name__}: {e})")
+        return False
+    return True
+
+
+def _drain_perf_log(driver):
+    """Consuma il performance log: (byte, richieste, bloccate) dall'ultima lettura, None se assente."""
+    if not PERF_LOG:
+        return None
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+    nbytes = requests = blocked = 0
+    for entry in entries:
+        raw = entry.get("message") or ""
+        # scarta senza json.loads gli eventi che non servono (dataReceived, headers, ...)
+        if "Network.loadingFinished" in raw:
+            try:
+                nbytes += int(json.loads(raw)["message"]["params"].get("encodedDataLength") or 0)
+            except (ValueError, KeyError, TypeError):
+                pass
+        elif "Network.requestWillBeSent" in raw:
+            requests += 1
+        elif "Network.loadingFailed" in raw and "blockedReason" in raw:
+            blocked += 1
+    return nbytes, requests, blocked
+
+
+def reset(driver):
+    """
+    Scarta il performance log accumulato: prima di driver.get (conteggio della sola pagina)
+    e quando il driver torna nel pool (niente voci di /diag o about:blank alla lease dopo).
+    """
+    _drain_perf_log(driver)
+
+
+def page_transfer(driver, source: str = None):
+    """
+    {"bytes", "requests", "blocked", "via"} della pagina corrente (dall'ultimo reset);
+    registra scraper_page_bytes. None se il driver non permette la misura.
+    """
+    out = None
+    drained = _drain_perf_log(driver)
+    if drained is not None and drained[1]:
+        out = {"bytes": drained[0], "requests": drained[1], "blocked": drained[2], "via": "perf_log"}
+    else:
+        try:
+            res = driver.execute_script(_TRANSFER_JS)
+        except Exception:
+            res = None
+        if isinstance(res, dict):
+            out = {"bytes": int(res.get("bytes") or 0), "requests": int(res.get("requests") or 0),
+                   "blocked": None, "via": "resource_timing"}
+    if out is not None:
+        PAGE_BYTES.observe(out["bytes"], source=source)
+        if out["blocked"]:
+            BLOCKED_REQUESTS.inc(out["blocked"], source=source)
+    return out
+
+
+def describe(transfer) -> str:
+    """Frammento per i log per pagina: "812 kB, 37 req, 54 bloccate"."""
+    if not transfer:
+        return "byte n/d"
+    s = f"{transfer['bytes'] / 1024:.0f} kB, {transfer['requests']} req"
+    if transfer.get("blocked") is not None:
+        s += f", {transfer['blocked']} bloccate"
+    return s
@@ -0,0 +1,179 @@
+# scraper_core/page_cache.py
+"""
+Cache su disco (SQLite) delle righe estratte, chiave = URL di ricerca normalizzato.
+
+- TTL per voce (PAGE_CACHE_TTL, secondi; default 6 ore)
+- Dimensione totale limitata (PAGE_CACHE_MAX_MB) con eviction LRU
+- Statistiche hit/miss persistite nella stessa base dati, esposte da
+  /diag/cache (JSON) e in coda a /metrics (render_stats)
+Condivisa tra thread e worker gunicorn (una connessione per operazione,
+chiusa a fine operazione, WAL).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from . import metrics
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CACHE_PATH = os.environ.get("PAGE_CACHE_PATH") or os.path.join(PROJECT_DIR, "cache", "pages.sqlite3")
+CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", str(6 * 3600)) or 0)
+CACHE_MAX_BYTES = int(float(os.environ.get("PAGE_CACHE_MAX_MB", "64") or 64) * 1024 * 1024)
+CACHE_ENABLED = os.environ.get("PAGE_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def normalize_key(url: str, extra: str = "") -> str:
+    """
+    Normalizza l'URL di ricerca: host minuscolo, path senza '/' finale,
+    parametri ordinati e searchQueryState ricodificato a chiavi ordinate.
+    """
+    parts = urlsplit((url or "").strip())
+    params = []
+    for k, v in parse_qsl(parts.query, keep_blank_values=True):
+        if k == "searchQueryState":
+            try:
+                v = json.dumps(json.loads(v), sort_keys=True, separators=(",", ":"))
+            except ValueError:
+                pass
+        params.append((k, v))
+    params.sort()
+    path = parts.path.rstrip("/") or "/"
+    key = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(params), ""))
+    return f"{key}#{extra}" if extra else key
+
+
+class PageCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = int(ttl)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, expires REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+            con.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        # "with sqlite3.connect()" fa solo commit/rollback: la connessione va chiusa a parte
+        with closing(sqlite3.connect(self.path, timeout=10)) as con, con:
+            yield con
+
+    @staticmethod
+    def _bump(con, name: str, n: int = 1):
+        con.execute(
+            "INSERT INTO stats(name, value) VALUES(?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key: str):
+        """Ritorna il valore (già decodificato) o None se assente/scaduto."""
+        now = time.time()
+        with self._lock, self._connect() as con:
+            row = con.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    con.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump(con, "misses")
+                metrics.CACHE_LOOKUPS.inc(result="miss")
+                return None
+            con.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._bump(con, "hits")
+        metrics.CACHE_LOOKUPS.inc(result="hit")
+        return json.loads(row[0])
+
+    def put(self, key: str, value, ttl: int | None = None):
+        data = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else int(ttl))
+        with self._lock, self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO entries(key, value, size, created, expires, last_access) "
+                "VALUES(?, ?, ?, ?, ?, ?)",
+                (key, data, len(data), now, expires, now),
+            )
+            self._bump(con, "puts")
+            self._evict(con, now)
+
+    def _evict(self, con, now: float):
+        # prima le voci scadute, poi le meno usate di recente finché si rientra nel limite
+        expired = con.execute("DELETE FROM entries WHERE expires < ?", (now,)).rowcount
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            for key, size in con.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall():
+                if total <= self.max_bytes:
+                    break
+                con.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        if expired or evicted:
+            self._bump(con, "evictions", expired + evicted)
+
+    def stats(self) -> dict:
+        with self._lock, self._connect() as con:
+            out = {name: value for name, value in con.execute("SELECT name, value FROM stats")}
+            n, size = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits, misses = out.get("hits", 0), out.get("misses", 0)
+        out.update({
+            "entries": n,
+            "bytes": size,
+            "hit_rate": round(hits / (hits + misses), 3) if (hits + misses) else None,
+        })
+        return out
+
+
+def render_stats() -> str:
+    """
+    Righe Prometheus con le statistiche della cache (vuoto se disattivata).
+    La base dati è unica per tutti i worker: valori letti qui, non sommati per processo.
+    """
+    cache = get_cache()
+    if cache is None:
+        return ""
+    try:
+        st = cache.stats()
+    except Exception as e:
+        print(f"[CACHE][WARN] statistiche non disponibili: {e}", flush=True)
+        return ""
+    lines = []
+    for name, kind, help, value in (
+        ("scraper_page_cache_entries", "gauge", "Voci nella cache pagine", st["entries"]),
+        ("scraper_page_cache_bytes", "gauge", "Byte occupati dalle voci della cache pagine", st["bytes"]),
+        ("scraper_page_cache_puts_total", "counter", "Scritture nella cache pagine", st.get("puts", 0)),
+        ("scraper_page_cache_evictions_total", "counter", "Voci scadute o rimosse per LRU", st.get("evictions", 0)),
+    ):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Cache di processo, oppure None se disattivata (PAGE_CACHE=0) o non apribile."""
+    global _CACHE
+    if not CACHE_ENABLED:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                _CACHE = PageCache()
+            except Exception as e:
+                print(f"[CACHE][WARN] cache non disponibile: {e}", flush=True)
+                return None
+        return _CACHE
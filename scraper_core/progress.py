@@ -0,0 +1,89 @@
+# scraper_core/progress.py
+"""
+Eventi di avanzamento di un job (fasi, righe, tempi per fase).
+
+- Il job registra un emitter con bind(); il codice di scraping chiama
+  emit() / stage() senza sapere a quale job appartiene (contextvars)
+- scope(source=..., label=...) aggiunge campi a tutti gli eventi emessi dentro
+- Nei thread (ThreadPoolExecutor) il contesto non passa da solo:
+  sottomettere wrap(fn) invece di fn
+- Senza emitter (CLI, sweep batch) le chiamate non fanno nulla
+"""
+
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+_EMITTER = contextvars.ContextVar("progress_emitter", default=None)
+_SCOPE = contextvars.ContextVar("progress_scope", default={})
+
+
+def active() -> bool:
+    return _EMITTER.get() is not None
+
+
+def fields() -> dict:
+    """Campi dello scope corrente (es. {"source": "Zillow", "label": "Sold"})."""
+    return dict(_SCOPE.get())
+
+
+def emit(stage: str, status: str = "progress", **fields):
+    """Invia un evento al job corrente (no-op se nessun job è in ascolto)."""
+    fn = _EMITTER.get()
+    if fn is None:
+        return
+    event = {"stage": stage, "status": status}
+    event.update(_SCOPE.get())
+    event.update({k: v for k, v in fields.items() if v is not None})
+    try:
+        fn(event)
+    except Exception as e:
+        print(f"[PROGRESS][WARN] evento perso: {e}", flush=True)
+
+
+@contextmanager
+def bind(emitter):
+    """Collega un emitter(event: dict) al contesto corrente (uno per job)."""
+    token = _EMITTER.set(emitter)
+    try:
+        yield
+    finally:
+        _EMITTER.reset(token)
+
+
+@contextmanager
+def scope(**fields):
+    token = _SCOPE.set({**_SCOPE.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
+class _Stage:
+    def __init__(self):
+        self.fields = {}
+
+    def set(self, **fields):
+        """Campi da riportare nell'evento di fine fase (es. rows=...)."""
+        self.fields.update(fields)
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """Evento start all'ingresso, done/error all'uscita con la durata della fase."""
+    st = _Stage()
+    t0 = time.time()
+    emit(name, "start", **fields)
+    try:
+        yield st
+    except Exception as e:
+        emit(name, "error", **{**fields, **st.fields, "elapsed": round(time.time() - t0, 2), "error": str(e)})
+        raise
+    emit(name, "done", **{**fields, **st.fields, "elapsed": round(time.time() - t0, 2)})
+
+
+def wrap(fn):
+    """fn legata al contesto corrente: da passare a executor.submit()."""
+    return functools.partial(contextvars.copy_context().run, fn)
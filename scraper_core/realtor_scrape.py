@@ -3,14 +3,32 @@
 import os
 import re
 import time
+import math
 import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import quote
 
-from .driver_factory import make_uc_driver as make_driver  # <-- stesso factory usato per Zillow
+from .driver_factory import get_pool, fanout  # <-- stesso pool di driver usato per Zillow
+from .page_cache import get_cache, normalize_key
+from . import progress, metrics, waits, netblock, exporters
 
 ACRE_TO_SQFT = 43560
 
+# Pagine massime per bucket (/pg-N) e quante caricarne in parallelo (ognuna con un driver del pool)
+MAX_PAGES = int(os.environ.get("REALTOR_MAX_PAGES", "5") or 5)
+PAGE_CONCURRENCY = int(os.environ.get("REALTOR_PAGE_CONCURRENCY", "2") or 2)
+# Card per pagina di ricerca Realtor (per stimare le pagine dal contatore risultati)
+PAGE_SIZE = 42
+# Attese fisse del percorso senza JS asincrono (e riferimento per il tempo risparmiato):
+# sleep iniziale, poi _wait_for_results controlla ogni RESULTS_POLL secondi fino a RESULTS_TIMEOUT
+SETTLE_SECONDS = 2.0
+RESULTS_POLL, RESULTS_TIMEOUT = 0.5, 18
+SCROLL_STEPS, SCROLL_PAUSE = 8, 0.7
+# Profilo di blocco richieste del driver (netblock.PROFILES): niente foto, font, mappe, tracker
+BLOCK_PROFILE = os.environ.get("REALTOR_BLOCK_PROFILE", "realtor-cards").strip()
+
 def acres_to_sqft_range(min_acres: float, max_acres: float):
     def _safe(x):
         try:
@@ -66,6 +84,10 @@ def build_realtor_urls(state_abbr: str, county: str, min_acres: float, max_acres
         urls.append((base.rstrip('/') + "/sold", "sold"))
     return urls
 
+def page_url(url: str, page: int) -> str:
+    """URL della pagina N (1-based) di una ricerca: .../pg-N"""
+    return url if page <= 1 else f"{url.rstrip('/')}/pg-{page}"
+
 def _click_cookie_consent(driver, log):
     # Prova più selettori/label perché Realtor cambia spesso
     candidates = [
@@ -105,30 +127,133 @@ def _progressive_scroll(driver, steps=6, pause=0.8):
         driver.execute_script("window.scrollBy(0, document.body.scrollHeight * 0.6);")
         time.sleep(pause)
 
-def _wait_for_results(driver, timeout=15):
+RESULTS_CSS = "[data-testid='component-property-card'], [data-testid='property-card'], " \
+              "article[data-testid*='card'], [data-testid='search-result-count'], span[class*='results']"
+
+def _wait_for_results(driver, timeout=15, poll=RESULTS_POLL):
     """
     Attende che compaiano card risultati o un contatore.
     """
     start = time.time()
     while time.time() - start < timeout:
         # card possibili
-        cards = driver.find_elements("css selector", 
-            "[data-testid='component-property-card'], [data-testid='property-card'], article[data-testid*='card']")
+        cards = driver.find_elements("css selector", CARD_CSS)
         if cards and len(cards) > 0:
             return True
         # contatore risultati (a volte in header)
         counts = driver.find_elements("css selector", "[data-testid='search-result-count'], span[class*='results']")
         if counts:
             return True
-        time.sleep(0.5)
+        time.sleep(poll)
     return False
 
+# Selettori condivisi tra l'estrazione in JS (un solo round trip) e quella per elemento
+CARD_CSS = "[data-testid='component-property-card'], [data-testid='property-card'], article[data-testid*='card']"
+TITLE_CSS = ["[data-testid='card-title']", "h3", "h2"]
+PRICE_CSS = ["[data-testid='card-price']", "span[data-label='pc-price']",
+             "span[data-testid*='price']", "span[class*='price']"]
+LINK_CSS = ["a[data-testid='card-link']", "a[data-testid*='property-card']", "a[href*='/realestateandhomes-detail/']"]
+STATUS_CSS = "[data-testid*='status'], span[class*='status'], div[class*='status']"
+ANCHOR_CSS = "a[href*='/realestateandhomes-detail/']"
+COUNT_CSS = "[data-testid='search-result-count']"
+# spesso è “Lot size” o “XX acres”
+LOT_XPATH = ".//*[contains(translate(text(),'ACRES','acres'),'acres') or contains(translate(text(),'LOT','lot'),'lot')]"
+ANCHOR_BLOCK_XPATH = "./ancestor::*[position()<=3]"
+
+# Tutte le card in una sola execute_script: stessi selettori del percorso per elemento,
+# innerText ~ element.text di Selenium, a.href già assoluto come get_attribute("href")
+CARDS_JS = """
+var sel = arguments[0];
+function first(el, list) {
+  for (var i = 0; i < list.length; i++) { var f = el.querySelector(list[i]); if (f) return f; }
+  return null;
+}
+function txt(el) { return el ? (el.innerText || el.textContent || "").trim() : ""; }
+function xfirst(xp, ctx) {
+  return document.evaluate(xp, ctx, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+var cards = document.querySelectorAll(sel.card);
+var count = txt(document.querySelector(sel.count));
+if (cards.length) {
+  return {mode: "cards", count: count, items: Array.prototype.map.call(cards, function (el) {
+    var link = first(el, sel.link);
+    return {title: txt(first(el, sel.title)), price: txt(first(el, sel.price)), acres: txt(xfirst(sel.lot, el)),
+            link: link ? (link.href || link.getAttribute("href") || "") : "", status: txt(el.querySelector(sel.status))};
+  })};
+}
+return {mode: "anchors", count: count, items: Array.prototype.map.call(document.querySelectorAll(sel.anchor), function (a) {
+  return {title: txt(a), link: a.href || a.getAttribute("href") || "", block: txt(xfirst(sel.block, a))};
+})};
+"""
+CARDS_JS_ARGS = {"card": CARD_CSS, "title": TITLE_CSS, "price": PRICE_CSS, "link": LINK_CSS, "status": STATUS_CSS,
+                 "lot": LOT_XPATH, "anchor": ANCHOR_CSS, "block": ANCHOR_BLOCK_XPATH, "count": COUNT_CSS}
+
+
+def _listings_from_batch(batch, log):
+    """Risultato di CARDS_JS -> listing (stesso formato di _extract_listings_by_element)."""
+    listings = []
+    if batch.get("mode") == "cards":
+        for it in batch.get("items") or []:
+            if it.get("link"):
+                listings.append({
+                    "title": it.get("title") or "",
+                    "price": it.get("price") or "",
+                    "acres": _parse_acres_from_text(it.get("acres") or ""),
+                    "link": it["link"],
+                    "status": it.get("status") or ""
+                })
+        if listings:
+            return listings
+        # card presenti ma senza link: come prima, si ripiega sugli anchor
+        log("[PARSE] Card senza link, provo fallback su anchor")
+        return None
+    log("[PARSE] Nessuna card standard trovata, provo fallback su anchor")
+    for it in batch.get("items") or []:
+        block = it.get("block") or ""
+        listings.append({
+            "title": it.get("title") or "",
+            "price": _first_price(block),
+            "acres": _parse_acres_from_text(block),
+            "link": it.get("link") or "",
+            "status": ""
+        })
+    return listings
+
+
+def _parse_count(text):
+    """'1,234 Homes' -> 1234 (None se il contatore non c'è)."""
+    m = re.search(r"(\d[\d,]*)", text or "")
+    return int(m.group(1).replace(",", "")) if m else None
+
+
+def _extract_page(driver, log):
+    """
+    (listing, totale_risultati) della pagina corrente. Di norma un solo round trip
+    (CARDS_JS); se lo script fallisce si usa l'estrazione per elemento.
+    """
+    try:
+        batch = driver.execute_script(CARDS_JS, CARDS_JS_ARGS)
+    except Exception as e:
+        log(f"[PARSE][WARN] estrazione JS non riuscita ({e}), uso quella per elemento")
+        batch = None
+    if isinstance(batch, dict):
+        listings = _listings_from_batch(batch, log)
+        if listings is not None:
+            return listings, _parse_count(batch.get("count"))
+    listings = _extract_listings_by_element(driver, log)
+    counts = driver.find_elements("css selector", COUNT_CSS)
+    return listings, (_parse_count(counts[0].text) if counts else None)
+
+
 def _extract_listings(driver, log):
+    return _extract_page(driver, log)[0]
+
+
+def _extract_listings_by_element(driver, log):
     listings = []
 
     # Primo tentativo: card strutturate
-    cards = driver.find_elements("css selector", 
-        "[data-testid='component-property-card'], [data-testid='property-card'], article[data-testid*='card']")
+    cards = driver.find_elements("css selector", CARD_CSS)
     if not cards:
         log("[PARSE] Nessuna card standard trovata, provo fallback su anchor")
     else:
@@ -136,35 +261,33 @@ def _extract_listings(driver, log):
             try:
                 title_el = None
                 # titolo / headline
-                for sel in ["[data-testid='card-title']", "h3", "h2"]:
+                for sel in TITLE_CSS:
                     cand = el.find_elements("css selector", sel)
                     if cand:
                         title_el = cand[0]
                         break
 
                 price_el = None
-                for sel in ["[data-testid='card-price']", "span[data-label='pc-price']",
-                            "span[data-testid*='price']", "span[class*='price']"]:
+                for sel in PRICE_CSS:
                     cand = el.find_elements("css selector", sel)
                     if cand:
                         price_el = cand[0]
                         break
 
                 acres_text = ""
-                # spesso è “Lot size” o “XX acres”
-                lot_els = el.find_elements("xpath", ".//*[contains(translate(text(),'ACRES','acres'),'acres') or contains(translate(text(),'LOT','lot'),'lot')]")
+                lot_els = el.find_elements("xpath", LOT_XPATH)
                 if lot_els:
                     acres_text = lot_els[0].text.strip()
 
                 link_el = None
-                for sel in ["a[data-testid='card-link']", "a[data-testid*='property-card']", "a[href*='/realestateandhomes-detail/']"]:
+                for sel in LINK_CSS:
                     cand = el.find_elements("css selector", sel)
                     if cand:
                         link_el = cand[0]
                         break
 
                 status_text = ""
-                st_els = el.find_elements("css selector", "[data-testid*='status'], span[class*='status'], div[class*='status']")
+                st_els = el.find_elements("css selector", STATUS_CSS)
                 if st_els:
                     status_text = st_els[0].text.strip()
 
@@ -188,7 +311,7 @@ def _extract_listings(driver, log):
 
     # Fallback: anchor generici
     if not listings:
-        anchors = driver.find_elements("css selector", "a[href*='/realestateandhomes-detail/']")
+        anchors = driver.find_elements("css selector", ANCHOR_CSS)
         for a in anchors:
             try:
                 link = a.get_attribute("href") or ""
@@ -197,7 +320,7 @@ def _extract_listings(driver, log):
                 price = ""
                 acres = None
                 # prova a salire di un parent per leggere testo aggregato
-                parent = a.find_element("xpath", "./ancestor::*[position()<=3]")
+                parent = a.find_element("xpath", ANCHOR_BLOCK_XPATH)
                 block = parent.text
                 price = _first_price(block)
                 acres = _parse_acres_from_text(block)
@@ -247,57 +370,185 @@ def _snapshot(driver, tag="realtor"):
     except Exception:
         return None
 
+def _load_page(driver, url, log, timings):
+    """Carica una pagina di ricerca e ritorna (listing, totale_risultati); timings riceve i tempi per fase."""
+    netblock.reset(driver)
+    t = time.time()
+    with metrics.timed("driver_get", "realtor"):
+        driver.get(url)
+    timings["get_s"] = round(time.time() - t, 2)
+
+    # attesa: appena compaiono card/contatore (MutationObserver), non 2s fissi + polling
+    t = time.time()
+    with metrics.timed("wait", "realtor"):
+        res = waits.wait_for_selector(driver, RESULTS_CSS, timeout=RESULTS_TIMEOUT)
+        if res is None:
+            time.sleep(SETTLE_SECONDS)
+            found = _wait_for_results(driver, timeout=RESULTS_TIMEOUT)
+        else:
+            found = res["found"]
+    timings["wait_s"] = round(time.time() - t, 2)
+    saved = 0.0
+    if res is not None:
+        # vecchio percorso: 2s fissi + polling a 0.5s fino al primo controllo dopo la comparsa
+        fixed = waits.polled_baseline(res["ms"] / 1000.0 if found else None,
+                                      RESULTS_TIMEOUT, RESULTS_POLL, settle=SETTLE_SECONDS)
+        saved = waits.record_saved("realtor", "wait", fixed, timings["wait_s"])
+    if not found:
+        log("[WAIT] Nessun indicatore risultati ancora visibile, provo scroll")
+
+    _click_cookie_consent(driver, log)
+    # scroll: si ferma quando le card smettono di aumentare
+    t = time.time()
+    with metrics.timed("scroll", "realtor"):
+        res = waits.adaptive_scroll(driver, CARD_CSS, max_steps=SCROLL_STEPS, settle=SCROLL_PAUSE)
+        if res is None:
+            _progressive_scroll(driver, steps=SCROLL_STEPS, pause=SCROLL_PAUSE)
+    timings["scroll_s"] = round(time.time() - t, 2)
+    if res is not None:
+        timings["scroll_steps"] = res.get("steps")
+        saved += waits.record_saved("realtor", "scroll", SCROLL_STEPS * SCROLL_PAUSE, timings["scroll_s"])
+    timings["saved_s"] = round(saved, 2)
+
+    t = time.time()
+    with metrics.timed("parse", "realtor"):
+        listings, total = _extract_page(driver, log)
+    timings["parse_s"] = round(time.time() - t, 3)
+    timings["transfer"] = netblock.page_transfer(driver, "realtor")
+    return listings, total
+
+
+def _fetch_page(url, bucket, page, log):
+    """
+    Una pagina con un driver preso dal pool (più pagine in parallelo = più driver).
+    Ritorna (listing, info); in caso di errore listing vuoti e info["error"].
+    """
+    info = {"page": page}
+    t0 = time.time()
+    try:
+        with get_pool().lease(profile=BLOCK_PROFILE) as driver:  # UC headless dal pool condiviso
+            try:
+                listings, info["total"] = _load_page(driver, url, log, info)
+                if not listings and page == 1:
+                    snap = _snapshot(driver, tag=f"{bucket}_0results")
+                    log(f"[SNAPSHOT] Zero risultati salvato in: {snap}")
+            except Exception as e:
+                log(f"[REALTOR][ERR] {bucket} pagina {page}: {e}")
+                log(traceback.format_exc())
+                snap = _snapshot(driver, tag="exception")
+                log(f"[SNAPSHOT] Eccezione: snapshot in {snap}")
+                # driver in stato incerto: non rimetterlo nel pool
+                driver.broken = True
+                listings, info["error"] = [], str(e)
+    except Exception as e:
+        # Chrome non avviabile / nessun driver libero
+        log(f"[REALTOR][ERR] driver: {e}")
+        log(traceback.format_exc())
+        listings, info["error"] = [], str(e)
+    info["elapsed_s"] = round(time.time() - t0, 2)
+    return listings, info
+
+
+def _link_key(link: str) -> str:
+    return (link or "").split("?")[0].split("#")[0].rstrip("/").lower()
+
+
+def _crawl_bucket(url, bucket, log, max_pages, concurrency, on_page=None):
+    """
+    Pagine 1..max_pages di una ricerca (/pg-N), deduplicate per link.
+    La pagina 1 dice quante pagine esistono (contatore risultati, altrimenti
+    max_pages); le successive si caricano con al massimo `concurrency` pagine
+    in volo, nell'ordine: appena una pagina non porta card nuove si smette di
+    inviarne e le pagine in coda vengono annullate.
+    on_page(bucket, card_nuove) viene chiamata per ogni pagina (es. export in streaming).
+    """
+    seen = set()
+    listings = []
+    t0 = time.time()
+
+    def add(page, items, info, last):
+        new = []
+        for it in items:
+            key = _link_key(it.get("link"))
+            if key and key not in seen:
+                seen.add(key)
+                new.append(it)
+        listings.extend(new)
+        if on_page is not None and new:
+            on_page(bucket, new)
+        err = f" | ERR {info['error']}" if info.get("error") else ""
+        log(f"[REALTOR][PAGE {page}/{last}] {bucket} get {info.get('get_s', 0):.2f}s | "
+            f"attesa {info.get('wait_s', 0):.2f}s | scroll {info.get('scroll_s', 0):.2f}s | "
+            f"parse {info.get('parse_s', 0):.3f}s | totale {info['elapsed_s']:.2f}s | "
+            f"risparmio {info.get('saved_s', 0):.1f}s | {netblock.describe(info.get('transfer'))} | "
+            f"card {len(items)} (nuove {len(new)}){err}")
+        progress.emit("page", label=bucket, page=page, last_page=last, rows=len(new),
+                      total_rows=len(listings), elapsed=info["elapsed_s"],
+                      bytes=(info.get("transfer") or {}).get("bytes"))
+        return new
+
+    items, info = _fetch_page(url, bucket, 1, log)
+    total = info.get("total")
+    last = min(max_pages, math.ceil(total / PAGE_SIZE)) if total else max_pages
+    pages = 1
+    if not add(1, items, info, last) or info.get("error"):
+        last = 1
+
+    pending = deque()  # (pagina, future) in ordine di pagina
+    page = 2
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="realtor-page") as ex:
+        while True:
+            # finestra di `concurrency` pagine: una nuova appena la più vecchia è letta
+            while page <= last and len(pending) < max(1, concurrency):
+                pending.append((page, ex.submit(progress.wrap(_fetch_page), page_url(url, page), bucket, page, log)))
+                page += 1
+            if not pending:
+                break
+            n, fut = pending.popleft()
+            items, info = fut.result()
+            pages += 1
+            if not add(n, items, info, last):
+                log(f"[REALTOR] {bucket}: pagina {n} senza card nuove, stop paginazione")
+                # le pagine già in corso finiscono e vengono scartate, le altre non partono
+                for _, f in pending:
+                    f.cancel()
+                break
+
+    log(f"[REALTOR] {bucket}: {len(listings)} card uniche in {pages} pagine ({time.time() - t0:.1f}s)")
+    return listings, pages
+
+
 def scrape_realtor(county: str, state_abbr: str,
                    min_acres: float, max_acres: float,
                    include_for_sale: bool = True, include_sold: bool = False,
                    property_type: str = "type-land",
-                   logger=print):
+                   logger=print, max_pages: int = None, concurrency: int = None, on_page=None):
     """
-    Ritorna dict: { 'for_sale': [..], 'sold': [..] } con listing estratti.
+    Ritorna dict: { 'for_sale': [..], 'sold': [..] } con listing estratti
+    (fino a max_pages pagine per bucket, default REALTOR_MAX_PAGES).
+    on_page(bucket, card_nuove) riceve le card di ogni pagina appena lette.
     """
     def log(*args):
         logger(*args)
 
+    max_pages = max(1, int(max_pages or MAX_PAGES))
+    # una lease per pagina: non più pagine in parallelo dei driver che spettano a Realtor
+    concurrency = fanout(concurrency or PAGE_CONCURRENCY)
     urls = build_realtor_urls(state_abbr, county, min_acres, max_acres,
                               include_for_sale, include_sold, property_type)
-    log(f"[REALTOR] URL generate: {urls}")
+    log(f"[REALTOR] URL generate: {urls} (max {max_pages} pagine, {concurrency} in parallelo)")
 
     results = {"for_sale": [], "sold": []}
-    driver = None
-    try:
-        driver = make_driver()  # UC headless
-        for url, bucket in urls:
+    for url, bucket in urls:
+        with progress.stage("bucket", label=bucket) as st:
             log(f"[REALTOR] GET {bucket}: {url}")
-            driver.get(url)
-            time.sleep(2)
-
-            _click_cookie_consent(driver, log)
-            if not _wait_for_results(driver, timeout=18):
-                log("[WAIT] Nessun indicatore risultati ancora visibile, provo scroll")
-            _progressive_scroll(driver, steps=8, pause=0.7)
-
-            listings = _extract_listings(driver, log)
+            listings, pages = _crawl_bucket(url, bucket, log, max_pages, concurrency, on_page)
             log(f"[REALTOR] {bucket}: trovate {len(listings)} card")
+            st.set(rows=len(listings), pages=pages)
+        results[bucket] = listings
+    return results
 
-            if len(listings) == 0:
-                snap = _snapshot(driver, tag=f"{bucket}_0results")
-                log(f"[SNAPSHOT] Zero risultati salvato in: {snap}")
-            results[bucket] = listings
 
-        return results
-    except Exception as e:
-        log(f"[REALTOR][ERR] {e}")
-        log(traceback.format_exc())
-        if driver:
-            snap = _snapshot(driver, tag="exception")
-            log(f"[SNAPSHOT] Eccezione: snapshot in {snap}")
-        return results
-    finally:
-        try:
-            if driver:
-                driver.quit()
-        except:
-            pass
 # ---- ADAPTER per compatibilità con scraper_core/scraper.py ----
 # Mantiene la vecchia firma: run_scrape(...) -> list[dict] / DataFrame-friendly
 
@@ -313,6 +564,24 @@ def _price_to_float(raw):
     except:
         return None
 
+_BUCKET_STATUS = {"for_sale": "for sale", "sold": "sold"}
+
+
+def _listing_row(it: dict, state: str, county: str, status: str) -> dict:
+    price_num = _price_to_float(it.get("price"))
+    acres = it.get("acres")
+    ppa = (price_num / acres) if (price_num is not None and acres not in (None, 0, 0.0)) else None
+    return {
+        "State": state,
+        "County": county,
+        "Status": status,
+        "Price": price_num,          # numerico per i tuoi calcoli
+        "Acres": acres,
+        "Price_per_Acre": ppa,
+        "Link": it.get("link", "")
+    }
+
+
 def run_scrape(
     *,
     state: str,
@@ -324,38 +593,56 @@ def run_scrape(
     headless: bool = True,
     period: str | None = None,
     logger=print,
+    bypass_cache: bool = False,
     **kwargs
 ):
     """
     Adapter per lo scraper orchestrator.
     Ritorna una lista di record (ForSale+Sold) con colonne compatibili:
     State, County, Status, Price, Acres, Price_per_Acre, Link
+    I bucket già in cache (URL normalizzato) non vengono riscaricati,
+    salvo bypass_cache=True.
     """
-    res = scrape_realtor(
-        county=county,
-        state_abbr=state,
-        min_acres=acres_min,
-        max_acres=acres_max,
-        include_for_sale=include_forsale,
-        include_sold=include_sold,
-        logger=logger
-    )
+    cache = get_cache()
+    res = {"for_sale": [], "sold": []}
+    keys = {}
+    missing = set()
+    for url, bucket in build_realtor_urls(state, county, acres_min, acres_max, include_forsale, include_sold):
+        keys[bucket] = normalize_key(url, extra=f"pages={MAX_PAGES}")
+        cached = cache.get(keys[bucket]) if (cache is not None and not bypass_cache) else None
+        if cached is not None:
+            logger(f"[CACHE] hit Realtor {bucket}: {len(cached)} card")
+            progress.emit("bucket", "done", label=bucket, rows=len(cached), cached=True)
+            exporters.stream_rows([_listing_row(it, state, county, _BUCKET_STATUS[bucket]) for it in cached])
+            res[bucket] = cached
+        else:
+            missing.add(bucket)
+
+    def on_page(bucket, items):
+        # card nuove di ogni pagina subito negli export CSV/JSONL/Parquet in corso
+        exporters.stream_rows([_listing_row(it, state, county, _BUCKET_STATUS[bucket]) for it in items])
+
+    if missing:
+        fresh = scrape_realtor(
+            county=county,
+            state_abbr=state,
+            min_acres=acres_min,
+            max_acres=acres_max,
+            include_for_sale="for_sale" in missing,
+            include_sold="sold" in missing,
+            logger=logger,
+            on_page=on_page,
+        ) or {}
+        for bucket in missing:
+            items = fresh.get(bucket) or []
+            res[bucket] = items
+            # zero risultati può essere un blocco temporaneo: non lo mettiamo in cache
+            if cache is not None and items:
+                cache.put(keys[bucket], items)
 
     rows = []
     for bucket, items in (res or {}).items():
-        status = "for sale" if bucket == "for_sale" else "sold"
-        for it in items or []:
-            price_num = _price_to_float(it.get("price"))
-            acres = it.get("acres")
-            ppa = (price_num / acres) if (price_num is not None and acres not in (None, 0, 0.0)) else None
-            rows.append({
-                "State": state,
-                "County": county,
-                "Status": status,
-                "Price": price_num,          # numerico per i tuoi calcoli
-                "Acres": acres,
-                "Price_per_Acre": ppa,
-                "Link": it.get("link", "")
-            })
+        status = _BUCKET_STATUS.get(bucket, "sold")
+        rows.extend(_listing_row(it, state, county, status) for it in items or [])
     return rows
 
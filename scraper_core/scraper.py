@@ -9,19 +9,16 @@ Versione antecedente FIXATA:
 """
 
 import os
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Tuple, Optional
 import pandas as pd
 
-try:
-    from . import realtor_scrape
-except Exception:
-    realtor_scrape = None
-
-try:
-    from . import zillow_scrape
-except Exception:
-    zillow_scrape = None
+from .sources import REGISTRY, SourceSpec
+from .exporters import StreamExport, available_formats, streaming
+from . import progress, metrics
+from .driver_factory import driver_budget, fanout, with_budget
 
 
 # -----------------------------------------------------
@@ -115,10 +112,101 @@ def drop_unwanted(df: pd.DataFrame) -> pd.DataFrame:
 # Excel save function (formattazione + ordine colonne)
 # -----------------------------------------------------
 
+# Formati numerici per colonna (applicati come named style, senza ripassare le celle)
+NUMBER_FORMATS = {
+    "Price": '"$"#,##0',
+    "Acres": '#,##0.00',
+    "Price_per_Acre": '"$"#,##0.00',
+}
+HEADER_ROW = 6  # header alla riga 6, dati dalla 7 (righe 1-3 = riepilogo)
+WRITE_CHUNK_ROWS = 2000
+
+
+def _column_widths(df: pd.DataFrame) -> List[float]:
+    """Larghezza per colonna (cap 60) calcolata in modo vettoriale sul DataFrame."""
+    widths = []
+    for col in df.columns:
+        s = df[col]
+        lens = s.astype(str).str.len().where(s.notna(), 0)
+        maxlen = max(len(str(col)), int(lens.max()) if len(lens) else 0)
+        widths.append(min(maxlen + 4, 60))
+    return widths
+
+
+def _register_styles(wb):
+    from openpyxl.styles import Alignment, Font, NamedStyle
+
+    styles = {
+        "header": NamedStyle(name="scr_header", font=Font(bold=True),
+                             alignment=Alignment(wrap_text=True, vertical="center")),
+        "label": NamedStyle(name="scr_label", font=Font(bold=True)),
+    }
+    for col, pattern in NUMBER_FORMATS.items():
+        styles[col] = NamedStyle(name=f"scr_{col.lower()}", number_format=pattern)
+    for st in styles.values():
+        wb.add_named_style(st)
+    # le celle usano il nome dello stile
+    names = {key: st.name for key, st in styles.items()}
+    names["Link"] = "Hyperlink"  # stile built-in
+    return names
+
+
+def _write_sheet(wb, name: str, df: Optional[pd.DataFrame], styles: dict):
+    """Scrive un foglio in streaming: riepilogo, header e righe in un solo passaggio."""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    ws = wb.create_sheet(name)
+    if df is None or df.empty:
+        ws.append(["Nessun risultato"])
+        return
+
+    def cell(value, style):
+        # stile per nome (NamedStyle registrato in _register_styles): API pubblica di openpyxl
+        c = WriteOnlyCell(ws, value=value)
+        c.style = style
+        return c
+
+    # larghezze, freeze e filtro vanno impostati prima della prima riga
+    for j, width in enumerate(_column_widths(df), start=1):
+        ws.column_dimensions[get_column_letter(j)].width = width
+    last_row = HEADER_ROW + len(df)
+    ws.freeze_panes = f"A{HEADER_ROW + 1}"
+    ws.auto_filter.ref = f"A{HEADER_ROW}:{get_column_letter(len(df.columns))}{last_row}"
+
+    # Summary in alto
+    avg_price, avg_ppa, med_ppa = _summary_vals(df)
+    ws.append([cell("Media Prezzo", styles["label"]), cell(avg_price, styles["Price"])])
+    ws.append([cell("Media Prezzo/Acro", styles["label"]), cell(avg_ppa, styles["Price_per_Acre"])])
+    ws.append([cell("Mediana Prezzo/Acro", styles["label"]), cell(med_ppa, styles["Price_per_Acre"])])
+    for _ in range(4, HEADER_ROW):
+        ws.append([])
+
+    ws.append([cell(str(col), styles["header"]) for col in df.columns])
+
+    # stile per posizione di colonna (None = cella semplice)
+    col_styles = [styles.get(col) if col in NUMBER_FORMATS else None for col in df.columns]
+    link_idx = df.columns.get_loc("Link") if "Link" in df.columns else None
+    # conversione NaN -> None a blocchi, per non duplicare tutto il DataFrame in memoria
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + WRITE_CHUNK_ROWS]
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            out = list(row)
+            for j, style in enumerate(col_styles):
+                if style is not None:
+                    out[j] = cell(out[j], style)
+            if link_idx is not None:
+                val = str(out[link_idx] or "").strip()
+                if val.startswith("http"):
+                    c = cell(out[link_idx], styles["Link"])
+                    c.hyperlink = val
+                    out[link_idx] = c
+            ws.append(out)
+
+
 def _save_excel(df_all: pd.DataFrame, outpath: str, source: str):
     from openpyxl import Workbook
-    from openpyxl.utils import get_column_letter
-    from openpyxl.styles import Alignment, Font
 
     # Split per ForSale/Sold
     df_forsale = df_all[df_all["Status"].str.contains("for sale", case=False, na=False)]
@@ -130,72 +218,14 @@ def _save_excel(df_all: pd.DataFrame, outpath: str, source: str):
     if df_sold is not None and not df_sold.empty:
         df_sold = reorder_columns(drop_unwanted(df_sold))
 
-    def fmt_sheet(ws, df, avg_price, avg_ppa, med_ppa):
-        start_row = 6  # header alla riga 6, dati dalla 7
-        for c in ws[start_row]:
-            c.font = Font(bold=True)
-            c.alignment = Alignment(wrap_text=True, vertical="center")
-
-        ws.freeze_panes = f"A{start_row+1}"
-        ws.auto_filter.ref = f"A{start_row}:{get_column_letter(ws.max_column)}{ws.max_row}"
-
-        # Mappa colonna
-        colmap = {col: (df.columns.get_loc(col) + 1) for col in df.columns}
-
-        def fmt(col, pattern):
-            if col in colmap:
-                for r in range(start_row+1, ws.max_row+1):
-                    ws.cell(row=r, column=colmap[col]).number_format = pattern
-
-        # Formati tipici
-        fmt("Price", '"$"#,##0')
-        fmt("Acres", '#,##0.00')
-        fmt("Price_per_Acre", '"$"#,##0.00')
-
-        # Hyperlink su Link
-        if "Link" in colmap:
-            c = colmap["Link"]
-            for r in range(start_row+1, ws.max_row+1):
-                cell = ws.cell(row=r, column=c)
-                val = str(cell.value or "").strip()
-                if val.startswith("http"):
-                    cell.hyperlink = val
-                    cell.style = "Hyperlink"
-
-        # Auto-fit colonne (cap 60)
-        def txtlen(v): return len(str(v)) if v is not None else 0
-        for j, col in enumerate(df.columns, start=1):
-            maxlen = max(
-                txtlen(col),
-                max((txtlen(ws.cell(row=r, column=j).value)
-                     for r in range(start_row+1, ws.max_row+1)), default=0)
-            )
-            ws.column_dimensions[get_column_letter(j)].width = min(maxlen + 4, 60)
-
-        # Summary in alto
-        ws.cell(row=1, column=1, value="Media Prezzo").font = Font(bold=True)
-        ws.cell(row=1, column=2, value=avg_price).number_format = '"$"#,##0'
-        ws.cell(row=2, column=1, value="Media Prezzo/Acro").font = Font(bold=True)
-        ws.cell(row=2, column=2, value=avg_ppa).number_format = '"$"#,##0.00'
-        ws.cell(row=3, column=1, value="Mediana Prezzo/Acro").font = Font(bold=True)
-        ws.cell(row=3, column=2, value=med_ppa).number_format = '"$"#,##0.00'
-
-    # Crea workbook e scrive i due fogli
+    # Workbook write-only: le righe vengono scritte su disco man mano (memoria costante)
     if os.path.exists(outpath):
         os.remove(outpath)
-    wb = Workbook()
-    wb.remove(wb.active)
-
-    with pd.ExcelWriter(outpath, engine="openpyxl") as writer:
-        for name, df in [("ForSale", df_forsale), ("Sold", df_sold)]:
-            if df is None or df.empty:
-                pd.DataFrame(["Nessun risultato"]).to_excel(writer, sheet_name=name, index=False, header=False)
-                continue
-
-            avg_price, avg_ppa, med_ppa = _summary_vals(df)
-            df.to_excel(writer, sheet_name=name, index=False, startrow=5)
-            ws = writer.sheets[name]
-            fmt_sheet(ws, df, avg_price, avg_ppa, med_ppa)
+    wb = Workbook(write_only=True)
+    styles = _register_styles(wb)
+    for name, df in [("ForSale", df_forsale), ("Sold", df_sold)]:
+        _write_sheet(wb, name, df, styles)
+    wb.save(outpath)
 
     print(f"[OK] File Excel creato per {source}: {outpath}")
 
@@ -204,6 +234,78 @@ def _save_excel(df_all: pd.DataFrame, outpath: str, source: str):
 # Funzione principale orchestratore
 # -----------------------------------------------------
 
+# Quante fonti (Realtor/Zillow) far girare in parallelo
+SOURCE_CONCURRENCY = int(os.environ.get("SCRAPER_SOURCE_CONCURRENCY", "2") or 2)
+
+
+def _run_source(spec: SourceSpec, kwargs: dict, results_dir: str, tag: str,
+                formats: Tuple[str, ...] = ("xlsx",)) -> Tuple[List[str], List[str]]:
+    with progress.scope(source=spec.label):
+        return _run_source_inner(spec, kwargs, results_dir, tag, formats)
+
+
+def _run_source_inner(spec, kwargs, results_dir, tag, formats):
+    messages: List[str] = []
+    produced_paths: List[str] = []
+    base = os.path.join(results_dir, f"{spec.prefix}_{tag}")
+    # CSV/JSONL/Parquet scritti durante lo scraping: lo scraper passa ogni pagina a stream_rows()
+    flat = [f for f in formats if f != "xlsx"]
+    sink = StreamExport(base, flat, prepare=lambda d: reorder_columns(drop_unwanted(_normalize(d, spec.label)))) \
+        if flat else None
+    try:
+        # import lazy: il modulo viene caricato (o ricaricato se cambiato) solo qui
+        fn = REGISTRY.entry_point(spec.name)
+        with progress.stage("scrape") as st, (streaming(sink) if sink else nullcontext()):
+            out = fn(**kwargs)
+            with metrics.timed("dataframe", spec.name):
+                df = _to_df(out)
+            out = None
+            st.set(rows=0 if df is None else len(df))
+        metrics.ROWS.inc(0 if df is None else len(df), source=spec.name)
+
+        if df is None and spec.empty_file:
+            # Nessun dato proprio: errore logico lato scraper
+            messages.append(f"[ERR] {spec.label} ha restituito None (nessun DataFrame).")
+        elif df is not None and (not df.empty or spec.empty_file):
+            with metrics.timed("dataframe", spec.name):
+                df = _normalize(df, spec.label)
+            with progress.stage("save", rows=len(df), formats=list(formats)) as st:
+                # Excel per primo: è il file linkato nella pagina
+                if "xlsx" in formats:
+                    with metrics.timed("excel", spec.name):
+                        _save_excel(df, base + ".xlsx", spec.label)
+                    produced_paths.append(base + ".xlsx")
+                if sink is not None:
+                    # righe già scritte pagina per pagina: qui si chiudono i file (il DataFrame
+                    # serve solo se la fonte non ha fatto streaming)
+                    with metrics.timed("export", spec.name):
+                        paths, msgs = sink.close(fallback=df)
+                    sink = None
+                    produced_paths.extend(paths)
+                    messages.extend(msgs)
+                st.set(files=len(produced_paths))
+            if df.empty:
+                messages.append(f"[WARN] Nessun risultato {spec.label} (file vuoto creato).")
+            else:
+                messages.append(f"[OK] File {spec.label} creato.")
+        else:
+            messages.append(f"[WARN] Nessun risultato {spec.label}.")
+    except Exception as e:
+        messages.append(f"[ERR] {spec.label}: {e}")
+    finally:
+        if sink is not None:
+            sink.abort()  # nessun file da consegnare: via i .part
+    return produced_paths, messages
+
+
+def _formats(formats) -> Tuple[str, ...]:
+    """Formati di output richiesti (xlsx + EXPORT_FORMATS), default solo Excel."""
+    known = ("xlsx",) + tuple(available_formats())
+    wanted = [f.strip().lower().lstrip(".") for f in (formats or []) if f]
+    out = tuple(f for f in known if f in wanted)
+    return out or ("xlsx",)
+
+
 def run_scraping(
     *,
     state: str,
@@ -215,10 +317,15 @@ def run_scraping(
     use_sources: List[str],
     headless: bool = True,
     period: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    bypass_cache: bool = False,
+    formats: Optional[List[str]] = None,
 ) -> Tuple[List[str], List[str]]:
     """
-    Esegue Realtor e/o Zillow e crea file separati.
-    Ritorna: (lista_file_creati, messages)
+    Esegue le fonti richieste dal registro (in parallelo, max_concurrency fonti
+    alla volta) e crea un file per fonte e per formato (formats: xlsx, csv, jsonl,
+    parquet; default solo xlsx). bypass_cache=True ignora la cache pagine.
+    Ritorna: (lista_file_creati, messages) nell'ordine del registro (Realtor, Zillow).
     """
     messages: List[str] = []
     produced_paths: List[str] = []
@@ -237,56 +344,31 @@ def run_scraping(
         include_sold=include_sold,
         headless=headless,
         period=period,
+        bypass_cache=bypass_cache,
     )
 
-    # Realtor
-    if "realtor" in [s.lower() for s in (use_sources or [])] and realtor_scrape is not None:
-        try:
-            fn_r = getattr(realtor_scrape, "run_scrape", None) or getattr(realtor_scrape, "run", None)
-            if not callable(fn_r):
-                raise AttributeError("realtor_scrape non espone run_scrape/run.")
-
-            df_r = _to_df(fn_r(**kwargs))
-
-            if df_r is None:
-                # Nessun dato proprio: errore logico lato scraper
-                messages.append("[ERR] Realtor ha restituito None (nessun DataFrame).")
-            else:
-                # Normalizzo sempre e CREO SEMPRE un file, anche se vuoto
-                df_r = _normalize(df_r, "Realtor")
-                outpath_r = os.path.join(results_dir, f"realtor_risultati_estrazione_{tag}.xlsx")
-                _save_excel(df_r, outpath_r, "Realtor")
-                produced_paths.append(outpath_r)
-
-                if df_r.empty:
-                    messages.append("[WARN] Nessun risultato Realtor (file vuoto creato).")
-                else:
-                    messages.append("[OK] File Realtor creato.")
-        except Exception as e:
-            messages.append(f"[ERR] Realtor: {e}")
-
-
-    # Zillow
-    if "zillow" in [s.lower() for s in (use_sources or [])] and zillow_scrape is not None:
-        try:
-            fn_z = getattr(zillow_scrape, "run_scrape", None) or getattr(zillow_scrape, "run", None)
-            if not callable(fn_z):
-                raise AttributeError("zillow_scrape non espone run_scrape/run.")
-            df_z = _to_df(fn_z(**kwargs))
-            if df_z is not None and not df_z.empty:
-                df_z = _normalize(df_z, "Zillow")
-                outpath_z = os.path.join(results_dir, f"zillow_risultati_estrazione_{tag}.xlsx")
-                _save_excel(df_z, outpath_z, "Zillow")
-                produced_paths.append(outpath_z)
-                messages.append("[OK] File Zillow creato.")
-            else:
-                messages.append("[WARN] Nessun risultato Zillow.")
-        except Exception as e:
-            messages.append(f"[ERR] Zillow: {e}")
+    formats = _formats(formats)
+    wanted = {s.strip().lower() for s in (use_sources or [])}
+    # ordine del registro (Realtor, Zillow, ...), non quello della richiesta
+    tasks = [spec for spec in REGISTRY.specs() if spec.name in wanted]
+    for name in sorted(wanted - {spec.name for spec in tasks}):
+        messages.append(f"[WARN] Fonte sconosciuta: {name}")
+
+    # fonti in parallelo solo fin dove ci sono driver: ognuna riceve la sua quota del budget
+    workers = fanout(max_concurrency or SOURCE_CONCURRENCY, len(tasks))
+    if len(tasks) <= 1 or workers == 1:
+        outcomes = [_run_source(spec, kwargs, results_dir, tag, formats) for spec in tasks]
+    else:
+        run_source = with_budget(max(1, driver_budget() // workers), _run_source)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="source") as ex:
+            futures = [ex.submit(progress.wrap(run_source), spec, kwargs, results_dir, tag, formats) for spec in tasks]
+            # ordine di raccolta = ordine dei task, non di completamento
+            outcomes = [f.result() for f in futures]
+
+    for paths, msgs in outcomes:
+        produced_paths.extend(paths)
+        messages.extend(msgs)
 
     if not produced_paths:
         messages.append("[WARN] Nessun file generato.")
     return produced_paths, messages
-
-
-
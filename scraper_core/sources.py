@@ -0,0 +1,145 @@
+# scraper_core/sources.py
+"""
+Registro delle fonti di scraping (Realtor, Zillow, ...).
+
+- Ogni fonte è descritta da un SourceSpec: modulo, entry-point e capacità
+  (modi ForSale/Sold, periodi, se serve Chrome)
+- Il modulo viene importato solo al primo uso e ricaricato soltanto se
+  il suo file .py è cambiato su disco (mtime), non a ogni richiesta
+- Per aggiungere una fonte basta register_source(SourceSpec(...)):
+  l'orchestratore (scraper.run_scraping) itera sul registro
+"""
+
+import os
+import sys
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+PERIODS = ("30gg", "90gg", "6M", "12M")
+MODES = ("For Sale", "Sold")
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    name: str                      # chiave usata in use_sources / form (use_<name>)
+    label: str                     # nome leggibile (messaggi, colonna Source)
+    module: str                    # modulo importato in modo lazy
+    entry_points: Tuple[str, ...] = ("run_scrape", "run")
+    modes: Tuple[str, ...] = MODES
+    periods: Tuple[str, ...] = PERIODS
+    needs_browser: bool = True
+    file_prefix: str = ""          # default: "<name>_risultati_estrazione"
+    empty_file: bool = False       # crea il file Excel anche senza risultati
+
+    @property
+    def prefix(self) -> str:
+        return self.file_prefix or f"{self.name}_risultati_estrazione"
+
+    def capabilities(self) -> dict:
+        return {
+            "name": self.name,
+            "label": self.label,
+            "modes": list(self.modes),
+            "periods": list(self.periods),
+            "needs_browser": self.needs_browser,
+        }
+
+
+# ------------------------------
+# Import lazy + reload su mtime
+# ------------------------------
+_MTIMES: Dict[str, float] = {}
+_IMPORT_LOCK = threading.RLock()
+
+
+def _file_mtime(mod) -> Optional[float]:
+    path = getattr(mod, "__file__", None)
+    try:
+        return os.stat(path).st_mtime if path else None
+    except OSError:
+        return None
+
+
+def load_module(dotted: str):
+    """
+    Importa il modulo al primo uso; se è già caricato lo ricarica solo
+    quando il file sorgente ha un mtime diverso da quello visto l'ultima volta.
+    """
+    with _IMPORT_LOCK:
+        mod = sys.modules.get(dotted)
+        if mod is None:
+            mod = importlib.import_module(dotted)
+            _MTIMES[dotted] = _file_mtime(mod)
+            return mod
+        mtime = _file_mtime(mod)
+        seen = _MTIMES.setdefault(dotted, mtime)
+        if mtime is not None and mtime != seen:
+            print(f"[SOURCES] {dotted} modificato su disco: reload", flush=True)
+            mod = importlib.reload(mod)
+            _MTIMES[dotted] = mtime
+        return mod
+
+
+# ------------------------------
+# Registro
+# ------------------------------
+class SourceRegistry:
+    def __init__(self):
+        self._specs: Dict[str, SourceSpec] = {}
+        self._lock = threading.Lock()
+
+    def register(self, spec: SourceSpec) -> SourceSpec:
+        with self._lock:
+            self._specs[spec.name.lower()] = spec
+        return spec
+
+    def get(self, name: str) -> Optional[SourceSpec]:
+        with self._lock:
+            return self._specs.get((name or "").strip().lower())
+
+    def names(self) -> List[str]:
+        """Nomi in ordine di registrazione (= ordine dei file prodotti)."""
+        with self._lock:
+            return list(self._specs)
+
+    def specs(self) -> List[SourceSpec]:
+        with self._lock:
+            return list(self._specs.values())
+
+    def entry_point(self, name: str) -> Callable:
+        """Funzione di scraping della fonte (import lazy, reload solo se cambiata)."""
+        spec = self.get(name)
+        if spec is None:
+            raise KeyError(f"fonte sconosciuta: {name}")
+        mod = load_module(spec.module)
+        for attr in spec.entry_points:
+            fn = getattr(mod, attr, None)
+            if callable(fn):
+                return fn
+        raise AttributeError(f"{spec.module} non espone {'/'.join(spec.entry_points)}.")
+
+    def capabilities(self) -> List[dict]:
+        return [s.capabilities() for s in self.specs()]
+
+
+REGISTRY = SourceRegistry()
+
+
+def register_source(spec: SourceSpec) -> SourceSpec:
+    return REGISTRY.register(spec)
+
+
+register_source(SourceSpec(
+    name="realtor",
+    label="Realtor",
+    module="scraper_core.realtor_scrape",
+    periods=(),            # Realtor non filtra per periodo
+    empty_file=True,
+))
+register_source(SourceSpec(
+    name="zillow",
+    label="Zillow",
+    module="scraper_core.zillow_scrape",
+))
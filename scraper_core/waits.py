@@ -0,0 +1,147 @@
+# scraper_core/waits.py
+"""
+Attese guidate da eventi nella pagina invece di sleep fissi.
+
+- wait_for_selector: MutationObserver, ritorna appena il selettore compare
+- wait_for_idle: DOM fermo (nessuna mutazione) e nessuna nuova risorsa di rete
+  per `idle` secondi ("network idle" letto da performance.getEntriesByType)
+- adaptive_scroll: scorre finché il numero di card cresce, si ferma appena smette
+Ogni funzione è un solo execute_async_script. Ritorna None se lo script non
+è eseguibile (driver senza JS asincrono, ADAPTIVE_WAITS=0): il chiamante usa
+allora le vecchie attese fisse.
+record_saved() somma il tempo risparmiato rispetto alle attese fisse
+(metrica scraper_wait_saved_seconds_total); polled_baseline() ricostruisce
+quanto avrebbe atteso il vecchio percorso (sleep fisso + polling) di ogni chiamante.
+"""
+
+import os
+import math
+
+from . import metrics
+
+ADAPTIVE_WAITS = os.environ.get("ADAPTIVE_WAITS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+WAIT_SAVED = metrics.REGISTRY.counter(
+    "scraper_wait_saved_seconds_total",
+    "Secondi risparmiati dalle attese adattive rispetto agli sleep fissi",
+    ("source", "stage"),
+)
+
+# arguments: css, timeout_ms, callback
+_WAIT_SELECTOR_JS = """
+var css = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+var t0 = performance.now(), finished = false, obs = null, timer = null;
+function finish(found) {
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  clearTimeout(timer);
+  done({found: found, ms: Math.round(performance.now() - t0)});
+}
+if (document.querySelector(css)) { finish(true); return; }
+obs = new MutationObserver(function () { if (document.querySelector(css)) finish(true); });
+obs.observe(document.documentElement, {childList: true, subtree: true});
+timer = setTimeout(function () { finish(!!document.querySelector(css)); }, timeout);
+"""
+
+# arguments: idle_ms, timeout_ms, callback
+_WAIT_IDLE_JS = """
+var idle = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+var t0 = performance.now(), last = t0, res = performance.getEntriesByType("resource").length;
+var obs = new MutationObserver(function () { last = performance.now(); });
+obs.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+var iv = setInterval(function () {
+  var now = performance.now(), r = performance.getEntriesByType("resource").length;
+  if (r !== res) { res = r; last = now; }
+  if (now - last >= idle || now - t0 >= timeout) {
+    clearInterval(iv);
+    obs.disconnect();
+    done({idle: now - last >= idle, ms: Math.round(now - t0)});
+  }
+}, 50);
+"""
+
+# arguments: card_css, max_steps, settle_ms, callback
+# Passo = scrollBy(0.6 * scrollHeight) come il vecchio scroll a scatti; dopo ogni passo
+# si attendono nuove card fino a settle_ms. Stop: card non cresciute e fondo pagina,
+# oppure due passi di fila senza card nuove.
+_SCROLL_JS = """
+var css = arguments[0], maxSteps = arguments[1], settle = arguments[2], done = arguments[arguments.length - 1];
+var t0 = performance.now(), steps = 0, stale = 0;
+function count() { return document.querySelectorAll(css).length; }
+function atBottom() { return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2; }
+function finish() { done({steps: steps, cards: count(), ms: Math.round(performance.now() - t0)}); }
+function step() {
+  if (steps >= maxSteps) { finish(); return; }
+  var n0 = count(), settled = false, obs = null, timer = null;
+  window.scrollBy(0, document.body.scrollHeight * 0.6);
+  steps++;
+  function next() {
+    if (settled) return;
+    settled = true;
+    obs.disconnect();
+    clearTimeout(timer);
+    if (count() > n0) { stale = 0; step(); return; }
+    stale++;
+    if (atBottom() || stale >= 2) { finish(); return; }
+    step();
+  }
+  obs = new MutationObserver(function () { if (count() > n0) next(); });
+  obs.observe(document.documentElement, {childList: true, subtree: true});
+  timer = setTimeout(next, settle);
+}
+step();
+"""
+
+
+_warned = False
+
+
+def _run(driver, script, *args):
+    global _warned
+    if not ADAPTIVE_WAITS:
+        return None
+    try:
+        out = driver.execute_async_script(script, *args)
+    except Exception as e:
+        if not _warned:
+            _warned = True
+            print(f"[WAIT][WARN] attesa adattiva non disponibile ({type(e).__name__}: {e}): "
+                  f"uso le attese fisse", flush=True)
+        return None
+    return out if isinstance(out, dict) else None
+
+
+def wait_for_selector(driver, css: str, timeout: float = 15.0):
+    """{"found": bool, "ms": int} appena css compare (o a timeout); None se non supportato."""
+    return _run(driver, _WAIT_SELECTOR_JS, css, int(timeout * 1000))
+
+
+def wait_for_idle(driver, idle: float = 0.5, timeout: float = 3.0):
+    """{"idle": bool, "ms": int} quando DOM e rete sono fermi da `idle` secondi; None se non supportato."""
+    return _run(driver, _WAIT_IDLE_JS, int(idle * 1000), int(timeout * 1000))
+
+
+def adaptive_scroll(driver, card_css: str, max_steps: int = 8, settle: float = 0.7):
+    """{"steps", "cards", "ms"} dopo lo scroll; None se non supportato."""
+    return _run(driver, _SCROLL_JS, card_css, int(max_steps), int(settle * 1000))
+
+
+def polled_baseline(ready_s, timeout: float, poll: float, settle: float = 0.0) -> float:
+    """
+    Secondi del vecchio percorso fisso: sleep(settle), poi un controllo ogni `poll`
+    secondi fino a timeout. ready_s = quando la condizione è diventata vera
+    (None = mai: il vecchio percorso arrivava fino al timeout).
+    """
+    if ready_s is None:
+        return settle + timeout
+    late = max(0.0, ready_s - settle)
+    return settle + min(math.ceil(round(late / poll, 6)) * poll, timeout)
+
+
+def record_saved(source: str, stage: str, fixed_s: float, actual_s: float) -> float:
+    """Registra quanto si è risparmiato rispetto all'attesa fissa fixed_s; ritorna i secondi."""
+    saved = max(0.0, fixed_s - actual_s)
+    if saved:
+        WAIT_SAVED.inc(saved, source=source, stage=stage)
+    return saved
@@ -3,10 +3,11 @@ import sys, os, json, re, traceback, glob
 from urllib.parse import quote
 from datetime import datetime
 import pandas as pd
-from openpyxl import load_workbook, Workbook
+from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 
-LOG_FILE = "runner_debug.log"
+# Log del runner (ZILLOW_RUNNER_LOG per spostarlo, es. test e benchmark in una cartella temporanea)
+LOG_FILE = os.environ.get("ZILLOW_RUNNER_LOG") or "runner_debug.log"
 OUT_BASE = "risultati_zillow_media.xlsx"
 SQFT_PER_ACRE = 43560.0
 
@@ -57,7 +58,7 @@ def _lot_bounds(min_lot, max_lot):
             return None
     return to_int(min_lot), to_int(max_lot)
 
-def build_url(contea, stato, region_id, north, south, east, west, period, min_lot, max_lot, tipo_vendita="land"):
+def build_url(contea, stato, region_id, north, south, east, west, period, min_lot, max_lot, tipo_vendita="land", page=None):
     min_lot_i, max_lot_i = _lot_bounds(min_lot, max_lot)
     if min_lot_i is not None: min_lot_i = int(min_lot_i * SQFT_PER_ACRE)
     if max_lot_i is not None: max_lot_i = int(max_lot_i * SQFT_PER_ACRE)
@@ -81,8 +82,9 @@ def build_url(contea, stato, region_id, north, south, east, west, period, min_lo
             "fore": {"value": False},
         })
 
+    page_i = int(page) if str(page or "").strip().isdigit() else 1
     query = {
-        "pagination": {}, "isMapVisible": True,
+        "pagination": {"currentPage": page_i} if page_i > 1 else {}, "isMapVisible": True,
         "mapBounds": {"west": float(west), "east": float(east), "south": float(south), "north": float(north)} if all([west,east,south,north]) else None,
         "regionSelection": [{"regionId": int(region_id), "regionType": 4}] if str(region_id).strip().isdigit() else [],
         "filterState": filter_state, "isListVisible": True, "usersSearchTerm": f"{contea} County {stato}"
@@ -90,7 +92,27 @@ def build_url(contea, stato, region_id, north, south, east, west, period, min_lo
     query = {k:v for k,v in query.items() if v is not None}
     qs = quote(json.dumps(query, separators=(",",":")))
     tipo_segment = "sold" if str(tipo_vendita).lower() == "sold" else "land"
-    return f"https://www.zillow.com/{str(contea).lower().replace(' ','-')}-county-{str(stato).lower()}/{tipo_segment}/?searchQueryState={qs}"
+    page_segment = f"{page_i}_p/" if page_i > 1 else ""
+    return f"https://www.zillow.com/{str(contea).lower().replace(' ','-')}-county-{str(stato).lower()}/{tipo_segment}/{page_segment}?searchQueryState={qs}"
+
+def _lookup_county(stato, contea):
+    try:
+        from data_loader import lookup_county
+        return lookup_county(stato, contea)
+    except Exception as e:
+        log("[WARN] indice contee non disponibile:", e)
+        return None
+
+def _max_pages(value, default=None) -> int:
+    """Budget pagine: valore esplicito, altrimenti ZILLOW_MAX_PAGES (default 1)."""
+    for v in (value, default, os.environ.get("ZILLOW_MAX_PAGES")):
+        try:
+            n = int(v)
+            if n > 0:
+                return n
+        except (TypeError, ValueError):
+            continue
+    return 1
 
 def _to_float(x):
     try:
@@ -141,18 +163,19 @@ def df_from_rows(rows):
         })
     return pd.DataFrame(data, columns=["Price","Price_num","Acres","Acres_num","Price_per_Acre","Location","Link"])
 
-def _auto_fit(ws):
+def _fit_widths(ws, widths):
+    """Applica le larghezze raccolte durante la scrittura (nessuna scansione del foglio)."""
     from openpyxl.utils import get_column_letter
-    for col_idx in range(1, ws.max_column+1):
-        max_len = 0
-        for row in ws.iter_rows(min_col=col_idx, max_col=col_idx, min_row=1, max_row=ws.max_row):
-            for cell in row:
-                val = cell.value
-                l = len(str(val)) if val is not None else 0
-                if l > max_len: max_len = l
+    for col_idx, max_len in widths.items():
         ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len+2, 80)
 
-def append_sheet_with_avg(book_path, sheet_name, df, stato, contea):
+def new_workbook():
+    """Workbook in memoria per l'intero run: i fogli si aggiungono qui e si salva una volta sola."""
+    wb = Workbook()
+    wb.remove(wb.active)
+    return wb
+
+def append_sheet_with_avg(wb, sheet_name, df, stato, contea):
     from openpyxl.styles import numbers, Border, Side
     # stats
     avg_price = float(df["Price_num"].dropna().mean()) if "Price_num" in df.columns and not df.empty else None
@@ -163,30 +186,33 @@ def append_sheet_with_avg(book_path, sheet_name, df, stato, contea):
     n_acres   = int(df["Acres_num"].notna().sum()) if "Acres_num" in df.columns else 0
     pct_acres = (n_acres / n_total) if n_total > 0 else None
 
-    out_df = df.copy()
-    for col in ["Price_num","Acres_num"]:
-        if col in out_df.columns: out_df = out_df.drop(columns=[col])
+    out_df = df.drop(columns=["Price_num","Acres_num"], errors="ignore")
 
-    if os.path.exists(book_path):
-        wb = load_workbook(book_path)
-    else:
-        wb = Workbook()
-        if "Sheet" in wb.sheetnames and len(wb.sheetnames)==1: wb.remove(wb["Sheet"])
     ws = wb.create_sheet(sheet_name[:31])
 
+    # larghezza massima per colonna, aggiornata a ogni cella scritta
+    widths = {}
+    def put(r, c, val):
+        cell = ws.cell(row=r, column=c, value=val)
+        l = len(str(val)) if val is not None else 0
+        if l > widths.get(c, 0): widths[c] = l
+        else: widths.setdefault(c, 0)
+        return cell
+
     # header area
-    ws["A1"].value="Stato";  ws["A1"].font=Font(bold=True)
-    ws["A2"].value="Contea"; ws["A2"].font=Font(bold=True)
-    ws["B1"].value=state_full_name(stato)
-    ws["B2"].value=str(contea) if contea is not None else ""
-    ws["C1"].value="Media $/Acre";   ws["C1"].font=Font(bold=True)
-    ws["C2"].value="Mediana $/Acre"; ws["C2"].font=Font(bold=True)
-    ws["D1"].value=avg_ppa if avg_ppa is not None else None
-    ws["D2"].value=med_ppa if med_ppa is not None else None
+    bold = Font(bold=True)
+    put(1, 1, "Stato").font = bold
+    put(2, 1, "Contea").font = bold
+    put(1, 2, state_full_name(stato))
+    put(2, 2, str(contea) if contea is not None else "")
+    put(1, 3, "Media $/Acre").font = bold
+    put(2, 3, "Mediana $/Acre").font = bold
+    put(1, 4, avg_ppa if avg_ppa is not None else None)
+    put(2, 4, med_ppa if med_ppa is not None else None)
     if ws["D1"].value is not None: ws["D1"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
     if ws["D2"].value is not None: ws["D2"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
-    ws["E1"].value="media prezzi";   ws["E1"].font=Font(bold=True)
-    ws["F1"].value=avg_price if avg_price is not None else None
+    put(1, 5, "media prezzi").font = bold
+    put(1, 6, avg_price if avg_price is not None else None)
     if ws["F1"].value is not None: ws["F1"].number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
 
     # align + fill
@@ -208,8 +234,7 @@ def append_sheet_with_avg(book_path, sheet_name, df, stato, contea):
     headers = list(out_df.columns)
     header_row = 4
     for c, h in enumerate(headers, start=1):
-        cell = ws.cell(row=header_row, column=c, value=h)
-        cell.font = Font(bold=True)
+        put(header_row, c, h).font = bold
 
     # find special columns
     try:
@@ -225,10 +250,9 @@ def append_sheet_with_avg(book_path, sheet_name, df, stato, contea):
     hyperlink_font = Font(underline="single", color="0000EE")
     for r_idx, row in enumerate(out_df.itertuples(index=False), start=header_row+1):
         for c_idx, val in enumerate(row, start=1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=val)
+            cell = put(r_idx, c_idx, val)
             # currency for $/acre
             if ppa_col_idx is not None and c_idx == ppa_col_idx and isinstance(val, (int, float)):
-                from openpyxl.styles import numbers
                 cell.number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
             # hyperlink on Link column
             if link_col_idx is not None and c_idx == link_col_idx and isinstance(val, str) and val.startswith("http"):
@@ -237,21 +261,21 @@ def append_sheet_with_avg(book_path, sheet_name, df, stato, contea):
                 cell.font = hyperlink_font
 
     # bottom coverage
-    from openpyxl.styles import Side, Border
     thin = Side(style="thin", color="999999")
     last = ws.max_row + 1
-    ws.cell(row=last, column=1, value="Coverage Acres")
     cov_text = f"{n_acres}/{n_total}" + (f" ({pct_acres*100:.1f}%)" if pct_acres is not None else "")
     try:
         price_col_idx = headers.index("Price")+1
     except ValueError:
         price_col_idx = len(headers)
-    ws.cell(row=last, column=price_col_idx, value=cov_text)
+    # se Price è la prima colonna il testo di copertura prende il posto dell'etichetta
+    if price_col_idx != 1:
+        put(last, 1, "Coverage Acres")
+    put(last, price_col_idx, cov_text)
     for c in range(1, ws.max_column+1):
         ws.cell(row=last, column=c).border = Border(top=thin)
 
-    _auto_fit(ws)
-    wb.save(book_path)
+    _fit_widths(ws, widths)
     return avg_price, avg_ppa
 
 def choose_output_path() -> str:
@@ -296,6 +320,12 @@ def main():
     stato  = str(p.get("Stato") or "").strip()
     region_id = p.get("Region ID")
     north = p.get("north"); south = p.get("south"); east = p.get("east"); west = p.get("west")
+    if not region_id or not all([north, south, east, west]):
+        meta = _lookup_county(stato, contea)
+        if meta is not None:
+            region_id = region_id or meta.region_id
+            if not all([north, south, east, west]):
+                north, south, east, west = meta.north, meta.south, meta.east, meta.west
 
     vendita = cfg["vendita"]
     periods = cfg["periods"]
@@ -308,24 +338,42 @@ def main():
     output_path = choose_output_path()
     log("[OUTPUT] selected:", output_path)
 
+    # Paginazione: max pagine per contea (params.max_pages) o globale (max_pages)
+    max_pages = _max_pages(p.get("max_pages") or cfg.get("max_pages"))
+    log("[PAGES] max per ricerca:", max_pages)
+
     summaries = []
-    for tipo in vendita:
-        for per in periods:
-            tipo_path = "sold" if "sold" in str(tipo).lower() else "land"
-            url = build_url(contea, stato, region_id, north, south, east, west, per, min_lot, max_lot, tipo_path)
-            sheet = f"{tipo.replace(' ','_')}_{per}"
-            log("[RUN]", sheet, "URL:", url)
-            try:
-                rows = zts.scrape(url)
-                log("[OK] scrape rows:", len(rows))
-            except Exception as e:
-                log("[ERR] durante scrape:", e)
-                log(traceback.format_exc())
-                continue
-            df = df_from_rows(rows)
-            avg_price, avg_ppa = append_sheet_with_avg(output_path, sheet, df, stato, contea)
-            summaries.append((sheet, len(df), avg_price, avg_ppa))
-            log("[SAVED]", output_path, "sheet:", sheet, "rows:", len(df), "avg_price:", avg_price, "avg_ppa:", avg_ppa)
+    wb = new_workbook()
+    try:
+        for tipo in vendita:
+            for per in periods:
+                tipo_path = "sold" if "sold" in str(tipo).lower() else "land"
+                url_for_page = lambda n, _per=per, _tipo=tipo_path: build_url(
+                    contea, stato, region_id, north, south, east, west, _per, min_lot, max_lot, _tipo, page=n)
+                sheet = f"{tipo.replace(' ','_')}_{per}"
+                log("[RUN]", sheet, "URL:", url_for_page(1))
+                timings = []
+                try:
+                    # le Row arrivano in streaming dal crawler direttamente nel DataFrame
+                    df = df_from_rows(zts.iter_pages(url_for_page, max_pages=max_pages, timings=timings))
+                    log("[OK] scrape rows:", len(df))
+                except Exception as e:
+                    log("[ERR] durante scrape:", e)
+                    log(traceback.format_exc())
+                    continue
+                for t in timings:
+                    log(f"[PAGE] {sheet} p{t['page']}: fetch {t['fetch_s']}s attesa {t['wait_s']}s "
+                        f"parse {t['parse_s']}s righe {t['new_rows']}/{t['rows']}")
+                avg_price, avg_ppa = append_sheet_with_avg(wb, sheet, df, stato, contea)
+                summaries.append((sheet, len(df), avg_price, avg_ppa))
+                log("[SHEET]", sheet, "rows:", len(df), "avg_price:", avg_price, "avg_ppa:", avg_ppa)
+    finally:
+        # salvataggio unico (anche se il run si interrompe, i fogli già fatti restano)
+        if wb.sheetnames:
+            wb.save(output_path)
+            log("[SAVED]", output_path, "sheets:", len(wb.sheetnames))
+        else:
+            log("[WARN] nessun foglio prodotto: file non creato")
 
     log("[DONE] Output:", output_path)
     for s, n, ap, aa in summaries:
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+scraper_core/zillow_batch.py
+Sweep Zillow su più contee (uno o più Stati, oppure tutto parametri.xlsx):
+- unità di lavoro = contea × tipo vendita × periodo
+- distribuite su un pool di processi, ognuno con il proprio Chrome (driver pool)
+- ogni unità conclusa viene scritta nel checkpoint JSONL: un run interrotto
+  riparte saltando le unità già fatte con gli stessi filtri (lotto, pagine)
+- throughput stampato in contee/ora
+
+Uso:
+  python -m scraper_core.zillow_batch --state GA --state FL --workers 2
+  python -m scraper_core.zillow_batch --all --vendita "For Sale" Sold --periods 30 90 6m 12m
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .zillow_avg_runner import build_url, df_from_rows, log, _max_pages
+
+DEFAULT_VENDITA = ["For Sale", "Sold"]
+DEFAULT_PERIODS = ["12m"]
+
+
+def sweep_params(min_lot=None, max_lot=None, max_pages: int = 1) -> dict:
+    """Filtri che cambiano i risultati di un'unità: fanno parte della chiave di checkpoint."""
+    def _s(v):
+        return "" if v is None else str(v).strip()
+    return {"min_lot": _s(min_lot), "max_lot": _s(max_lot), "max_pages": int(max_pages or 1)}
+
+
+def _unit_key(u: dict, params: dict = None) -> str:
+    key = f"{u['state']}|{u['county']}|{u['tipo']}|{u['period']}"
+    if params:
+        # stessa contea con filtri diversi = unità diversa (niente resume su risultati vecchi)
+        key += "|" + ",".join(f"{k}={params[k]}" for k in sorted(params))
+    return key
+
+
+def load_units(states, all_rows: bool, vendita, periods, counties=None):
+    """Elenco unità (dict) da parametri.xlsx, in ordine Stato/Contea/tipo/periodo."""
+    from data_loader import load_parametri
+    df = load_parametri()
+    if not all_rows:
+        wanted = {s.strip().upper() for s in states or []}
+        df = df[df["State"].isin(wanted)]
+    if counties:
+        wanted_c = {c.strip().lower() for c in counties}
+        df = df[df["County"].str.lower().isin(wanted_c)]
+    df = df.drop_duplicates(subset=["State", "County"])
+
+    units = []
+    for rec in df.to_dict("records"):
+        for tipo in vendita:
+            for per in periods:
+                units.append({
+                    "state": rec["State"],
+                    "county": rec["County"],
+                    "tipo": tipo,
+                    "period": str(per),
+                    "region_id": rec.get("Region Id"),
+                    "north": rec.get("North"), "south": rec.get("South"),
+                    "east": rec.get("East"), "west": rec.get("West"),
+                })
+    return units
+
+
+def read_checkpoint(path: str) -> dict:
+    """{unit_key: record} delle unità concluse con successo."""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # riga troncata da un'interruzione
+            if rec.get("status") == "ok":
+                done[rec["key"]] = rec
+    return done
+
+
+def _append_checkpoint(path: str, rec: dict):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _summary(df: pd.DataFrame) -> dict:
+    def _stat(col, how):
+        if col not in df.columns or df.empty:
+            return None
+        s = df[col].dropna()
+        return float(getattr(s, how)()) if not s.empty else None
+    return {
+        "rows": int(len(df)),
+        "avg_price": _stat("Price_num", "mean"),
+        "med_price": _stat("Price_num", "median"),
+        "avg_ppa": _stat("Price_per_Acre", "mean"),
+        "med_ppa": _stat("Price_per_Acre", "median"),
+        "acres_coverage": int(df["Acres_num"].notna().sum()) if "Acres_num" in df.columns else 0,
+    }
+
+
+def run_unit(unit: dict, min_lot, max_lot, max_pages: int) -> dict:
+    """Eseguita nel processo worker: scrape di una unità e riepilogo."""
+    from . import zillow_test_scrape as zts  # import nel worker (spawn)
+    t0 = time.time()
+    params = sweep_params(min_lot, max_lot, max_pages)
+    rec = {"key": _unit_key(unit, params), **{k: unit[k] for k in ("state", "county", "tipo", "period")},
+           "params": params}
+    try:
+        tipo_path = "sold" if "sold" in str(unit["tipo"]).lower() else "land"
+
+        def url_for_page(n):
+            return build_url(unit["county"], unit["state"], unit["region_id"],
+                             unit["north"], unit["south"], unit["east"], unit["west"],
+                             unit["period"], min_lot, max_lot, tipo_path, page=n)
+
+        df = df_from_rows(zts.iter_pages(url_for_page, max_pages=max_pages))
+        rec.update(_summary(df))
+        rec["listings"] = df.drop(columns=["Price_num", "Acres_num"], errors="ignore").to_dict("records")
+        rec["status"] = "ok"
+    except Exception as e:
+        rec["status"] = "error"
+        rec["error"] = f"{type(e).__name__}: {e}"
+        rec["trace"] = traceback.format_exc().splitlines()[-3:]
+    rec["seconds"] = round(time.time() - t0, 2)
+    return rec
+
+
+def write_summary(done: dict, out_path: str):
+    """Un foglio riepilogo (una riga per unità) + un foglio con tutti i listing."""
+    recs = sorted(done.values(), key=lambda r: (r["state"], r["county"], r["tipo"], r["period"]))
+    cols = ["state", "county", "tipo", "period", "rows", "avg_price", "med_price",
+            "avg_ppa", "med_ppa", "acres_coverage", "seconds"]
+    summary = pd.DataFrame([{c: r.get(c) for c in cols} for r in recs], columns=cols)
+    listings = pd.DataFrame([
+        {"State": r["state"], "County": r["county"], "Tipo": r["tipo"], "Period": r["period"], **it}
+        for r in recs for it in (r.get("listings") or [])
+    ])
+    with pd.ExcelWriter(out_path, engine="openpyxl") as xw:
+        summary.to_excel(xw, sheet_name="Summary", index=False)
+        if not listings.empty:
+            listings.to_excel(xw, sheet_name="Listings", index=False)
+    return out_path
+
+
+def sweep(units, *, workers: int, checkpoint: str, min_lot=None, max_lot=None, max_pages: int = 1):
+    """
+    Esegue le unità mancanti nel checkpoint. Ritorna {unit_key: record} delle sole
+    unità di questo sweep (stessi filtri): record di altri run nello stesso file
+    restano nel checkpoint ma non finiscono nel riepilogo.
+    """
+    params = sweep_params(min_lot, max_lot, max_pages)
+    keys = {_unit_key(u, params) for u in units}
+    done = {k: r for k, r in read_checkpoint(checkpoint).items() if k in keys}
+    todo = [u for u in units if _unit_key(u, params) not in done]
+
+    # unità per contea, per contare le contee completate
+    per_county = {}
+    for u in units:
+        per_county.setdefault((u["state"], u["county"]), set()).add(_unit_key(u, params))
+
+    def counties_done():
+        return sum(1 for keys in per_county.values() if keys <= done.keys())
+
+    start_counties = counties_done()
+    log(f"[BATCH] unità totali {len(units)} | già nel checkpoint {len(units) - len(todo)} | "
+        f"da fare {len(todo)} | contee {len(per_county)} (complete {start_counties}) | worker {workers}")
+    if not todo:
+        return done
+
+    t0 = time.time()
+    errors = 0
+    ctx = mp.get_context("spawn")  # Chrome + thread: niente fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+        futures = {ex.submit(run_unit, u, min_lot, max_lot, max_pages): u for u in todo}
+        for i, fut in enumerate(as_completed(futures), start=1):
+            u = futures[fut]
+            try:
+                rec = fut.result()
+            except Exception as e:  # processo worker morto
+                rec = {"key": _unit_key(u, params), **{k: u[k] for k in ("state", "county", "tipo", "period")},
+                       "status": "error", "error": f"{type(e).__name__}: {e}"}
+            _append_checkpoint(checkpoint, rec)
+            if rec["status"] == "ok":
+                done[rec["key"]] = rec
+            else:
+                errors += 1
+
+            hours = max(time.time() - t0, 1e-6) / 3600
+            finished = counties_done() - start_counties
+            rate = finished / hours
+            log(f"[BATCH] {i}/{len(todo)} {rec['key']} -> {rec['status']} "
+                f"({rec.get('rows', 0)} righe, {rec.get('seconds', 0)}s) | "
+                f"contee complete {finished} | {rate:.1f} contee/ora | errori {errors}")
+
+    elapsed = time.time() - t0
+    finished = counties_done() - start_counties
+    log(f"[BATCH] fine: {finished} contee in {elapsed / 60:.1f} min "
+        f"({finished / max(elapsed / 3600, 1e-6):.1f} contee/ora), errori {errors}")
+    return done
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sweep Zillow multi-contea con checkpoint/resume")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--state", action="append", help="Sigla Stato (ripetibile)")
+    g.add_argument("--all", action="store_true", help="Tutte le righe di parametri.xlsx")
+    ap.add_argument("--county", action="append", help="Limita a queste contee (ripetibile)")
+    ap.add_argument("--vendita", nargs="+", default=DEFAULT_VENDITA)
+    ap.add_argument("--periods", nargs="+", default=DEFAULT_PERIODS)
+    ap.add_argument("--min-lot", default=None)
+    ap.add_argument("--max-lot", default=None)
+    ap.add_argument("--max-pages", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("BATCH_WORKERS", "2") or 2))
+    ap.add_argument("--checkpoint", default=None, help="File JSONL (default sweep_<stati>.jsonl)")
+    ap.add_argument("--out", default=None, help="Excel riepilogo (default sweep_<stati>.xlsx)")
+    args = ap.parse_args(argv)
+
+    tag = "all" if args.all else "_".join(s.upper() for s in args.state)
+    checkpoint = args.checkpoint or f"sweep_{tag}.jsonl"
+    out = args.out or f"sweep_{tag}.xlsx"
+
+    units = load_units(args.state, args.all, args.vendita, args.periods, args.county)
+    if not units:
+        log("[BATCH] nessuna contea trovata per i filtri indicati")
+        return 2
+
+    done = sweep(units, workers=max(1, args.workers), checkpoint=checkpoint,
+                 min_lot=args.min_lot, max_lot=args.max_lot, max_pages=_max_pages(args.max_pages))
+    write_summary(done, out)
+    log("[BATCH] checkpoint:", checkpoint, "| riepilogo:", out)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        log("[BATCH] interrotto: rilancia lo stesso comando per riprendere dal checkpoint")
+        sys.exit(130)
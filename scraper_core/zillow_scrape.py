@@ -8,12 +8,26 @@ Integrazione Zillow per l'orchestratore:
 """
 
 from __future__ import annotations
+import os
 import re
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 
 # IMPORT RELATIVI (obbligatori dentro il package scraper_core)
-from .zillow_avg_runner import build_url, df_from_rows  # riusiamo il tuo parsing numerico
+from .zillow_avg_runner import build_url, df_from_rows, _max_pages  # riusiamo il tuo parsing numerico
 from . import zillow_test_scrape as zts  # tuo scraper già collaudato
+from .page_cache import get_cache, normalize_key
+from . import progress, exporters
+from .driver_factory import fanout
+
+try:
+    from data_loader import lookup_county  # indice contee da parametri.xlsx (root del progetto)
+except Exception:
+    lookup_county = None
+
+# Quanti modi (For Sale / Sold) eseguire in parallelo, ognuno con un driver del pool
+MODE_CONCURRENCY = int(os.environ.get("ZILLOW_MODE_CONCURRENCY", "2") or 2)
 
 
 def _to_num(s):
@@ -66,12 +80,17 @@ def run_scrape(
     include_sold: bool,
     headless: bool = True,   # (opzionale: si può propagare in zts.scrape mettendo --headless)
     period: str | None = None,
+    max_pages: int | None = None,
+    bypass_cache: bool = False,
 ) -> pd.DataFrame:
     """
     Entry-point per l’orchestratore (scraper_core.scraper).
-    Esegue fino a 2 ricerche: For Sale e/o Sold.
+    Esegue fino a 2 ricerche: For Sale e/o Sold, in parallelo.
+    max_pages: pagine Zillow per ricerca (default ZILLOW_MAX_PAGES, 1 = solo prima pagina).
+    bypass_cache: ignora la cache pagine e forza uno scraping nuovo (il risultato viene comunque salvato).
     """
-    all_parts = []
+    max_pages = _max_pages(max_pages)
+    cache = get_cache()
 
     # Zillow URL secondo il tuo runner (usa lot in sqft, doz per periodo, ecc.)
     modes = []
@@ -80,25 +99,72 @@ def run_scrape(
     if include_sold:
         modes.append(("Sold", "sold"))
 
-    # NB: regionId/bounds non obbligatori; il runner li accetta anche None.
-    region_id = None
-    north = south = east = west = None
+    # regionId + bounds dall'indice di parametri.xlsx: query Zillow precisa sulla contea
+    # (se la contea non è indicizzata il runner accetta anche None → ricerca testuale)
+    meta = lookup_county(state, county) if lookup_county is not None else None
+    if meta is not None:
+        region_id = meta.region_id
+        north, south, east, west = meta.north, meta.south, meta.east, meta.west
+    else:
+        print(f"[ZILLOW][WARN] {county} ({state}) non trovata in parametri.xlsx: ricerca testuale", flush=True)
+        region_id = None
+        north = south = east = west = None
     min_lot = acres_min
     max_lot = acres_max
 
-    for label, tipo in modes:
-        url = build_url(
-            county, state, region_id, north, south, east, west,
-            period, min_lot, max_lot, tipo_vendita=tipo
-        )
-        print(f"[ZILLOW] URL {label}: {url}")
-
-        # Esegue il tuo scraper reale
-        rows = zts.scrape(url)
-        print(f"[ZILLOW] {label}: {len(rows)} risultati")
-
+    def _scrape_mode(label, tipo):
+        with progress.scope(label=label), progress.stage("mode") as st:
+            df_part = _scrape_mode_rows(label, tipo, st)
+            st.set(rows=len(df_part))
+        return df_part
+
+    def _scrape_mode_rows(label, tipo, st):
+        def url_for_page(n):
+            return build_url(
+                county, state, region_id, north, south, east, west,
+                period, min_lot, max_lot, tipo_vendita=tipo, page=n
+            )
+        print(f"[ZILLOW] URL {label}: {url_for_page(1)}")
+
+        key = normalize_key(url_for_page(1), extra=f"pages={max_pages}")
+        cached = cache.get(key) if (cache is not None and not bypass_cache) else None
+        if cached is not None:
+            print(f"[CACHE] hit Zillow {label}: {len(cached)} righe", flush=True)
+            st.set(cached=True)
+            rows = [zts.Row(**r) for r in cached]
+            df_part = _rows_to_df(rows, state=state, county=county, status_label=label, period=period)
+            exporters.stream_rows(df_part)
+            return df_part
+
+        # Esegue il tuo scraper reale (ogni modo prende il suo driver dal pool);
+        # le Row arrivano pagina per pagina direttamente nel DataFrame
+        collected = []
+        def _tee(it):
+            for r in it:
+                collected.append(r)
+                yield r
+        def _stream(page_rows):
+            # ogni pagina va subito negli export CSV/JSONL/Parquet in corso
+            exporters.stream_rows(_rows_to_df(page_rows, state=state, county=county,
+                                              status_label=label, period=period))
+        rows = _tee(zts.iter_pages(url_for_page, max_pages=max_pages, on_page=_stream))
         df_part = _rows_to_df(rows, state=state, county=county, status_label=label, period=period)
-        all_parts.append(df_part)
+        print(f"[ZILLOW] {label}: {len(df_part)} risultati")
+        if cache is not None and collected:
+            cache.put(key, [asdict(r) for r in collected])
+        return df_part
+
+    # For Sale e Sold in parallelo: il tempo totale ~ quello del modo più lento
+    parts_by_idx = {}
+    # un driver per modo: non più modi in parallelo di quanti driver spettano a Zillow
+    workers = fanout(MODE_CONCURRENCY, len(modes))
+    if modes:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zillow-mode") as ex:
+            futures = {ex.submit(progress.wrap(_scrape_mode), label, tipo): i for i, (label, tipo) in enumerate(modes)}
+            for fut in as_completed(futures):
+                parts_by_idx[futures[fut]] = fut.result()
+    # unione nell'ordine dei modi (For Sale, poi Sold), non di completamento
+    all_parts = [parts_by_idx[i] for i in sorted(parts_by_idx)]
 
     if not all_parts:
         return pd.DataFrame(columns=["Price","Acres","Price_per_Acre","Location","Link","Status","County","State","Period"])
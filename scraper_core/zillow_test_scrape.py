@@ -1,21 +1,27 @@
 
+import os
 import json
 import re
 import sys
 import time
 import gc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass, asdict
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 
 import pandas as pd
 from openpyxl import load_workbook, Workbook
 from openpyxl.workbook.defined_name import DefinedName
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.wait import POLL_FREQUENCY
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import undetected_chromedriver as uc
-from scraper_core.driver_factory import make_uc_driver
+from scraper_core.driver_factory import get_pool
+from scraper_core.http_fetch import get_fetcher, FAST_PATH_ENABLED
+from scraper_core import progress, metrics, waits, netblock
 
 TEST_URL = "https://www.zillow.com/appling-county-ga/land/?searchQueryState=%7B%22pagination%22%3A%7B%7D%2C%22isMapVisible%22%3Atrue%2C%22mapBounds%22%3A%7B%22west%22%3A-83.10302324414062%2C%22east%22%3A-81.49627275585937%2C%22south%22%3A31.276637324224254%2C%22north%22%3A32.15744225314186%7D%2C%22regionSelection%22%3A%5B%7B%22regionId%22%3A1516%2C%22regionType%22%3A4%7D%5D%2C%22filterState%22%3A%7B%22sort%22%3A%7B%22value%22%3A%22globalrelevanceex%22%7D%2C%22sf%22%3A%7B%22value%22%3Afalse%7D%2C%22tow%22%3A%7B%22value%22%3Afalse%7D%2C%22mf%22%3A%7B%22value%22%3Afalse%7D%2C%22con%22%3A%7B%22value%22%3Afalse%7D%2C%22apa%22%3A%7B%22value%22%3Afalse%7D%2C%22manu%22%3A%7B%22value%22%3Afalse%7D%2C%22apco%22%3A%7B%22value%22%3Afalse%7D%2C%22lot%22%3A%7B%22min%22%3A0%2C%22max%22%3A87120%2C%22units%22%3Anull%7D%2C%22doz%22%3A%7B%22value%22%3A%2212m%22%7D%7D%2C%22isListVisible%22%3Atrue%2C%22usersSearchTerm%22%3A%22Appling%20County%20GA%22%7D"
 
@@ -35,15 +41,112 @@ def _to_float(x) -> Optional[float]:
     except Exception:
         return None
 
+_NEXT_DATA_ID = 'id="__NEXT_DATA__"'
+_JSON = json.JSONDecoder()
+
+# Attesa fissa (s) quando __NEXT_DATA__ non arriva e il driver non supporta le attese adattive
+LATE_DATA_SLEEP = 3.0
+# Vecchia attesa di __NEXT_DATA__: WebDriverWait (controllo ogni POLL_FREQUENCY s) fino a timeout
+NEXT_DATA_TIMEOUT = 15
+
+# Profilo di blocco richieste del driver (netblock.PROFILES): basta l'HTML con __NEXT_DATA__
+BLOCK_PROFILE = os.environ.get("ZILLOW_BLOCK_PROFILE", "zillow-json-only").strip()
+
+# JS: legge solo il testo dello <script id="__NEXT_DATA__"> (niente page_source intero)
+NEXT_DATA_JS = "var el = document.getElementById('__NEXT_DATA__'); return el ? el.textContent : null;"
+
+def next_data_text(html: str) -> Optional[str]:
+    """Ritaglia il testo dello script __NEXT_DATA__ con str.find (niente regex DOTALL sulla pagina)."""
+    if not html:
+        return None
+    i = html.find(_NEXT_DATA_ID)
+    if i < 0:
+        return None
+    start = html.find(">", i)
+    if start < 0:
+        return None
+    end = html.find("</script>", start)
+    if end < 0:
+        return None
+    return html[start + 1:end]
+
 def extract_next_data(html: str):
-    m = re.search(r'__NEXT_DATA__"\s*type="application/json">(.+?)</script>', html, re.DOTALL)
-    if not m:
+    """Payload __NEXT_DATA__ completo (json.loads dell'intero blob)."""
+    text = next_data_text(html)
+    if not text:
         return None
     try:
-        return json.loads(m.group(1))
+        return json.loads(text)
     except Exception:
         return None
 
+_WS = re.compile(r"[ \t\r\n]*")
+# Parti di __NEXT_DATA__ lette da collect_rows_from_payload / total_pages_from_payload
+# (True = valore decodificato, dict = si scende nell'oggetto)
+_CAT_SPEC = {"searchResults": {"listResults": True, "mapResults": True}, "searchList": {"totalPages": True}}
+_SEARCH_SPEC = {"props": {"pageProps": {"searchPageState": {"cat1": _CAT_SPEC, "cat2": _CAT_SPEC}}}}
+
+
+def _pick(text: str, i: int, spec: dict):
+    """
+    Decodifica dall'oggetto JSON che inizia in i solo i membri richiesti da spec, in un
+    solo passaggio. Gli altri membri vengono decodificati uno alla volta e scartati: in
+    memoria c'è al più un fratello, mai l'intero albero. Ritorna (dict, fine); se in i non
+    c'è un oggetto, ({}, fine del valore).
+    """
+    i = _WS.match(text, i).end()
+    if not text.startswith("{", i):
+        return {}, _JSON.raw_decode(text, i)[1]
+    out = {}
+    i = _WS.match(text, i + 1).end()
+    if text.startswith("}", i):
+        return out, i + 1
+    while True:
+        name, i = _JSON.raw_decode(text, i)
+        i = _WS.match(text, i).end()
+        if not text.startswith(":", i):
+            raise ValueError(f"':' atteso a {i}")
+        i = _WS.match(text, i + 1).end()
+        sub = spec.get(name)
+        if isinstance(sub, dict):
+            out[name], i = _pick(text, i, sub)
+        else:
+            value, i = _JSON.raw_decode(text, i)
+            if sub:
+                out[name] = value
+            value = None
+        i = _WS.match(text, i).end()
+        if text.startswith(",", i):
+            i = _WS.match(text, i + 1).end()
+        elif text.startswith("}", i):
+            return out, i + 1
+        else:
+            raise ValueError(f"',' o '}}' atteso a {i}")
+
+
+def extract_search_results(text: Optional[str]):
+    """
+    Estrazione a basso consumo di memoria dal testo di __NEXT_DATA__:
+    scende lungo props.pageProps.searchPageState.catN e decodifica solo
+    searchResults.listResults/mapResults e searchList.totalPages, senza
+    costruire l'albero completo del payload.
+    Ritorna un payload ridotto con la stessa forma (cat1 e cat2 separati) letta da
+    collect_rows_from_payload, o None se il testo manca o non contiene risultati
+    (così "if not payload" vale anche per una pagina con listResults/mapResults vuoti).
+    """
+    if not text:
+        return None
+    try:
+        payload, _ = _pick(text, 0, _SEARCH_SPEC)
+    except (ValueError, IndexError) as e:
+        print(f"[ZTS][WARN] __NEXT_DATA__ non leggibile: {e}", flush=True)
+        return None
+    return payload if _payload_has_results(payload) else None
+
+def extract_next_data_lite(html: str):
+    """Come extract_next_data, ma con il payload ridotto di extract_search_results."""
+    return extract_search_results(next_data_text(html))
+
 def parse_location(address: Optional[str]) -> Optional[str]:
     if not address:
         return None
@@ -86,7 +189,73 @@ def _extract_numeric_price(it) -> Optional[float]:
 
     return None
 
-def collect_rows_from_payload(payload) -> List[Row]:
+def _location_from_item(it) -> Optional[str]:
+    loc = parse_location(it.get("address"))
+    if loc:
+        return loc
+    # mapResults spesso non ha "address": ricostruisci da hdpData.homeInfo
+    home = (it.get("hdpData") or {}).get("homeInfo") or {}
+    city, st, zipcode = home.get("city"), home.get("state"), home.get("zipcode")
+    if city or st:
+        tail = " ".join(str(x) for x in (st, zipcode) if x)
+        return ", ".join(str(x) for x in (city, tail) if x) or None
+    return None
+
+def _parse_short_price(text) -> Optional[float]:
+    """'$45K' / '$1.2M' (formato compatto di mapResults) -> numero."""
+    if not isinstance(text, str):
+        return None
+    m = re.search(r"\$?\s*([\d.,]+)\s*([KM])\b", text, re.I)
+    if not m:
+        return None
+    v = _to_float(m.group(1).replace(",", ""))
+    if v is None:
+        return None
+    return v * (1_000 if m.group(2).upper() == "K" else 1_000_000)
+
+def _row_from_item(it) -> Row:
+    # PRICE
+    price_num = _extract_numeric_price(it)
+    if price_num is None:
+        price_num = _parse_short_price(it.get("price"))
+    price = _fmt_price_usd(price_num) if price_num is not None else (it.get("price") or (it.get("variableData") or {}).get("text"))
+
+    # ACRES
+    acres = None
+    las = it.get("lotAreaString")
+    if isinstance(las, str):
+        m = re.search(r"([\d.,]+)\s*acres?", las, re.I)
+        if m:
+            acres = m.group(1)
+    if acres is None:
+        lot_value = it.get("lotArea") or (it.get("hdpData") or {}).get("homeInfo", {}).get("lotAreaValue")
+        lot_unit = it.get("lotAreaUnit") or (it.get("hdpData") or {}).get("homeInfo", {}).get("lotAreaUnit")
+        if lot_value is not None and isinstance(lot_unit, str) and lot_unit.lower().startswith("acre"):
+            acres = str(lot_value)
+
+    location = _location_from_item(it)
+    detail_url = it.get("detailUrl")
+    if isinstance(detail_url, str) and detail_url.startswith("/"):
+        link = "https://www.zillow.com" + detail_url
+    else:
+        link = detail_url
+
+    return Row(price=price, acres=acres, location=location, link=link)
+
+def _item_key(it):
+    zpid = it.get("zpid") or (it.get("hdpData") or {}).get("homeInfo", {}).get("zpid")
+    if zpid not in (None, ""):
+        return ("zpid", str(zpid))
+    url = it.get("detailUrl")
+    if url:
+        return ("url", str(url).split("?")[0].rstrip("/"))
+    return None
+
+def collect_rows_from_payload(payload, stats: Optional[dict] = None) -> List[Row]:
+    """
+    Estrae le righe da listResults E mapResults (cat1/cat2), deduplicando
+    per zpid/detailUrl. Se passato, stats riceve i conteggi per bucket.
+    """
     def _probe(root, path):
         cur = root
         for k in path:
@@ -97,124 +266,299 @@ def collect_rows_from_payload(payload) -> List[Row]:
         return cur
 
     buckets = [
-        ["props", "pageProps", "searchPageState", "cat1", "searchResults", "listResults"],
-        ["props", "pageProps", "searchPageState", "cat2", "searchResults", "listResults"],
+        ("listResults", ["props", "pageProps", "searchPageState", "cat1", "searchResults", "listResults"]),
+        ("listResults", ["props", "pageProps", "searchPageState", "cat2", "searchResults", "listResults"]),
+        ("mapResults",  ["props", "pageProps", "searchPageState", "cat1", "searchResults", "mapResults"]),
+        ("mapResults",  ["props", "pageProps", "searchPageState", "cat2", "searchResults", "mapResults"]),
     ]
 
-    list_results = None
-    for path in buckets:
-        list_results = _probe(payload, path)
-        if isinstance(list_results, list) and list_results:
-            break
-
+    counts = {"listResults": 0, "mapResults": 0, "unique": 0}
+    seen = set()
     out: List[Row] = []
-    if not isinstance(list_results, list):
-        return out
-
-    for it in list_results:
-        # PRICE
-        price_num = _extract_numeric_price(it)
-        price = _fmt_price_usd(price_num) if price_num is not None else (it.get("price") or (it.get("variableData") or {}).get("text"))
-
-        # ACRES
-        acres = None
-        las = it.get("lotAreaString")
-        if isinstance(las, str):
-            m = re.search(r"([\d.,]+)\s*acres?", las, re.I)
-            if m:
-                acres = m.group(1)
-        if acres is None:
-            lot_value = it.get("lotArea") or (it.get("hdpData") or {}).get("homeInfo", {}).get("lotAreaValue")
-            lot_unit = it.get("lotAreaUnit") or (it.get("hdpData") or {}).get("homeInfo", {}).get("lotAreaUnit")
-            if lot_value is not None and isinstance(lot_unit, str) and lot_unit.lower().startswith("acre"):
-                acres = str(lot_value)
-
-        location = parse_location(it.get("address"))
-        detail_url = it.get("detailUrl")
-        if isinstance(detail_url, str) and detail_url.startswith("/"):
-            link = "https://www.zillow.com" + detail_url
-        else:
-            link = detail_url
-
-        out.append(Row(price=price, acres=acres, location=location, link=link))
+    for name, path in buckets:
+        items = _probe(payload, path)
+        if not isinstance(items, list):
+            continue
+        counts[name] += len(items)
+        for it in items:
+            if not isinstance(it, dict):
+                continue
+            key = _item_key(it)
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            out.append(_row_from_item(it))
+
+    counts["unique"] = len(out)
+    if stats is not None:
+        stats.update(counts)
+    if counts["listResults"] or counts["mapResults"]:
+        print(f"[ZTS] payload: listResults={counts['listResults']} mapResults={counts['mapResults']} "
+              f"-> unici {counts['unique']}", flush=True)
     return out
 
+CARD_XPATH = "//article|//div[contains(@data-test,'search-list-item')]"
+CARD_LINK_XPATH = ".//a[@href]"
+MAX_CARDS = 200
+
+# Testo e link di tutte le card in una sola execute_script (niente .text/find_element per card)
+CARDS_JS = """
+var snap = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var out = [];
+for (var i = 0; i < Math.min(snap.snapshotLength, arguments[2]); i++) {
+  var c = snap.snapshotItem(i);
+  var a = document.evaluate(arguments[1], c, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  out.push({text: c.innerText || c.textContent || "", link: a ? (a.href || a.getAttribute("href")) : null});
+}
+return out;
+"""
+
+def _row_from_card_text(txt: str, href: Optional[str]) -> Row:
+    txt = txt or ""
+    # price
+    m_price = re.search(r"\$\s?[\d,\.]+", txt)
+    price = m_price.group(0) if m_price else None
+    # acres
+    m_acres = re.search(r"([\d,\.]+)\s*acres?", txt, re.I)
+    acres = m_acres.group(1) if m_acres else None
+    # location
+    loc = None
+    lines = [t.strip() for t in txt.splitlines() if t.strip()]
+    for line in lines:
+        if re.search(r",[ ]*[A-Z]{2}[ ]*\d{5}", line):
+            loc = re.sub(r"^.*?,\s*", "", line)
+            break
+    return Row(price=price, acres=acres, location=loc, link=href)
+
 def collect_rows_via_cards(driver) -> List[Row]:
+    """Righe dalle card visibili: un solo round trip (CARDS_JS), per elemento se lo script fallisce."""
+    try:
+        cards = driver.execute_script(CARDS_JS, CARD_XPATH, CARD_LINK_XPATH, MAX_CARDS)
+    except Exception as e:
+        print(f"[ZTS][WARN] estrazione card via JS non riuscita ({e}), uso quella per elemento", flush=True)
+        cards = None
+    if isinstance(cards, list):
+        return [_row_from_card_text(c.get("text"), c.get("link")) for c in cards if isinstance(c, dict)]
+
     out: List[Row] = []
-    cards = driver.find_elements(By.XPATH, "//article|//div[contains(@data-test,'search-list-item')]")
-    for c in cards[:200]:
+    for c in driver.find_elements(By.XPATH, CARD_XPATH)[:MAX_CARDS]:
         txt = c.text
-        # price
-        m_price = re.search(r"\$\s?[\d,\.]+", txt)
-        price = m_price.group(0) if m_price else None
-        # acres
-        m_acres = re.search(r"([\d,\.]+)\s*acres?", txt, re.I)
-        acres = m_acres.group(1) if m_acres else None
-        # location
-        loc = None
-        lines = [t.strip() for t in txt.splitlines() if t.strip()]
-        for line in lines:
-            if re.search(r",[ ]*[A-Z]{2}[ ]*\d{5}", line):
-                loc = re.sub(r"^.*?,\s*", "", line)
-                break
         # link
         try:
-            a = c.find_element(By.XPATH, ".//a[@href]")
+            a = c.find_element(By.XPATH, CARD_LINK_XPATH)
             href = a.get_attribute("href")
         except Exception:
             href = None
-        out.append(Row(price=price, acres=acres, location=loc, link=href))
+        out.append(_row_from_card_text(txt, href))
     return out
 
-def scrape(url: str) -> List[Row]:
-    # Evita rumorosi __del__ su teardown (ok se fallisce)
-    try:
-        uc.Chrome.__del__ = lambda self: None  # type: ignore
-    except Exception:
-        pass
+def total_pages_from_payload(payload) -> Optional[int]:
+    """Numero di pagine dichiarato da Zillow (searchList.totalPages), se presente."""
+    sps = (((payload or {}).get("props") or {}).get("pageProps") or {}).get("searchPageState") or {}
+    for cat in ("cat1", "cat2"):
+        v = ((sps.get(cat) or {}).get("searchList") or {}).get("totalPages")
+        if isinstance(v, int) and v > 0:
+            return v
+    return None
 
-    driver = None
-    try:
-        # Driver headless robusto (usa la factory che abbiamo creato)
-        driver = make_uc_driver()
-        print("[DRIVER] UC OK (Render headless)", flush=True)
+def _payload_has_results(payload) -> bool:
+    sps = (((payload or {}).get("props") or {}).get("pageProps") or {}).get("searchPageState") or {}
+    for cat in ("cat1", "cat2"):
+        sr = (sps.get(cat) or {}).get("searchResults") or {}
+        if sr.get("listResults") or sr.get("mapResults"):
+            return True
+    return False
 
-        # Navigazione con timeout non bloccante
-        print(f"[ZTS] Navigating to {url}", flush=True)
-        try:
+def _fetch_http(url: str):
+    """
+    Fast path senza browser. Ritorna il payload, oppure None se la pagina è
+    bloccata o vuota (in quel caso si ripiega su Chrome).
+    """
+    fetcher = get_fetcher()
+    with metrics.timed("http_fetch", "zillow"):
+        res = fetcher.fetch(url)
+    if res.blocked:
+        print(f"[HTTP] fallback Chrome ({res.reason})", flush=True)
+        fetcher.record(False, res.reason)
+        return None
+    payload = extract_next_data_lite(res.html)
+    if not _payload_has_results(payload):
+        print("[HTTP] fallback Chrome (payload vuoto)", flush=True)
+        fetcher.record(False, "empty-payload")
+        return None
+    fetcher.record(True)
+    return payload
+
+def _fetch_page(get_driver, url: str, use_http: bool = FAST_PATH_ENABLED):
+    """
+    Carica url e ritorna (payload, righe, secondi, parse_s, via, byte); byte = netblock.page_transfer
+    (None per il fast path HTTP o se il driver non permette la misura).
+    Prova prima il fast path HTTP; Chrome (get_driver()) solo se serve.
+    Le righe vengono dal payload; se non ce ne sono (niente __NEXT_DATA__ o listResults/mapResults
+    vuoti) si leggono le card, qui, finché il driver è ancora su questa pagina.
+    """
+    t0 = time.time()
+    if use_http:
+        payload = _fetch_http(url)
+        if payload is not None:
+            t = time.time()
+            rows = collect_rows_from_payload(payload)
+            if rows:
+                return payload, rows, t - t0, time.time() - t, "http", None
+
+    driver = get_driver()
+    # Navigazione con timeout non bloccante
+    print(f"[ZTS] Navigating to {url}", flush=True)
+    netblock.reset(driver)
+    try:
+        with metrics.timed("driver_get", "zillow"):
             driver.get(url)
-        except TimeoutException:
-            print("[ZTS][WARN] driver.get timeout; continuo con page_source parziale", flush=True)
+    except TimeoutException:
+        print("[ZTS][WARN] driver.get timeout; continuo con page_source parziale", flush=True)
+
+    # Attendi il JSON se arriva (MutationObserver), altrimenti che la pagina si fermi
+    t_wait = time.time()
+    with metrics.timed("wait", "zillow"):
+        res = waits.wait_for_selector(driver, "script#__NEXT_DATA__", timeout=NEXT_DATA_TIMEOUT)
+        if res is None:
+            try:
+                WebDriverWait(driver, NEXT_DATA_TIMEOUT).until(
+                    EC.presence_of_element_located((By.XPATH, "//script[@id='__NEXT_DATA__']"))
+                )
+            except Exception:
+                time.sleep(LATE_DATA_SLEEP)
+        elif res["found"]:
+            # vecchio percorso: WebDriverWait se ne accorgeva al controllo successivo
+            fixed = waits.polled_baseline(res["ms"] / 1000.0, NEXT_DATA_TIMEOUT, POLL_FREQUENCY)
+            waits.record_saved("zillow", "wait", fixed, time.time() - t_wait)
+        else:
+            # invece di 3s fissi: DOM e rete fermi per mezzo secondo (max 3s)
+            idle = waits.wait_for_idle(driver, idle=0.5, timeout=LATE_DATA_SLEEP)
+            if idle is None:
+                time.sleep(LATE_DATA_SLEEP)
+            else:
+                # vecchio percorso: timeout intero di WebDriverWait + sleep fisso
+                waits.record_saved("zillow", "late_data", NEXT_DATA_TIMEOUT + LATE_DATA_SLEEP,
+                                   time.time() - t_wait)
 
-        # Attendi il JSON se arriva, altrimenti prosegui
+    # solo il testo dello script, non l'intero page_source
+    with metrics.timed("extract", "zillow"):
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.XPATH, "//script[@id='__NEXT_DATA__']"))
-            )
+            text = driver.execute_script(NEXT_DATA_JS)
         except Exception:
-            time.sleep(3)
-
-        html = driver.page_source or ""
-        payload = extract_next_data(html)
-        rows = collect_rows_from_payload(payload) if payload else []
-
-        if not rows:
-            print("[ZTS] Fallback: scanning cards", flush=True)
+            text = next_data_text(driver.page_source or "")
+        payload = extract_search_results(text)
+        text = None
+
+    t = time.time()
+    rows: List[Row] = collect_rows_from_payload(payload) if payload else []
+    parse_s = time.time() - t
+    if not rows:
+        print("[ZTS] Fallback: scanning cards", flush=True)
+        with metrics.timed("cards", "zillow"):
             rows = collect_rows_via_cards(driver)
+    transfer = netblock.page_transfer(driver, "zillow")
+    return payload, rows, t - t0, parse_s, "chrome", transfer
+
+def iter_pages(url_for_page, max_pages: int = 1, timings: Optional[list] = None,
+               use_http: bool = FAST_PATH_ENABLED, on_page: Optional[Callable] = None) -> Iterator[Row]:
+    """
+    Crawler paginato: url_for_page(n) -> URL della pagina n (1-based).
+    Mentre la pagina n viene parsata, la n+1 è già in caricamento.
+    Ogni pagina passa prima dal fast path HTTP; Chrome viene preso dal pool
+    solo alla prima pagina che ne ha bisogno.
+    Si ferma a max_pages, a totalPages, o alla prima pagina senza righe nuove.
+    Le Row vengono prodotte in streaming; timings (lista) riceve il dettaglio per pagina;
+    on_page(righe_nuove) viene chiamata per ogni pagina (es. export in streaming).
+    """
+    # Evita rumorosi __del__ su teardown (ok se fallisce)
+    try:
+        uc.Chrome.__del__ = lambda self: None  # type: ignore
+    except Exception:
+        pass
 
-        rows = [r for r in rows if (r.price or r.acres)]
-        print(f"[ZTS] scrape complete, found {len(rows)} results", flush=True)
-        return rows
+    max_pages = max(1, int(max_pages or 1))
+    seen = set()
+    # hit rate di questo crawl: differenza rispetto ai contatori di processo di adesso
+    http_before = get_fetcher().stats() if use_http else None
+    with ExitStack() as stack:
+        leased = []
+
+        def get_driver():
+            # Driver headless robusto preso dal pool (riusato tra le chiamate)
+            if not leased:
+                leased.append(stack.enter_context(get_pool().lease(profile=BLOCK_PROFILE)))
+                print("[DRIVER] UC OK (Render headless, pool)", flush=True)
+            return leased[0]
+
+        # il prefetch si chiude (attendendo la pagina in volo) prima di rendere il driver
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="zts-prefetch") as prefetch:
+            page = 1
+            # wrap: il thread di prefetch vede lo scope del chiamante (progress/metriche)
+            pending = prefetch.submit(progress.wrap(_fetch_page), get_driver, url_for_page(page), use_http)
+            while pending is not None:
+                t_wait = time.time()
+                payload, rows, fetch_s, parse_s, via, transfer = pending.result()
+                wait_s = time.time() - t_wait
+                pending = None
+
+                total = total_pages_from_payload(payload)
+                last_page = min(max_pages, total) if total else max_pages
+                if page < last_page:
+                    # prefetch: la pagina successiva si carica mentre parsiamo questa
+                    pending = prefetch.submit(progress.wrap(_fetch_page), get_driver, url_for_page(page + 1), use_http)
+
+                t_parse = time.time()
+                rows = [r for r in rows if (r.price or r.acres)]
+                new_rows = []
+                for r in rows:
+                    key = r.link or (r.price, r.acres, r.location)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    new_rows.append(r)
+                parse_s += time.time() - t_parse  # payload (nel thread di fetch) + filtro/dedup
+                metrics.STAGE_SECONDS.observe(parse_s, source="zillow", stage="parse")
+
+                info = {"page": page, "via": via, "fetch_s": round(fetch_s, 3), "wait_s": round(wait_s, 3),
+                        "parse_s": round(parse_s, 3), "rows": len(rows), "new_rows": len(new_rows),
+                        "total_pages": total, "bytes": transfer["bytes"] if transfer else None}
+                if timings is not None:
+                    timings.append(info)
+                print(f"[ZTS][PAGE {page}/{last_page}] {via} fetch {fetch_s:.2f}s | attesa {wait_s:.2f}s | "
+                      f"parse {parse_s:.3f}s | {netblock.describe(transfer) if via == 'chrome' else 'http'} | "
+                      f"righe {len(rows)} (nuove {len(new_rows)})", flush=True)
+                progress.emit("page", page=page, last_page=last_page, via=via, rows=len(new_rows),
+                              total_rows=len(seen), elapsed=round(fetch_s + parse_s, 2), bytes=info["bytes"])
+
+                if on_page is not None and new_rows:
+                    on_page(new_rows)
+                yield from new_rows
+
+                if not new_rows:
+                    # risultati esauriti: la pagina eventualmente in prefetch viene scartata
+                    if pending is not None:
+                        print("[ZTS] nessuna riga nuova, stop paginazione", flush=True)
+                    break
+                page += 1
+
+    if use_http:
+        st = get_fetcher().stats(since=http_before)
+        if st["hit_rate"] is not None:
+            print(f"[HTTP] fast path hit rate: {st['hits']}/{st['hits'] + st['fallbacks']} "
+                  f"({st['hit_rate'] * 100:.0f}%) {st['reasons'] or ''}", flush=True)
+    gc.collect()
 
-    finally:
-        # Teardown sicuro
-        try:
-            if driver is not None:
-                driver.quit()
-        except Exception:
-            pass
-        driver = None
-        gc.collect()
+def scrape(url: str) -> List[Row]:
+    rows = list(iter_pages(lambda _page: url, max_pages=1))
+    print(f"[ZTS] scrape complete, found {len(rows)} results", flush=True)
+    return rows
+
+def scrape_pages(url_for_page, max_pages: int = 1, timings: Optional[list] = None) -> List[Row]:
+    rows = list(iter_pages(url_for_page, max_pages=max_pages, timings=timings))
+    print(f"[ZTS] scrape complete ({max_pages} pagine max), found {len(rows)} results", flush=True)
+    return rows
 
 def write_excel(rows: List[Row], out_path: str):
     # Build DataFrame with numeric helpers
@@ -1,7 +1,79 @@
-self.addEventListener("install", () => {
-  console.log("[SW] install");
+// Service worker: app shell offline con cache versionata.
+// __SHELL_VERSION__ e __SHELL_ASSETS__ vengono sostituiti da app.py (/service-worker.js)
+const SHELL_VERSION = "__SHELL_VERSION__";
+const SHELL_ASSETS = __SHELL_ASSETS__;
+const CACHE_PREFIX = "terreni-shell-";
+const SHELL_CACHE = CACHE_PREFIX + SHELL_VERSION;
+const NAV_TIMEOUT_MS = 2500;
+
+self.addEventListener("install", (event) => {
+  console.log("[SW] install", SHELL_VERSION);
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then((cache) => cache.addAll(SHELL_ASSETS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  // elimina le cache di versioni precedenti
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(
+        keys
+          .filter((k) => k.startsWith(CACHE_PREFIX) && k !== SHELL_CACHE)
+          .map((k) => caches.delete(k))
+      ))
+      .then(() => self.clients.claim())
+  );
 });
 
-self.addEventListener("fetch", () => {
-  // versione minima
+// Rete con timeout, poi cache (pagina principale)
+function networkFirst(request) {
+  return new Promise((resolve) => {
+    let settled = false;
+    const fromCache = () => caches.match("/").then((r) => r || Response.error());
+    const timer = setTimeout(() => {
+      if (!settled) { settled = true; resolve(fromCache()); }
+    }, NAV_TIMEOUT_MS);
+    fetch(request)
+      .then((resp) => {
+        clearTimeout(timer);
+        if (!settled) { settled = true; resolve(resp); }
+      })
+      .catch(() => {
+        clearTimeout(timer);
+        if (!settled) { settled = true; resolve(fromCache()); }
+      });
+  });
+}
+
+// Cache, poi rete (asset versionati e JSON contee immutabili)
+function cacheFirst(request) {
+  return caches.match(request).then((hit) => {
+    if (hit) return hit;
+    return fetch(request).then((resp) => {
+      if (resp && resp.ok) {
+        const copy = resp.clone();
+        caches.open(SHELL_CACHE).then((cache) => cache.put(request, copy));
+      }
+      return resp;
+    });
+  });
+}
+
+self.addEventListener("fetch", (event) => {
+  const req = event.request;
+  if (req.method !== "GET") return;
+  const url = new URL(req.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (req.mode === "navigate" && url.pathname === "/") {
+    event.respondWith(networkFirst(req));
+    return;
+  }
+  if (url.pathname.startsWith("/static/") || url.pathname.startsWith("/counties/")) {
+    event.respondWith(cacheFirst(req));
+  }
+  // /jobs, /api, /download, /results: sempre rete (nessuna cache)
 });
@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Niente Chrome né file di metriche durante i test
+os.environ.setdefault("DRIVER_POOL_PREWARM", "0")
+os.environ.setdefault("METRICS", "0")
+# Il runner Zillow scrive nel log già all'import: fuori da runner_debug.log del repository
+os.environ.setdefault("ZILLOW_RUNNER_LOG", os.path.join(tempfile.mkdtemp(prefix="zillow-runner-"), "runner_debug.log"))
@@ -0,0 +1,41 @@
+# tests/test_app_results.py
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    (tmp_path / "jobs").mkdir()
+    (tmp_path / "jobs" / "abc.json").write_text('{"params": {"access_code": "X"}}')
+    (tmp_path / "test_codes_usage.json").write_text("{}")
+    (tmp_path / "snapshots").mkdir()
+    (tmp_path / "snapshots" / "page.html").write_text("<html></html>")
+    (tmp_path / "zillow_20250101_120000.xlsx").write_bytes(b"xlsx")
+    (tmp_path / "zillow_20250101_120000.csv.part").write_text("in scrittura")
+    monkeypatch.setattr(app_module, "RESULTS_DIR", str(tmp_path))
+    return app_module.app.test_client()
+
+
+def test_list_results_hides_job_records(client):
+    assert client.get("/results").get_json() == ["snapshots/page.html", "zillow_20250101_120000.xlsx"]
+
+
+def test_list_results_ext_filter(client):
+    assert client.get("/results?ext=xlsx").get_json() == ["zillow_20250101_120000.xlsx"]
+
+
+@pytest.mark.parametrize("url", [
+    "/results/jobs/abc.json", "/download/jobs/abc.json",
+    "/results/test_codes_usage.json", "/download/test_codes_usage.json",
+    "/results/zillow_20250101_120000.csv.part",
+    "/results/../app.py", "/download/..%2Fapp.py", "/results/missing.xlsx",
+])
+def test_private_or_outside_files_are_not_served(client, url):
+    assert client.get(url).status_code == 404
+
+
+def test_result_files_are_downloadable(client):
+    for url in ("/results/zillow_20250101_120000.xlsx", "/download/zillow_20250101_120000.xlsx"):
+        resp = client.get(url)
+        assert resp.status_code == 200 and resp.data == b"xlsx"
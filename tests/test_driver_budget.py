@@ -0,0 +1,79 @@
+# tests/test_driver_budget.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scraper_core import driver_factory as df, progress
+
+
+class _FakeDriver:
+    current_url = "about:blank"
+    window_handles = ["main"]
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    p = df.DriverPool(size=4, factory=_FakeDriver)
+    monkeypatch.setattr(df, "_POOL", p)
+    return p
+
+
+def test_budget_defaults_to_pool_size(pool):
+    assert df.driver_budget() == 4
+    assert df.fanout(10) == 4
+    assert df.fanout(10, tasks=3) == 3
+
+
+def test_budget_caps_fanout(pool):
+    with df.budget(1):
+        assert df.fanout(2) == 1
+    assert df.driver_budget() == 4
+
+
+def test_with_budget_reaches_worker_threads(pool):
+    seen = []
+    fn = df.with_budget(2, lambda: seen.append((df.driver_budget(), progress.wrap(df.driver_budget)())))
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        ex.submit(progress.wrap(fn)).result()
+    assert seen == [(2, 2)]
+
+
+def test_nested_fanout_never_waits_on_lease(pool):
+    # job (quota 2) -> 2 fonti -> pagine: le lease in volo non superano mai la quota
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def page():
+        # timeout minimo: con il budget rispettato c'è sempre uno slot libero
+        with pool.lease(timeout=0.001):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+
+    def source():
+        with ThreadPoolExecutor(max_workers=df.fanout(4)) as ex:
+            for f in [ex.submit(progress.wrap(page)) for _ in range(6)]:
+                f.result()
+
+    def job():
+        workers = df.fanout(2, tasks=2)
+        run = df.with_budget(df.driver_budget() // workers, source)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for f in [ex.submit(progress.wrap(run)) for _ in range(2)]:
+                f.result()
+
+    with ThreadPoolExecutor(max_workers=2) as jobs:
+        for f in [jobs.submit(df.with_budget(pool.size // 2, job)) for _ in range(2)]:
+            f.result()
+    assert peak[0] <= pool.size
@@ -0,0 +1,30 @@
+# tests/test_excel.py
+import pandas as pd
+from openpyxl import load_workbook
+
+from scraper_core import scraper
+
+
+def test_save_excel_styles(tmp_path):
+    df = pd.DataFrame({
+        "Status": ["for sale", "sold"],
+        "Price": [100000.0, 250000.0],
+        "Acres": [2.5, 10.0],
+        "Price_per_Acre": [40000.0, 25000.0],
+        "Link": ["https://www.zillow.com/homedetails/1_zpid/", None],
+    })
+    out = tmp_path / "out.xlsx"
+    scraper._save_excel(df, str(out), "zillow")
+
+    ws = load_workbook(out)["ForSale"]
+    row = scraper.HEADER_ROW
+    header = {c.value: c for c in ws[row]}
+    assert header["Price"].font.b and header["Price"].style == "scr_header"
+    assert ws["A1"].style == "scr_label" and ws["B1"].number_format == scraper.NUMBER_FORMATS["Price"]
+
+    data = {name: ws.cell(row + 1, c.column) for name, c in header.items()}
+    assert data["Price"].style == "scr_price" and data["Price"].number_format == '"$"#,##0'
+    assert data["Acres"].number_format == "#,##0.00"
+    assert data["Link"].style == "Hyperlink"
+    assert data["Link"].hyperlink.target == "https://www.zillow.com/homedetails/1_zpid/"
+    assert load_workbook(out)["Sold"].max_row == row + 1
@@ -0,0 +1,76 @@
+# tests/test_exporters.py
+import csv
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from scraper_core import exporters, scraper
+from scraper_core.sources import SourceSpec
+
+SPEC = SourceSpec(name="fake", label="Fake", module="fake")
+ROWS = [{"Price": 1000.0, "Title": "x", "Link": "https://a"}, {"Price": 2000.0, "Title": "y", "Link": "https://b"}]
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.reader(f))
+
+
+def _run(tmp_path, monkeypatch, fn, formats=("csv", "jsonl")):
+    monkeypatch.setattr(scraper.REGISTRY, "entry_point", lambda name: fn)
+    return scraper._run_source(SPEC, {}, str(tmp_path), "t", formats)
+
+
+def test_rows_are_written_while_the_source_is_still_running(tmp_path, monkeypatch):
+    seen = {}
+
+    def source(**_):
+        exporters.stream_rows(ROWS[:1])
+        part = tmp_path / "fake_risultati_estrazione_t.jsonl.part"
+        seen["part"] = part.exists()
+        exporters.stream_rows(pd.DataFrame(ROWS[1:]))
+        return ROWS
+
+    paths, messages = _run(tmp_path, monkeypatch, source)
+    assert seen["part"]
+    assert sorted(os.path.basename(p) for p in paths) == ["fake_risultati_estrazione_t.csv",
+                                                          "fake_risultati_estrazione_t.jsonl"]
+    rows = _read_csv(tmp_path / "fake_risultati_estrazione_t.csv")
+    # stesse colonne dell'Excel (Source aggiunta, Title tolta), nessuna riga doppia
+    assert rows == [["Source", "Price", "Link"], ["Fake", "1000.0", "https://a"], ["Fake", "2000.0", "https://b"]]
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".part")]
+
+
+def test_source_without_streaming_falls_back_to_the_dataframe(tmp_path, monkeypatch):
+    _run(tmp_path, monkeypatch, lambda **_: ROWS, formats=("jsonl",))
+    with open(tmp_path / "fake_risultati_estrazione_t.jsonl", encoding="utf-8") as f:
+        recs = [json.loads(line) for line in f]
+    assert recs == [{"Source": "Fake", "Price": 1000.0, "Link": "https://a"},
+                    {"Source": "Fake", "Price": 2000.0, "Link": "https://b"}]
+
+
+def test_failed_source_leaves_no_partial_files(tmp_path, monkeypatch):
+    def source(**_):
+        exporters.stream_rows(ROWS)
+        raise RuntimeError("blocked")
+
+    paths, messages = _run(tmp_path, monkeypatch, source)
+    assert paths == [] and any("blocked" in m for m in messages)
+    assert os.listdir(tmp_path) == []
+
+
+def test_stream_rows_without_export_is_a_no_op():
+    exporters.stream_rows(ROWS)
+
+
+@pytest.mark.skipif(exporters.pq is None, reason="pyarrow non installato")
+def test_parquet_stream_keeps_a_stable_schema(tmp_path):
+    sink = exporters.StreamExport(str(tmp_path / "out"), ["parquet"])
+    sink.write([{"Price": 1.0, "Link": None}])
+    sink.write([{"Price": 2.0, "Link": "https://b"}])
+    paths, messages = sink.close()
+    assert messages == []
+    table = exporters.pq.read_table(paths[0])
+    assert table.num_rows == 2 and str(table.schema.field("Link").type) == "string"
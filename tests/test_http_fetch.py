@@ -0,0 +1,110 @@
+# tests/test_http_fetch.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.fixtures import load
+from scraper_core import http_fetch, zillow_test_scrape as zts
+from scraper_core.http_fetch import HttpFetcher, detect_block
+
+EMPTY = ('<html><script id="__NEXT_DATA__" type="application/json">'
+         '{"props":{"pageProps":{"searchPageState":{"cat1":{"searchResults":{"listResults":[]}}}}}}'
+         '</script></html>')
+CAPTCHA = '<html><body><div id="px-captcha">Press &amp; Hold to confirm you are a human</div></body></html>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # pagine registrate servite in locale al posto di zillow.com (ZILLOW_HTTP_BASE)
+    routes = {
+        "/appling-county-ga/land/": (200, lambda: load("zillow_search.html")),
+        "/empty/": (200, lambda: EMPTY),
+        "/captcha/": (200, lambda: CAPTCHA),
+        "/limited/": (429, lambda: "Too Many Requests"),
+    }
+
+    def do_GET(self):
+        status, body = self.routes.get(self.path, (404, lambda: "not found"))
+        data = body().encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Set-Cookie", "zguid=abc; Path=/")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def fetcher(server, tmp_path, monkeypatch):
+    f = HttpFetcher(cookie_path=str(tmp_path / "cookies.json"), base_override=server, timeout=5)
+    monkeypatch.setattr(zts, "get_fetcher", lambda: f)
+    yield f
+    f.close()
+
+
+@pytest.mark.parametrize("status, html, reason", [
+    (200, load("zillow_search.html"), ""),
+    (200, CAPTCHA, "marker:px-captcha"),
+    (429, "", "http-429"),
+    (200, "<html></html>", "no-next-data"),
+    (None, "", "no-response"),
+])
+def test_detect_block(status, html, reason):
+    assert detect_block(status, html) == reason
+
+
+def test_base_override_keeps_path_and_query(fetcher, server):
+    assert fetcher._target("https://www.zillow.com/a/b/?searchQueryState=%7B%7D") == server + "/a/b/?searchQueryState=%7B%7D"
+
+
+def test_fast_path_hit_and_fallbacks(fetcher):
+    assert zts._fetch_http("https://www.zillow.com/appling-county-ga/land/") is not None
+    for path in ("/empty/", "/captcha/", "/limited/", "/limited/"):
+        assert zts._fetch_http("https://www.zillow.com" + path) is None
+
+    st = fetcher.stats()
+    assert (st["requests"], st["hits"], st["fallbacks"]) == (5, 1, 4)
+    assert st["reasons"] == {"empty-payload": 1, "marker:px-captcha": 1, "http-429": 2}
+    assert st["hit_rate"] == 0.2
+
+
+def test_cookies_saved_only_when_changed(fetcher, tmp_path, monkeypatch):
+    writes = []
+    replace = http_fetch.os.replace
+    monkeypatch.setattr(http_fetch.os, "replace", lambda a, b: (writes.append(b), replace(a, b)))
+    for _ in range(3):
+        fetcher.fetch("https://www.zillow.com/empty/")
+    assert len(writes) == 1  # stesso cookie a ogni risposta: un solo salvataggio
+    assert json.loads((tmp_path / "cookies.json").read_text())[0]["name"] == "zguid"
+
+
+def test_stats_since_snapshot(fetcher):
+    fetcher.record(False, "http-429")
+    before = fetcher.stats()
+    fetcher.record(True)
+    fetcher.record(False, "http-429")
+    fetcher.record(False, "empty-payload")
+    st = fetcher.stats(since=before)
+    assert (st["hits"], st["fallbacks"], st["hit_rate"]) == (1, 2, 0.333)
+    assert st["reasons"] == {"http-429": 1, "empty-payload": 1}
+
+
+def test_crawl_reports_its_own_hit_rate(fetcher, capsys):
+    fetcher.record(False, "http-429")  # crawl precedente nello stesso processo
+    rows = list(zts.iter_pages(lambda n: "https://www.zillow.com/appling-county-ga/land/", max_pages=1,
+                               use_http=True))
+    assert rows
+    assert "[HTTP] fast path hit rate: 1/1 (100%)" in capsys.readouterr().out
@@ -0,0 +1,112 @@
+# tests/test_jobs.py
+import json
+import threading
+
+import pytest
+
+import app as app_module
+from jobs import JobManager, DONE
+
+
+def _wait(manager, job_id):
+    events, state = [], None
+    last = 0
+    while state != DONE:
+        new, state = manager.wait_events(job_id, last, timeout=5)
+        events += new
+        last = events[-1]["seq"] if events else last
+    return events
+
+
+def test_events_appended_and_state_persisted_on_changes(tmp_path, monkeypatch):
+    manager = JobManager(str(tmp_path), max_workers=1)
+    writes = []
+    persist = manager._persist
+    monkeypatch.setattr(manager, "_persist", lambda job: (writes.append(job.state), persist(job)))
+
+    def fn():
+        from scraper_core import progress
+        for i in range(50):
+            progress.emit("page", page=i)
+        return ["out.xlsx"], []
+
+    job = manager.submit(fn, {})
+    events = _wait(manager, job.id)
+    manager._executor.shutdown(wait=True)  # stato finale salvato dopo la notifica
+    assert len(events) == 52
+    # coda, avvio, fine: non una riscrittura per evento
+    assert writes == ["queued", "running", "done"]
+
+    state = json.loads((tmp_path / f"{job.id}.json").read_text())
+    assert "events" not in state and state["state"] == DONE
+    lines = (tmp_path / f"{job.id}.events.jsonl").read_text().splitlines()
+    assert [json.loads(line)["seq"] for line in lines] == list(range(1, 53))
+
+
+def test_other_worker_reads_events_from_file(tmp_path):
+    manager = JobManager(str(tmp_path), max_workers=1)
+    job = manager.submit(lambda: (["out.xlsx"], []), {})
+    manager._executor.shutdown(wait=True)
+
+    other = JobManager(str(tmp_path), max_workers=1)
+    events, state = other.wait_events(job.id, after=1, timeout=0)
+    assert state == DONE
+    assert [e["seq"] for e in events] == [2]
+    assert other.get(job.id)["events"][0]["status"] == "start"
+
+
+def test_read_events_skips_truncated_line(tmp_path):
+    manager = JobManager(str(tmp_path), max_workers=1)
+    (tmp_path / "ab.events.jsonl").write_text('{"seq": 1}\n{"seq": 2')
+    assert manager._read_events("ab") == [{"seq": 1}]
+
+
+@pytest.fixture
+def one_stream(tmp_path, monkeypatch):
+    # JobManager su tmp_path: niente file di job nella results/ del progetto
+    manager = JobManager(str(tmp_path), max_workers=1)
+    monkeypatch.setattr(app_module, "JOBS", manager)
+    monkeypatch.setattr(app_module, "_SSE_SLOTS", threading.BoundedSemaphore(1))
+    job = manager.submit(lambda: (["out.xlsx"], []), {})
+    _wait(manager, job.id)
+    return app_module.app.test_client(), job.id
+
+
+def test_sse_streams_capped_per_worker(one_stream):
+    client, job_id = one_stream
+    first = client.get(f"/jobs/{job_id}/events", buffered=False)
+    assert first.status_code == 200
+    busy = client.get(f"/jobs/{job_id}/events")
+    assert busy.status_code == 503 and busy.headers["Retry-After"]
+    first.close()
+    again = client.get(f"/jobs/{job_id}/events")
+    assert again.status_code == 200
+    assert b"event: end" in again.data
+
+
+def test_driver_share_follows_running_jobs(tmp_path, monkeypatch):
+    from scraper_core import driver_factory as df
+    monkeypatch.setattr(df, "_POOL", df.DriverPool(size=4, factory=object))
+    manager = JobManager(str(tmp_path), max_workers=2)
+    first_running, second_done, release = threading.Event(), threading.Event(), threading.Event()
+    seen = {}
+
+    def first():
+        seen["first"] = df.driver_budget()
+        first_running.set()
+        release.wait(5)
+        return [], []
+
+    def second():
+        seen["second"] = df.driver_budget()
+        second_done.set()
+        return [], []
+
+    manager.submit(first, {})
+    assert first_running.wait(5)
+    manager.submit(second, {})
+    assert second_done.wait(5)
+    release.set()
+    manager._executor.shutdown(wait=True)
+    # da solo tutto il pool; il secondo job parte con il pool diviso fra due
+    assert seen == {"first": 4, "second": 2}
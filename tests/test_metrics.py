@@ -0,0 +1,83 @@
+# tests/test_metrics.py
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scraper_core.metrics import Registry
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _worker_file(directory, pid, jobs_total, in_flight):
+    data = {"pid": pid, "ts": time.time(), "metrics": {
+        "jobs_total": {"kind": "counter", "help": "job", "labels": [], "series": [[[], jobs_total]]},
+        "in_flight": {"kind": "gauge", "help": "in corso", "labels": [], "series": [[[], in_flight]]},
+    }}
+    (directory / f"{pid}.json").write_text(json.dumps(data))
+
+
+def _value(text, name):
+    return [line.split()[-1] for line in text.splitlines() if line.startswith(name + " ")]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    reg = Registry(directory=str(tmp_path), flush_seconds=60, enabled=True)
+    reg.counter("jobs_total", "job").inc()
+    reg.gauge("in_flight", "in corso").set(1)
+    return reg
+
+
+def test_render_sums_live_workers(tmp_path, registry):
+    _worker_file(tmp_path, os.getppid(), jobs_total=4, in_flight=2)
+    text = registry.render()
+    assert _value(text, "jobs_total") == ["5"]
+    assert _value(text, "in_flight") == ["3"]
+    assert _value(text, "scraper_metrics_workers") == ["2"]
+
+
+def test_dead_worker_absorbed_once(tmp_path, registry):
+    dead = _dead_pid()
+    _worker_file(tmp_path, dead, jobs_total=3, in_flight=7)
+    text = registry.render()
+    assert _value(text, "jobs_total") == ["4"]
+    assert _value(text, "in_flight") == ["1"]  # gauge del morto non conta
+    assert not (tmp_path / f"{dead}.json").exists()
+    assert _value(registry.render(), "jobs_total") == ["4"]
+
+    # il totale assorbito è nel file di questo worker, visibile agli altri processi
+    own = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert own["retired"]["jobs_total"]["series"] == [[[], 3]]
+    assert "in_flight" not in own["retired"]
+
+
+def test_render_flushes_pending_changes(tmp_path, registry):
+    registry.flush()
+    registry.counter("jobs_total", "job").inc()  # entro flush_seconds: solo in memoria
+    path = tmp_path / f"{os.getpid()}.json"
+    assert json.loads(path.read_text())["metrics"]["jobs_total"]["series"] == [[[], 1]]
+    registry.render()
+    assert json.loads(path.read_text())["metrics"]["jobs_total"]["series"] == [[[], 2]]
+
+
+def test_timer_flushes_last_change(tmp_path):
+    reg = Registry(directory=str(tmp_path), flush_seconds=0.05, enabled=True)
+    counter = reg.counter("jobs_total", "job")
+    counter.inc()
+    counter.inc()
+    path = tmp_path / f"{os.getpid()}.json"
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        if path.exists() and json.loads(path.read_text())["metrics"]["jobs_total"]["series"] == [[[], 2]]:
+            break
+        time.sleep(0.02)
+    else:
+        pytest.fail("l'ultima modifica non è mai arrivata su disco")
@@ -0,0 +1,95 @@
+# tests/test_netblock.py
+import json
+import re
+
+import pytest
+
+from scraper_core import driver_factory as df, netblock
+
+
+def _blocked(profile, url):
+    """Stessa semantica di Network.setBlockedURLs: '*' = qualunque sequenza, il resto letterale."""
+    return any(re.fullmatch(".*".join(map(re.escape, p.split("*"))), url) for p in netblock.patterns(profile))
+
+
+@pytest.mark.parametrize("url", [
+    "https://photos.zillowstatic.com/fp/abc-p_e.jpg",
+    "https://www.zillowstatic.com/s3/web/app.css?v=12",
+    "https://www.zillow.com/static/logo.svg#icon",
+    "https://fonts.gstatic.com/s/inter.woff2",
+    "https://maps.googleapis.com/maps/vt?pb=1",
+    "https://www.googletagmanager.com/gtm.js?id=GTM-1",
+    "https://www.facebook.com/tr?id=1&ev=PageView",
+])
+def test_zillow_profile_blocks_static_assets(url):
+    assert _blocked("zillow-json-only", url)
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.zillow.com/appling-county-ga/land/?searchQueryState=%7B%7D",
+    "https://www.zillow.com/async-create-search-page-state?format=.css-free",
+    "https://www.zillow.com/graphql/?q=thumb.png-variant",
+    "https://www.zillow.com/track?ref=google-analytics.com",
+    "https://www.zillowstatic.com/s3/web/app.js",
+])
+def test_zillow_profile_keeps_pages_and_api(url):
+    assert not _blocked("zillow-json-only", url)
+
+
+def test_realtor_profile_keeps_css_and_blocks_photos():
+    assert not _blocked("realtor-cards", "https://www.realtor.com/_next/static/css/app.css")
+    assert _blocked("realtor-cards", "https://ap.rdcpix.com/abc-m123s.jpg")
+    assert _blocked("realtor-cards", "https://ap.rdcpix.com/abc-m123s")
+    assert not _blocked("realtor-cards", "https://www.realtor.com/api/v1/hulk?img=rdcpix.com")
+
+
+def test_unknown_or_none_profile_blocks_nothing():
+    assert netblock.patterns("none") == [] and netblock.patterns("bogus") == []
+
+
+def _ev(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class _LogDriver:
+    current_url = "about:blank"
+    window_handles = ["main"]
+
+    def __init__(self):
+        self.log = []
+        self.cdp = []
+
+    def get_log(self, kind):
+        out, self.log = self.log, []
+        return out
+
+    def execute_cdp_cmd(self, cmd, args):
+        self.cdp.append(cmd)
+
+    def get(self, url):
+        self.log.append(_ev("Network.requestWillBeSent"))
+        self.log.append(_ev("Network.loadingFinished", encodedDataLength=500))
+
+    def quit(self):
+        pass
+
+
+def test_page_transfer_counts_bytes_requests_and_blocked():
+    d = _LogDriver()
+    d.log = [_ev("Network.requestWillBeSent"), _ev("Network.loadingFinished", encodedDataLength=1200),
+             _ev("Network.requestWillBeSent"), _ev("Network.loadingFailed", blockedReason="inspector"),
+             _ev("Network.dataReceived", dataLength=99)]
+    t = netblock.page_transfer(d, "zillow")
+    assert (t["bytes"], t["requests"], t["blocked"], t["via"]) == (1200, 2, 1, "perf_log")
+
+
+def test_release_drains_unread_perf_log():
+    d = _LogDriver()
+    pool = df.DriverPool(size=1, factory=lambda: d)
+    with pool.lease() as drv:  # es. /diag/uc: naviga senza leggere il log
+        drv.get("https://example.com/")
+    assert d.log == []
+    with pool.lease(profile="realtor-cards"):
+        # niente voci residue della lease precedente (e nessun ripiego JS sul driver finto)
+        assert netblock.page_transfer(d) is None
+    assert d.cdp == ["Network.enable", "Network.setBlockedURLs"]
@@ -0,0 +1,74 @@
+# tests/test_page_cache.py
+import sqlite3
+import time
+
+import pytest
+
+import app as app_module
+from scraper_core import page_cache
+from scraper_core.page_cache import PageCache, normalize_key
+
+
+def test_normalize_key_orders_params_and_state():
+    a = normalize_key('HTTPS://www.Zillow.com/homes/?b=2&a=1&searchQueryState={"y":1,"x":{"b":2,"a":1}}')
+    b = normalize_key('https://www.zillow.com/homes?a=1&searchQueryState={"x":{"a":1,"b":2},"y":1}&b=2')
+    assert a == b
+    assert normalize_key("https://www.realtor.com/x/", "p2") == "https://www.realtor.com/x#p2"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(str(tmp_path / "pages.sqlite3"), ttl=60, max_bytes=10_000)
+
+
+def test_ttl_expiry(cache):
+    cache.put("k", [{"a": 1}], ttl=-1)
+    assert cache.get("k") is None
+    cache.put("k", [{"a": 1}])
+    assert cache.get("k") == [{"a": 1}]
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["entries"]) == (1, 1, 1)
+
+
+def test_lru_eviction(cache):
+    blob = "x" * 4000
+    cache.put("old", blob)
+    cache.put("mid", blob)
+    time.sleep(0.01)
+    assert cache.get("old") == blob  # ora "mid" è la meno usata
+    cache.put("new", blob)
+    assert cache.get("mid") is None
+    assert cache.get("old") == blob and cache.get("new") == blob
+    assert cache.stats()["evictions"] == 1
+
+
+def test_connections_closed(cache, monkeypatch):
+    opened = []
+    real_connect = sqlite3.connect
+
+    class Tracked(sqlite3.Connection):
+        def close(self):
+            opened.remove(self)
+            super().close()
+
+    def connect(*args, **kw):
+        con = real_connect(*args, factory=Tracked, **kw)
+        opened.append(con)
+        return con
+
+    monkeypatch.setattr(page_cache.sqlite3, "connect", connect)
+    cache.put("k", 1)
+    cache.get("k")
+    cache.get("missing")
+    cache.stats()
+    assert opened == []
+
+
+def test_stats_exposed(cache, monkeypatch):
+    monkeypatch.setattr(page_cache, "get_cache", lambda: cache)
+    cache.put("k", 1)
+    client = app_module.app.test_client()
+    diag = client.get("/diag/cache").get_json()
+    assert diag["ok"] and diag["entries"] == 1 and diag["puts"] == 1
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "scraper_page_cache_entries 1" in text
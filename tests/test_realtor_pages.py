@@ -0,0 +1,52 @@
+# tests/test_realtor_pages.py
+import threading
+import time
+
+import pytest
+
+from scraper_core import realtor_scrape
+
+
+def _fake_pages(monkeypatch, total, empty_from, delay=0.01):
+    """Pagine da PAGE_SIZE card; da empty_from in poi nessuna card nuova."""
+    fetched = []
+    in_flight = [0, 0]  # correnti, massimo
+    lock = threading.Lock()
+
+    def fetch(url, bucket, page, log):
+        with lock:
+            fetched.append(page)
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(delay)
+        with lock:
+            in_flight[0] -= 1
+        n = 0 if page >= empty_from else realtor_scrape.PAGE_SIZE
+        items = [{"link": f"https://www.realtor.com/x/{page}-{i}"} for i in range(n)]
+        return items, {"page": page, "total": total, "elapsed_s": delay}
+
+    monkeypatch.setattr(realtor_scrape, "_fetch_page", fetch)
+    return fetched, in_flight
+
+
+@pytest.mark.parametrize("total", [None, 40 * realtor_scrape.PAGE_SIZE])
+def test_stops_near_first_empty_page(monkeypatch, total):
+    fetched, in_flight = _fake_pages(monkeypatch, total, empty_from=4)
+    listings, pages = realtor_scrape._crawl_bucket("https://www.realtor.com/s", "for_sale",
+                                                   lambda *a: None, max_pages=40, concurrency=3)
+    assert len(listings) == 3 * realtor_scrape.PAGE_SIZE
+    assert pages == 4
+    # al più concurrency-1 pagine oltre la prima vuota, anche con il contatore a 40 pagine
+    assert max(fetched) <= 4 + 2
+    assert in_flight[1] <= 3
+
+
+def test_reads_all_counted_pages_in_order(monkeypatch):
+    fetched, in_flight = _fake_pages(monkeypatch, 5 * realtor_scrape.PAGE_SIZE, empty_from=99)
+    seen = []
+    listings, pages = realtor_scrape._crawl_bucket(
+        "https://www.realtor.com/s", "sold", lambda *a: None, max_pages=40, concurrency=2,
+        on_page=lambda bucket, new: seen.append(new[0]["link"].rsplit("/", 1)[1].split("-")[0]))
+    assert pages == 5 and sorted(fetched) == [1, 2, 3, 4, 5]
+    assert seen == ["1", "2", "3", "4", "5"]
+    assert in_flight[1] <= 2
@@ -0,0 +1,28 @@
+# tests/test_waits.py
+import pytest
+
+from scraper_core import waits
+
+
+@pytest.mark.parametrize("ready, expected", [
+    (0.0, 2.0),     # già presente: restava solo lo sleep iniziale
+    (1.2, 2.0),
+    (2.0, 2.0),
+    (2.1, 2.5),     # comparsa subito dopo un controllo: visto al successivo
+    (3.1, 3.5),
+    (30.0, 20.0),   # oltre il timeout del polling
+    (None, 20.0),   # mai comparsa: sleep + timeout intero
+])
+def test_polled_baseline_realtor(ready, expected):
+    assert waits.polled_baseline(ready, timeout=18, poll=0.5, settle=2.0) == pytest.approx(expected)
+
+
+def test_polled_baseline_without_settle():
+    assert waits.polled_baseline(0.0, timeout=15, poll=0.5) == 0.0
+    assert waits.polled_baseline(0.3, timeout=15, poll=0.5) == pytest.approx(0.5)
+    assert waits.polled_baseline(1.0, timeout=15, poll=0.5) == pytest.approx(1.0)
+
+
+def test_record_saved_never_negative():
+    assert waits.record_saved("realtor", "wait", 2.0, 3.0) == 0.0
+    assert waits.record_saved("realtor", "wait", 20.0, 18.0) == pytest.approx(2.0)
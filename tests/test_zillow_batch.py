@@ -0,0 +1,44 @@
+# tests/test_zillow_batch.py
+import json
+
+from scraper_core import zillow_batch as zb
+
+UNIT = {"state": "GA", "county": "Appling", "tipo": "Sold", "period": "12m"}
+
+
+def _rec(key, status="ok", **extra):
+    return {"key": key, "state": "GA", "county": "Appling", "tipo": "Sold", "period": "12m",
+            "status": status, **extra}
+
+
+def test_unit_key_includes_filters():
+    a = zb._unit_key(UNIT, zb.sweep_params(None, None, 5))
+    assert a == zb._unit_key(UNIT, zb.sweep_params("", " ", 5))
+    assert a != zb._unit_key(UNIT, zb.sweep_params("0", "87120", 5))
+    assert a != zb._unit_key(UNIT, zb.sweep_params(None, None, 1))
+    assert a == zb._unit_key(dict(UNIT), zb.sweep_params(None, None, 5))
+
+
+def test_read_checkpoint_keeps_last_ok_and_skips_truncated(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    path.write_text("\n".join([
+        json.dumps(_rec("k1", rows=1)),
+        json.dumps(_rec("k2", status="error")),
+        json.dumps(_rec("k1", rows=2)),
+        '{"key": "k3", "sta',  # riga troncata da un'interruzione
+    ]) + "\n")
+    done = zb.read_checkpoint(str(path))
+    assert set(done) == {"k1"} and done["k1"]["rows"] == 2
+    assert zb.read_checkpoint(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_sweep_ignores_records_from_other_filters(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    params = zb.sweep_params("1", "5", 3)
+    stale = _rec(zb._unit_key(UNIT, zb.sweep_params(None, None, 3)), listings=[{"Price": "old"}])
+    current = _rec(zb._unit_key(UNIT, params), listings=[{"Price": "new"}])
+    path.write_text(json.dumps(stale) + "\n" + json.dumps(current) + "\n")
+    # tutto già nel checkpoint con questi filtri: nessun worker lanciato
+    done = zb.sweep([UNIT], workers=1, checkpoint=str(path), min_lot="1", max_lot="5", max_pages=3)
+    assert list(done) == [current["key"]]
+    assert done[current["key"]]["listings"] == [{"Price": "new"}]
@@ -0,0 +1,112 @@
+# tests/test_zillow_parser.py
+import json
+
+import pytest
+
+from scraper_core import zillow_test_scrape as zts
+
+
+def _item(zpid, price="$100,000", url=None):
+    return {"zpid": zpid, "price": price, "address": f"{zpid} Main St, Austin, TX 78701",
+            "detailUrl": url or f"https://www.zillow.com/homedetails/{zpid}_zpid/",
+            "lotAreaString": "2.5 acres"}
+
+
+def _payload():
+    return {
+        "buildId": "x",
+        "props": {"pageProps": {
+            # chiavi omonime fuori da searchPageState.catN.searchResults: da ignorare
+            "listResults": [_item("decoy-1")],
+            "gdpClientCache": {"mapResults": [_item("decoy-2")], "totalPages": 99},
+            "searchPageState": {
+                "queryState": {"mapResults": [_item("decoy-3")]},
+                "cat1": {
+                    "searchResults": {"listResults": [_item("1"), _item("2")],
+                                      "mapResults": [_item("2"), {"hdpData": {"homeInfo": {"zpid": "3"}}}]},
+                    "searchList": {"totalPages": 4},
+                },
+                "cat2": {"searchResults": {"listResults": [_item("4")], "mapResults": []}},
+            },
+        }},
+    }
+
+
+def _html(payload, indent=None):
+    blob = json.dumps(payload, indent=indent)
+    return f'<html><script id="__NEXT_DATA__" type="application/json">{blob}</script><p>x</p></html>'
+
+
+def test_next_data_text():
+    html = _html({"a": 1})
+    assert json.loads(zts.next_data_text(html)) == {"a": 1}
+    assert zts.next_data_text("<html></html>") is None
+    assert zts.next_data_text('<script id="__NEXT_DATA__">{"a": 1}') is None  # script non chiuso
+    assert zts.next_data_text("") is None
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_lite_scan_scoped_to_search_results(indent):
+    html = _html(_payload(), indent)
+    lite = zts.extract_next_data_lite(html)
+    full = zts.extract_next_data(html)
+    sps = lite["props"]["pageProps"]["searchPageState"]
+    assert set(sps) == {"cat1", "cat2"}
+    assert [it["zpid"] for it in sps["cat2"]["searchResults"]["listResults"]] == ["4"]
+    assert zts.total_pages_from_payload(lite) == zts.total_pages_from_payload(full) == 4
+    assert zts.collect_rows_from_payload(lite) == zts.collect_rows_from_payload(full)
+
+
+def test_collect_rows_dedups_across_buckets():
+    stats = {}
+    rows = zts.collect_rows_from_payload(_payload(), stats)
+    assert stats == {"listResults": 3, "mapResults": 2, "unique": 4}
+    assert len(rows) == 4
+    assert not any("decoy" in str(r) for r in rows)
+
+
+def test_lite_scan_without_results():
+    assert zts.extract_search_results(None) is None
+    assert zts.extract_search_results(json.dumps({"props": {"pageProps": {}}})) is None
+    empty = {"props": {"pageProps": {"searchPageState": {"cat1": {
+        "searchResults": {"listResults": [], "mapResults": []}, "searchList": {"totalPages": 1}}}}}}
+    assert zts.extract_search_results(json.dumps(empty)) is None
+    # JSON troncato: nessun risultato, nessuna eccezione
+    assert zts.extract_search_results(json.dumps(_payload())[:300]) is None
+
+
+# ------------------------------
+# Pagina caricata con Chrome (driver finto dei benchmark)
+# ------------------------------
+_CARD = ('<article><a href="/homedetails/9_zpid/">Lotto</a><div>$120,000</div>'
+         '<div>5 acres lot</div><div>1 Main St, Austin, TX 78701</div></article>')
+
+
+def _page_driver(payload):
+    from benchmarks.fake_driver import FakeWebDriver
+    driver = FakeWebDriver()
+    body = _html(payload).replace("<p>x</p>", _CARD) if payload is not None else f"<html><body>{_CARD}</body></html>"
+    driver.load(body, "https://www.zillow.com/austin-tx/")
+    driver.get = lambda url: None  # pagina già caricata
+    return driver
+
+
+@pytest.mark.parametrize("payload", [
+    None,  # niente __NEXT_DATA__
+    {"props": {"pageProps": {"searchPageState": {"cat1": {"searchResults": {"listResults": [], "mapResults": []},
+                                                          "searchList": {"totalPages": 1}}}}}},
+])
+def test_fetch_page_falls_back_to_cards_without_payload_rows(payload, monkeypatch):
+    monkeypatch.setattr(zts, "NEXT_DATA_TIMEOUT", 0.1)
+    monkeypatch.setattr(zts, "LATE_DATA_SLEEP", 0)
+    driver = _page_driver(payload)
+    _, rows, _, _, via, _ = zts._fetch_page(lambda: driver, "https://www.zillow.com/austin-tx/", use_http=False)
+    assert via == "chrome"
+    assert [(r.price, r.acres) for r in rows] == [("$120,000", "5")]
+    assert rows[0].link == "https://www.zillow.com/homedetails/9_zpid/"
+
+
+def test_fetch_page_prefers_payload_rows():
+    driver = _page_driver(_payload())
+    _, rows, _, _, _, _ = zts._fetch_page(lambda: driver, "https://www.zillow.com/austin-tx/", use_http=False)
+    assert len(rows) == 4 and all(r.link != "https://www.zillow.com/homedetails/9_zpid/" for r in rows)